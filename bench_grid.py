@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for stock grid extraction
+Compares pd.read_html on the grid's outerHTML with the lxml row parser
+(HTTP engine) and the JSON cell extractor (browser engine)
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+from io import StringIO
+
+import pandas as pd
+
+from module.grid import parse_grid_html, split_rows
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+GRID_ID = "ctl00_ContentPlaceHolder1_Grid_req"
+HEADER = ["Brand", "Size", "Batch", "Opening", "Received", "Issued", "Closing", "Value"]
+
+def grid_html(rows):
+    """A GridView-like table with ASP.NET's usual inline styling"""
+    style = ' style="color:#333333;background-color:#F7F6F3;border-width:1px;border-style:solid;"'
+    head = "".join(f'<th scope="col"{style}>{name}</th>' for name in HEADER)
+    body = "".join(
+        f"<tr{style}>"
+        + "".join(f"<td{style}>{cell}</td>" for cell in (f"Brand {i}", "750 ML", f"B{i:05d}", i, f"{i * 2:,}", i, i * 2, f"{i * 101.5:,.2f}"))
+        + "</tr>"
+        for i in range(rows)
+    )
+    return f'<table cellspacing="0" rules="all" border="1" id="{GRID_ID}"><tr>{head}</tr>{body}</table>'
+
+def legacy(html, depot):
+    df = pd.read_html(StringIO(html))[0]
+    df.insert(0, "Depot", depot)
+    return df.values.tolist()
+
+def fast(html, depot):
+    header, rows = parse_grid_html(html, GRID_ID)
+    return [[depot, *row] for row in rows]
+
+def from_cells(raw_rows, depot):
+    header, rows = split_rows(raw_rows)
+    return [[depot, *row] for row in rows]
+
+def timeit(func, *args, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(*args)
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[20, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        html = grid_html(rows)
+        _, parsed = parse_grid_html(html, GRID_ID)
+        raw_rows = [HEADER] + [["" if cell is None else str(cell) for cell in row] for row in parsed]
+        payload = json.dumps(raw_rows)
+        legacy_s = timeit(legacy, html, "Depot", repeat=args.repeat)
+        fast_s = timeit(fast, html, "Depot", repeat=args.repeat)
+        cells_s = timeit(from_cells, json.loads(payload), "Depot", repeat=args.repeat)
+        logger.info(
+            f"{rows:5d} rows: wire outerHTML {len(html) / 1024:7.1f} KiB vs JSON cells {len(payload) / 1024:6.1f} KiB "
+            f"({len(html) / len(payload):4.1f}x); parse pd.read_html {legacy_s * 1000:7.2f} ms vs lxml {fast_s * 1000:6.2f} ms "
+            f"({legacy_s / fast_s:4.1f}x), JSON cells {cells_s * 1000:6.2f} ms ({legacy_s / cells_s:4.1f}x)"
+        )
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark against the local mock BEVCO portal
+Logs in with Chrome, runs each scraper over every mock warehouse and reports
+warehouses/minute and p50/p95 per-target latency per module
+"""
+
+import os
+import sys
+import math
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from datetime import date
+
+# Keep the benchmark away from the real session vault, artifact cache and manifests
+_STATE_DIR = tempfile.mkdtemp(prefix="bevco_bench_")
+os.environ["SESSION_VAULT_DIR"] = os.path.join(_STATE_DIR, "sessions")
+os.environ["ARTIFACT_CACHE_MAX_MB"] = "0"
+os.environ["RUN_MANIFEST_DIR"] = os.path.join(_STATE_DIR, "runs")
+
+from module.mock_portal import MockPortal
+from module.manifest import RunManifest
+import module.login as login
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MODULES = ("invoice", "stock", "inventory")
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+def run_module(module, driver, portal, download_dir, args):
+    """Run one scraper over all mock targets; returns (ok, total, elapsed_s, [seconds])"""
+    manifest = RunManifest(os.path.join(_STATE_DIR, "runs", f"bench_{module}.jsonl"))
+    manifest.begin(module=module, download_dir=download_dir)
+
+    started = time.perf_counter()
+    if module == "invoice":
+        from module import invoice
+        targets = portal.warehouses
+        invoice.scrape_invoice(
+            driver, download_dir, date.today().strftime('%d-%m-%Y'),
+            tabs=args.tabs, pdf_engine=args.pdf_engine, targets=targets, manifest=manifest
+        )
+    elif module == "stock":
+        from module import stock
+        targets = portal.depots
+        stock.scrape_reports(
+            driver, download_dir, engine=args.stock_engine, tabs=args.tabs, targets=targets, manifest=manifest
+        )
+    else:
+        from module import inventory
+        targets = portal.entries
+        inventory.scrap_inventory(
+            driver, download_dir, tabs=args.tabs, pdf_engine=args.pdf_engine, targets=targets, manifest=manifest
+        )
+    elapsed = time.perf_counter() - started
+
+    records = list(manifest.targets.values())
+    ok = sum(1 for record in records if record["status"] == "ok")
+    return ok, len(targets), elapsed, [record["seconds"] for record in records if record["status"] == "ok"]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--modules", nargs="+", choices=MODULES, default=list(MODULES))
+    parser.add_argument("--warehouses", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every portal request")
+    parser.add_argument("--jitter", type=float, default=0.05, help="+/- seconds of random latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="share of postbacks answered with HTTP 500")
+    parser.add_argument("--pdf-kb", type=int, default=40)
+    parser.add_argument("--tabs", type=int, default=1)
+    parser.add_argument("--pdf-engine", choices=("browser", "http"), default="browser")
+    parser.add_argument("--stock-engine", choices=("browser", "http"), default="browser")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--headed", action="store_true", help="show the browser window")
+    args = parser.parse_args()
+
+    portal = MockPortal(
+        warehouses=args.warehouses, latency=args.latency, jitter=args.jitter,
+        failure_rate=args.failure_rate, pdf_kb=args.pdf_kb, seed=args.seed
+    ).start()
+    login.LOGIN_URL = portal.login_url
+    login.USERNAME, login.PASSWORD = "bench", "bench"
+
+    driver = None
+    results = []
+    try:
+        download_root = os.path.join(_STATE_DIR, "downloads")
+        os.makedirs(download_root)
+        driver = login.setup_browser(download_root, headless=not args.headed)
+        if not driver or not login.get_captcha_image(driver, user="bench"):
+            logger.error("❌ Could not open the mock login page")
+            return 1
+        login.login(driver, captcha_text="1234")
+
+        for module in args.modules:
+            download_dir = os.path.join(download_root, module)
+            os.makedirs(download_dir)
+            driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+            results.append((module, *run_module(module, driver, portal, download_dir, args)))
+    finally:
+        if driver:
+            driver.quit()
+        portal.stop()
+        shutil.rmtree(_STATE_DIR, ignore_errors=True)
+
+    logger.info(
+        f"📊 {args.warehouses} warehouses, latency {args.latency}s ±{args.jitter}s, "
+        f"failure rate {args.failure_rate:.0%}, tabs {args.tabs}, pdf {args.pdf_engine}, stock {args.stock_engine}"
+    )
+    for module, ok, total, elapsed, seconds in results:
+        rate = ok / elapsed * 60 if elapsed else 0
+        logger.info(
+            f"{module:9s}: {ok}/{total} ok in {elapsed:7.1f}s, {rate:6.1f} warehouses/min, "
+            f"p50 {percentile(seconds, 0.5):5.2f}s, p95 {percentile(seconds, 0.95):5.2f}s"
+        )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the stock workbook writers
+Compares the per-depot load/save append_df_to_excel with StockWorkbookWriter
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+import pandas as pd
+
+from module.stock import append_df_to_excel, StockWorkbookWriter
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+COLUMNS = ["Brand", "Size", "Batch", "Opening", "Received", "Issued", "Closing", "Value"]
+
+def depot_frame(depot, rows):
+    """Synthetic Grid_req table for one depot, with the Depot column already inserted"""
+    df = pd.DataFrame(
+        [[f"Brand {i}", "750 ML", f"B{i:05d}", i, i * 2, i, i * 2, i * 101.5] for i in range(rows)],
+        columns=COLUMNS
+    )
+    df.insert(0, "Depot", depot)
+    return df
+
+def bench_legacy(directory, frames):
+    filepath = os.path.join(directory, "legacy.xlsx")
+    started = time.perf_counter()
+    for df in frames:
+        append_df_to_excel(filepath, df)
+    return time.perf_counter() - started
+
+def bench_writer(directory, frames):
+    filepath = os.path.join(directory, "writer.xlsx")
+    started = time.perf_counter()
+    writer = StockWorkbookWriter(filepath)
+    for df in frames:
+        writer.append(df.iloc[0, 0], list(df.columns), df.values.tolist())
+    writer.close()
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--depots", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--rows", type=int, default=30, help="rows per depot")
+    parser.add_argument("--skip-legacy-above", type=int, default=None,
+                        help="skip the O(N^2) legacy writer above this many depots")
+    args = parser.parse_args()
+
+    # Keep the per-depot log lines out of the timings
+    logging.getLogger("module.stock").setLevel(logging.WARNING)
+
+    for count in args.depots:
+        frames = [depot_frame(f"Depot {n}", args.rows) for n in range(count)]
+        directory = tempfile.mkdtemp()
+        try:
+            if args.skip_legacy_above is None or count <= args.skip_legacy_above:
+                legacy = bench_legacy(directory, frames)
+                legacy_text = f"{legacy:8.2f}s"
+            else:
+                legacy = None
+                legacy_text = "  skipped"
+            writer = bench_writer(directory, frames)
+            speedup = f"{legacy / writer:6.1f}x" if legacy else "     -"
+            logger.info(f"{count:5d} depots: append_df_to_excel {legacy_text}, StockWorkbookWriter {writer:8.2f}s, speedup {speedup}")
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
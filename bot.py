@@ -1,19 +1,31 @@
 import os
+import time
 import shutil
 import tempfile
 import asyncio
 import logging
 from datetime import datetime, timedelta
 from telegram import Update, InputFile
+from telegram.error import RetryAfter
 from telegram.ext import (
     ApplicationBuilder, CommandHandler, MessageHandler,
     filters, ContextTypes, ConversationHandler
 )
-from module.login import setup_browser, get_captcha_image, login
-import module.invoice as invoice
-import module.stock as stock
-import module.inventory as inventory
 from dotenv import load_dotenv
+
+# The module.* imports below read their settings from the environment at import time
+load_dotenv(override=True)
+
+from module.pool import DriverPool
+from module.chromedriver import startup_check
+from module.lean import lean_enabled_for
+from module.manifest import RunManifest, latest_unfinished, PENDING, OK, FAILED
+from module.metrics import JobMetrics, job_scope, phase, observe, inc, summary, start_server
+from module.update_processor import PerUserUpdateProcessor
+from module.scheduler import JobScheduler, JobCoalescer, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from module.prebuild import PREBUILT, PREBUILT_MODULES, parse_schedule, next_due, wants_fresh
+from module.archive import StreamingArchive, build_archive
+from module.lazy_imports import load, prewarm, import_time_report, PREWARM_IMPORTS, IMPORT_TIME_REPORT
 from threading import Lock
 
 # Configure logging
@@ -23,8 +35,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-load_dotenv(override=True)
-
 # Thread-safe user session store
 class SessionStore:
     def __init__(self):
@@ -57,41 +67,73 @@ class SessionStore:
                 del self._sessions[user_id]
 
 USER_SESSIONS = SessionStore()
+DRIVER_POOL = DriverPool()
+# Caps concurrent browser jobs, one per user, and queues the rest
+SCHEDULER = JobScheduler()
+# Identical jobs running at the same time share one browser and one archive
+FLIGHTS = JobCoalescer()
+# Users whose job task is spawned but not yet in the scheduler queue
+STARTING_JOBS = set()
+# module -> (finished at, status, detail) of the latest scheduled pre-build, for /stats
+LAST_PREBUILDS = {}
+CAPTCHA_TIMEOUT = int(os.getenv("CAPTCHA_TIMEOUT", "300"))
+# Long runs send finished files early, in numbered partial archives ("0" turns a trigger off)
+PARTIAL_EVERY_FILES = int(os.getenv("PARTIAL_EVERY_FILES", "20"))
+PARTIAL_EVERY_SECONDS = int(os.getenv("PARTIAL_EVERY_SECONDS", "60"))
+# Telegram rate-limits message edits, so the progress message changes at most this often
+PROGRESS_EDIT_INTERVAL = float(os.getenv("PROGRESS_EDIT_INTERVAL", "3"))
 AUTHORIZED_USERS = list(map(int, os.getenv("AUTHORIZED_USERS", "").split(",")))
+ADMIN_USERS = [int(u) for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()] or AUTHORIZED_USERS
 
 # --- Helpers ---
 def download_pile_path(user_id):
     return os.path.join(tempfile.gettempdir(), f"{user_id}_bevco_downloads")
 
+def fresh_download_dir(user_id, module, day):
+    """Empty download folder for a new full run of module on day
+
+    A failed run keeps its folder for /resume (see cleanup_user); a new full
+    run starts over instead of mixing in that run's workbook and report.
+    """
+    download_dir = os.path.join(download_pile_path(user_id), module, day)
+    shutil.rmtree(download_dir, ignore_errors=True)
+    os.makedirs(download_dir)
+    return download_dir
+
 def is_user_authorized(user_id):
     return user_id in AUTHORIZED_USERS
 
-def zip_download_folder(download_dir):
-    try:
-        zip_path = shutil.make_archive(download_dir, 'zip', download_dir)
-        logger.info(f"📦 Folder successfully zipped at: {zip_path}")
-        shutil.rmtree(download_dir)
-        return zip_path
-    except Exception as e:
-        logger.error(f"❌ Failed to zip folder: {e}")
-        return None
+def is_admin(user_id):
+    return user_id in ADMIN_USERS
 
-def cleanup_user(user_id):
+def cleanup_user(user_id, keep_files=False):
     try:
-        shutil.rmtree(download_pile_path(user_id), ignore_errors=True)
+        if keep_files:
+            logger.info(f"Keeping downloads of user {user_id} for /resume")
+        else:
+            shutil.rmtree(download_pile_path(user_id), ignore_errors=True)
         logger.info(f"Cleaned up user {user_id} resources")
     except Exception as e:
         logger.error(f"Cleanup error for user {user_id}: {e}")
     USER_SESSIONS.clear(user_id)
 
 async def safe_browser_quit(driver):
-    """Safely quit browser driver with error handling"""
+    """Safely hand the browser driver back to the warm pool with error handling"""
     try:
         if driver:
-            driver.quit()
-            logger.info("Browser driver closed successfully")
+            await SCHEDULER.run_browser(DRIVER_POOL.release, driver)
+            logger.info("Browser driver released successfully")
     except Exception as e:
-        logger.error(f"Error closing browser driver: {e}")
+        logger.error(f"Error releasing browser driver: {e}")
+
+def release_early(driver, owner, loop):
+    """Return a browser from the scrape thread once the scraper is done with it
+
+    Also frees owner's scheduler slot, so the next queued job can start while
+    this one finishes without Chrome.
+    """
+    DRIVER_POOL.release(driver)
+    loop.call_soon_threadsafe(SCHEDULER.detach, owner)
 
 # --- Bot Handlers ---
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -103,7 +145,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ You are not authorized to use this bot.")
         return ConversationHandler.END
     
-    await update.message.reply_text("Hi! Choose a task:\n- /invoice\n- /stock\n- /inventory")
+    await update.message.reply_text(
+        "Hi! Choose a task:\n- /invoice\n- /stock\n- /inventory\n"
+        "Add \"fresh\" (e.g. /stock fresh) to skip the ready-made morning report."
+    )
 
 async def invoice_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -112,7 +157,9 @@ async def invoice_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_user_authorized(user_id):
         await update.message.reply_text("❌ You are not authorized to use this bot.")
         return ConversationHandler.END
-    
+
+    if await reject_if_busy(update, user_id):
+        return
     USER_SESSIONS.set(user_id, {"module": "invoice"})
     await update.message.reply_text("📅 Please send the date for the invoice in DD-MM-YYYY format.")
 
@@ -133,33 +180,25 @@ async def handle_invoice_date(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     try:
-        base_dir = download_pile_path(user_id)
-        download_dir = os.path.join(base_dir, "invoice", today)
-        os.makedirs(download_dir, exist_ok=True)
-
-        driver = await asyncio.to_thread(setup_browser, download_dir)
-        if not driver:
-            await update.message.reply_text("❌ Failed to initialize browser. Please try again.")
+        # The folder may belong to the user's running job
+        if await reject_if_busy(update, user_id):
             return
-
-        captcha_path = await asyncio.to_thread(get_captcha_image, driver, user=user_id)
-        if not captcha_path:
-            await safe_browser_quit(driver)
-            await update.message.reply_text("❌ Failed to get CAPTCHA. Please try again.")
+        download_dir = fresh_download_dir(user_id, "invoice", today)
+
+        # Past dates are often served straight from the artifact cache, without a browser
+        invoice = await SCHEDULER.run_cpu(load, "module.invoice")
+        missing = await SCHEDULER.run_cpu(invoice.restore_from_cache, download_dir, parsed_date)
+        if not missing:
+            logger.info(f"Serving invoice for {today} to user {user_id} from cache")
+            archive = StreamingArchive(download_dir)
+            try:
+                await send_results(update, user_id, "invoice", archive)
+            finally:
+                archive.close()
+                cleanup_user(user_id)
             return
 
-        USER_SESSIONS.set(user_id, {
-            "driver": driver,
-            "module": "invoice",
-            "download_dir": download_dir,
-            "date": today
-        })
-
-        with open(captcha_path, 'rb') as captcha_file:
-            await update.message.reply_photo(
-                photo=InputFile(captcha_file, filename="captcha.png"),
-                caption="Please reply with the CAPTCHA text:"
-            )
+        await start_job(update, context, user_id, "invoice", download_dir, today)
     except Exception as e:
         logger.error(f"Error in handle_invoice_date for user {user_id}: {e}")
         await update.message.reply_text(f"❌ Error: {str(e)}")
@@ -170,6 +209,25 @@ async def stock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def inventory_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await initiate_task(update, context, "inventory")
 
+async def reload_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user_id = update.effective_user.id
+    logger.info(f"User {user_id} requested master data reload")
+
+    if not is_user_authorized(user_id):
+        await update.message.reply_text("❌ You are not authorized to use this bot.")
+        return
+
+    try:
+        master_data = await SCHEDULER.run_cpu(load, "module.master_data")
+        data = await SCHEDULER.run_cpu(master_data.reload)
+        await update.message.reply_text(
+            f"🔄 Master data reloaded: {len(data.depots)} depots, "
+            f"{len(data.warehouses)} warehouses in {len(data.districts)} districts."
+        )
+    except Exception as e:
+        logger.error(f"❌ Master data reload failed: {e}")
+        await update.message.reply_text(f"❌ Failed to reload master data: {e}")
+
 async def initiate_task(update: Update, context: ContextTypes.DEFAULT_TYPE, module: str):
     user_id = update.effective_user.id
     logger.info(f"User {user_id} requested {module} command")
@@ -179,35 +237,241 @@ async def initiate_task(update: Update, context: ContextTypes.DEFAULT_TYPE, modu
         return
 
     try:
-        today = datetime.today().strftime('%d-%m-%Y')
-        download_dir = os.path.join(download_pile_path(user_id), module, today)
-        os.makedirs(download_dir, exist_ok=True)
+        if not wants_fresh(context.args) and await send_prebuilt(update, module):
+            return
 
-        driver = await asyncio.to_thread(setup_browser, download_dir)
-        if not driver:
-            await update.message.reply_text("❌ Failed to initialize browser. Please try again.")
+        # The folder may belong to the user's running job
+        if await reject_if_busy(update, user_id):
             return
+        today = datetime.today().strftime('%d-%m-%Y')
+        download_dir = fresh_download_dir(user_id, module, today)
 
-        captcha_path = await asyncio.to_thread(get_captcha_image, driver, user=user_id)
-        if not captcha_path:
-            await safe_browser_quit(driver)
-            await update.message.reply_text("❌ Failed to get CAPTCHA. Please try again.")
+        await start_job(update, context, user_id, module, download_dir)
+    except Exception as e:
+        logger.error(f"Error in initiate_task for user {user_id}, module {module}: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only summary of the phase timings since startup"""
+    user_id = update.effective_user.id
+    if not is_admin(user_id):
+        await update.message.reply_text("❌ You are not authorized to use this command.")
+        return
+
+    queue = SCHEDULER.stats()
+    jobs_line = f"🧵 Jobs: {queue['active']} running, {queue['detached']} finishing without a browser, {queue['queued']} queued, ~{queue['average_job_s']:.0f}s each"
+    for module, (finished, status, detail) in LAST_PREBUILDS.items():
+        jobs_line += f"\n⏰ Pre-build {module}: {status} at {finished:%d-%m %H:%M}" + (f" ({detail})" if detail else "")
+    phases = summary()
+    if not phases:
+        await update.message.reply_text(f"{jobs_line}\n📊 No jobs have run since startup.")
+        return
+    lines = [jobs_line, "📊 Phase timings since startup (count, p50, p95, max):"]
+    for name, (count, p50, p95, longest) in phases.items():
+        lines.append(f"{name}: {count}× {p50:.2f}s / {p95:.2f}s / {longest:.2f}s")
+    await update.message.reply_text("\n".join(lines)[:4000])
+
+async def resume_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Re-run only the pending or failed targets of the user's last unfinished run"""
+    user_id = update.effective_user.id
+    logger.info(f"User {user_id} requested resume")
+
+    if not is_user_authorized(user_id):
+        await update.message.reply_text("❌ You are not authorized to use this bot.")
+        return
+
+    if await reject_if_busy(update, user_id):
+        return
+
+    try:
+        manifest = await SCHEDULER.run_cpu(latest_unfinished, user_id)
+        if not manifest:
+            await update.message.reply_text("✅ Nothing to resume: your last runs finished without failures.")
             return
 
-        USER_SESSIONS.set(user_id, {
-            "driver": driver,
-            "module": module,
-            "download_dir": download_dir
-        })
+        module = manifest.run["module"]
+        targets = manifest.unfinished()
+        download_dir = manifest.run["download_dir"]
+        os.makedirs(download_dir, exist_ok=True)
+        await update.message.reply_text(
+            f"🔁 Resuming {module}: {len(targets)} of {len(manifest.targets)} targets left."
+        )
+        await start_job(update, context, user_id, module, download_dir, manifest.run.get("date"), targets=targets)
+    except Exception as e:
+        logger.error(f"Error in resume_command for user {user_id}: {e}")
+        await update.message.reply_text(f"❌ Error: {str(e)}")
+
+def run_in_background(context: ContextTypes.DEFAULT_TYPE, update: Update, coroutine):
+    """Run a long job as an application task so the update handler returns at once"""
+    return context.application.create_task(coroutine, update=update)
+
+async def reject_if_busy(update: Update, user_id):
+    """Tell the user to wait when they already have a job running or queued; returns True if so"""
+    if not SCHEDULER.busy(user_id) and user_id not in STARTING_JOBS:
+        return False
+    session = USER_SESSIONS.get(user_id)
+    if session and "driver" in session:
+        await update.message.reply_text("🔐 Please answer the CAPTCHA I sent first.")
+    else:
+        await update.message.reply_text("⏳ Your previous task is still running or queued. I'll send it as soon as it's done.")
+    return True
+
+async def wait_for_slot(update: Update, user_id, priority=PRIORITY_INTERACTIVE):
+    """Wait for a browser slot, keeping a "position N, ETA ~M min" message up to date meanwhile"""
+    status = {}
+
+    async def on_position(position, eta):
+        text = f"🕒 All browsers are busy. You're number {position} in the queue, ETA ~{max(1, round(eta / 60))} min."
+        if "message" in status:
+            await status["message"].edit_text(text)
+        else:
+            status["message"] = await update.message.reply_text(text)
+
+    with phase("queue_wait"):
+        await SCHEDULER.acquire(user_id, priority, on_position)
+    if "message" in status:
+        try:
+            await status["message"].edit_text("▶️ It's your turn, starting now.")
+        except Exception as e:
+            logger.warning(f"Could not update queue message for user {user_id}: {e}")
+
+def flight_key(module, date=None, targets=None):
+    """Coalescing key of a job; None for resumes, which continue one user's own run"""
+    if targets is not None:
+        return None
+    return FLIGHTS.key(module, date or datetime.today().strftime('%d-%m-%Y'))
+
+async def attach_to_flight(update: Update, user_id, module, key, download_dir):
+    """Let the user wait for an identical job that is already running; returns True if attached"""
+    if key is None or not FLIGHTS.attach(key, user_id, update):
+        return False
+    logger.info(f"User {user_id} attached to the running {module} job")
+    inc("coalesced_total", module=module)
+    USER_SESSIONS.clear(user_id)
+    shutil.rmtree(download_dir, ignore_errors=True)
+    await update.message.reply_text(
+        f"🤝 The same {module} report is already being prepared. You'll get it as soon as it's ready."
+    )
+    return True
+
+async def finish_flight(flight, module, archive=None, file_id=None, caption="✅ Task completed!"):
+    """Send the flight's archive (a finished archive file) to everyone attached to it, or tell them it failed
+
+    The archive is uploaded at most once; later copies reuse its Telegram file_id.
+    """
+    if flight is None:
+        return
+    for follower in FLIGHTS.finish(flight):
+        try:
+            if not (archive or file_id):
+                await follower.message.reply_text(f"❌ The {module} run you were waiting for failed. Please send the command again.")
+            elif file_id:
+                await follower.message.reply_document(document=file_id, caption=caption)
+            else:
+                archive.seek(0)
+                sent = await follower.message.reply_document(document=archive, filename=f"{module}.zip", caption=caption)
+                file_id = sent.document.file_id
+        except Exception as e:
+            logger.error(f"❌ Could not deliver the shared {module} report to user {follower.effective_user.id}: {e}")
+
+async def expire_captcha(update: Update, user_id, job):
+    """Give the browser slot back when a CAPTCHA goes unanswered for CAPTCHA_TIMEOUT seconds"""
+    session = USER_SESSIONS.get(user_id)
+    if not session or session.get("job") is not job:
+        return
+    USER_SESSIONS.pop(user_id)
+    logger.info(f"CAPTCHA timed out for user {user_id}")
+    await safe_browser_quit(session["driver"])
+    SCHEDULER.release(user_id)
+    await update.message.reply_text("⌛ The CAPTCHA expired. Send the command again to start over.")
+    await finish_flight(session.get("flight"), session["module"])
+
+async def start_job(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id, module, download_dir, date=None, targets=None):
+    """Start a job for the user: wait for a browser slot in the background, then lease_browser
+
+    targets, when given, resumes the user's last run of module with only those targets.
+    A request identical to a running job attaches to it instead (see attach_to_flight).
+    The handler returns at once, so the user's later messages (the CAPTCHA answer
+    among them) are not held up behind the queue wait.
+    """
+    if await reject_if_busy(update, user_id):
+        return
+    key = flight_key(module, date, targets)
+    if await attach_to_flight(update, user_id, module, key, download_dir):
+        return
+
+    flight = FLIGHTS.lead(key, user_id) if key else None
+    STARTING_JOBS.add(user_id)
+    run_in_background(context, update, lease_browser(update, context, user_id, module, download_dir, date, targets, flight))
+
+async def lease_browser(update: Update, context: ContextTypes.DEFAULT_TYPE, user_id, module, download_dir, date, targets, flight):
+    """Wait for a browser slot, lease a browser and either reuse the stored portal session or ask for a CAPTCHA
+
+    The scrape itself runs in the background (see run_in_background); the slot and
+    the flight are released by run_task, or by expire_captcha if the CAPTCHA is never
+    answered, and here when anything fails before that.
+    """
+    job = JobMetrics(module)
+    driver = None
+    acquired = handed_off = False
+    with job_scope(job):
+        try:
+            try:
+                await wait_for_slot(update, user_id)
+                acquired = True
+            finally:
+                STARTING_JOBS.discard(user_id)
+            login = await SCHEDULER.run_cpu(load, "module.login")
+            with phase("browser_acquire"):
+                driver = await SCHEDULER.run_browser(DRIVER_POOL.acquire, download_dir, lean_enabled_for(module))
+            if not driver:
+                await update.message.reply_text("❌ Failed to initialize browser. Please try again.")
+                return
+
+            with phase("session_restore"):
+                restored = await SCHEDULER.run_browser(login.restore_login, driver)
+            if restored:
+                run_in_background(context, update, run_task(
+                    update, user_id, driver, module, download_dir, date, targets=targets, job=job, flight=flight
+                ))
+                handed_off = True
+                return
+
+            with phase("captcha_fetch"):
+                captcha_image = await SCHEDULER.run_browser(login.get_captcha_image, driver, user=user_id)
+            if not captcha_image:
+                await update.message.reply_text("❌ Failed to get CAPTCHA. Please try again.")
+                return
 
-        with open(captcha_path, 'rb') as captcha_file:
             await update.message.reply_photo(
-                photo=InputFile(captcha_file, filename="captcha.png"),
+                photo=InputFile(captcha_image, filename="captcha.png"),
                 caption="Please reply with the CAPTCHA text:"
             )
-    except Exception as e:
-        logger.error(f"Error in initiate_task for user {user_id}, module {module}: {e}")
-        await update.message.reply_text(f"❌ Error: {str(e)}")
+            # Stored after the photo is out, so the human wait does not include the upload
+            USER_SESSIONS.set(user_id, {
+                "driver": driver,
+                "module": module,
+                "download_dir": download_dir,
+                "date": date,
+                "targets": targets,
+                "job": job,
+                "flight": flight,
+                "captcha_sent_at": time.monotonic(),
+                "captcha_timeout": asyncio.get_running_loop().call_later(
+                    CAPTCHA_TIMEOUT,
+                    lambda: context.application.create_task(expire_captcha(update, user_id, job), update=update)
+                )
+            })
+            handed_off = True
+        except Exception as e:
+            logger.error(f"Error starting {module} job for user {user_id}: {e}")
+            await update.message.reply_text(f"❌ Error: {str(e)}")
+        finally:
+            if not handed_off:
+                await safe_browser_quit(driver)
+                if acquired:
+                    SCHEDULER.release(user_id)
+                await finish_flight(flight, module)
 
 async def handle_captcha(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -220,48 +484,207 @@ async def handle_captcha(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Session expired. Please try /start again.")
         return ConversationHandler.END
 
+    # The job takes the session over, so further messages cannot start it twice
+    USER_SESSIONS.pop(user_id)
+    if "captcha_timeout" in session:
+        session["captcha_timeout"].cancel()
     captcha_input = update.message.text.strip()
-    driver = session["driver"]
-    module = session["module"]
-    download_dir = session["download_dir"]
-    date = session.get("date")
+    job = session.get("job")
+    if job and "captcha_sent_at" in session:
+        with job_scope(job):
+            observe("captcha_human_wait", time.monotonic() - session["captcha_sent_at"])
+    run_in_background(context, update, run_task(
+        update, user_id, session["driver"], session["module"],
+        session["download_dir"], session.get("date"), captcha_text=captcha_input,
+        targets=session.get("targets"), job=job, flight=session.get("flight")
+    ))
+    return ConversationHandler.END
+
+async def send_prebuilt(update: Update, module):
+    """Answer with the module's pre-built report while it is fresh; returns True if sent"""
+    prebuilt = PREBUILT.fresh(module)
+    if not prebuilt:
+        return False
+    zip_path, meta = prebuilt
+    built = datetime.fromtimestamp(meta["built_at"]).strftime('%H:%M')
+    with open(zip_path, 'rb') as f, phase("telegram_upload"):
+        await update.message.reply_document(
+            document=f,
+            filename=f"{module}.zip",
+            caption=f"✅ Report built at {built}. Send /{module} fresh for a new run."
+        )
+    inc("prebuilt_served_total", module=module)
+    logger.info(f"Served pre-built {module} report from {built}")
+    return True
+
+async def send_results(update: Update, user_id, module, archive, caption="✅ Task completed!", flight=None, flight_caption=None):
+    """Finish the job's streaming archive and send it to the user and the flight's followers
+
+    Returns the finished archive file once sent; the caller closes the archive.
+    """
+    try:
+        with phase("zip"):
+            archive_file = await SCHEDULER.run_cpu(archive.finish)
+    except Exception as e:
+        logger.error(f"❌ Failed to zip folder: {e}")
+        await update.message.reply_text("❌ Failed to create zip file.")
+        return None
+
+    with phase("telegram_upload"):
+        sent = await update.message.reply_document(
+            document=archive_file,
+            filename=f"{module}.zip",
+            caption=caption
+        )
+    logger.info(f"Successfully completed {module} task for user {user_id}")
+    await finish_flight(flight, module, archive_file, sent.document.file_id, flight_caption or caption)
+    return archive_file
+
+def partial_due(new_files, since_last_batch):
+    """True when enough finished files or time have piled up for the next partial archive"""
+    if not new_files:
+        return False
+    by_count = PARTIAL_EVERY_FILES and new_files >= PARTIAL_EVERY_FILES
+    by_time = PARTIAL_EVERY_SECONDS and since_last_batch >= PARTIAL_EVERY_SECONDS
+    return bool(by_count or by_time)
+
+async def report_progress(update: Update, module, progress_msg, manifest, archive, scraped):
+    """Until scraped is set, keep progress_msg at the manifest's counts and send finished files in batches
+
+    Each batch goes out as <module>_partN.zip holding the files archived since
+    the previous one. Returns how many partial archives were sent.
+    """
+    sent, parts, last_text = set(), 0, None
+    last_batch = time.monotonic()
+    while not scraped.is_set():
+        try:
+            await asyncio.wait_for(scraped.wait(), PROGRESS_EDIT_INTERVAL)
+            break
+        except asyncio.TimeoutError:
+            pass
+        try:
+            counts = manifest.counts()
+            text = f"⏳ {module.capitalize()}: {counts[OK]} done, {counts[FAILED]} failed, {counts[PENDING]} remaining."
+            if parts:
+                text += f"\n📦 {parts} part(s) sent so far."
+            if text != last_text:
+                await progress_msg.edit_text(text)
+                last_text = text
+
+            new = [name for name in archive.names if name not in sent]
+            if partial_due(len(new), time.monotonic() - last_batch):
+                parts += 1
+                batch = await SCHEDULER.run_cpu(build_archive, archive.directory, new)
+                with batch, phase("telegram_upload"):
+                    await update.message.reply_document(
+                        document=batch,
+                        filename=f"{module}_part{parts}.zip",
+                        caption=f"📦 Part {parts}: {len(new)} file(s)"
+                    )
+                sent.update(new)
+                last_batch = time.monotonic()
+        except RetryAfter as e:
+            await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            logger.warning(f"Could not report progress of {module}: {e}")
+    return parts
+
+async def run_task(update: Update, user_id, driver, module, download_dir, date=None, captcha_text=None, targets=None, job=None, flight=None):
+    """Log in if needed, run the scraper, then zip and send the results
+
+    Every target's outcome goes to the job's manifest; targets resumes the
+    last run instead of starting a new one. Phase timings go to job and are
+    shipped as timings.json inside the archive. Users attached to flight get
+    the same archive.
+    """
+    job = job or JobMetrics(module)
+    try:
+        with job_scope(job):
+            await _run_task(update, user_id, driver, module, download_dir, date, captcha_text, targets, job, flight)
+    finally:
+        SCHEDULER.release(user_id)
+        # Followers of a run that never got to deliver are told to retry
+        await finish_flight(flight, module)
 
+async def _run_task(update, user_id, driver, module, download_dir, date, captcha_text, targets, job, flight=None):
     progress_msg = await update.message.reply_text("⏳ Processing your task... Please wait.")
+    manifest = RunManifest.for_job(user_id, module)
+    if targets is None:
+        manifest.begin(module=module, date=date, download_dir=download_dir)
+    # Finished downloads are zipped while the scrape is still running
+    archive = StreamingArchive(download_dir).start()
+    keep_files = False
+
+    scraped = asyncio.Event()
+    progress = asyncio.create_task(report_progress(update, module, progress_msg, manifest, archive, scraped))
+    loop = asyncio.get_running_loop()
+
+    def browser_done(browser):
+        # Already back in the pool: neither path below may release it again
+        nonlocal driver
+        driver = None
+        release_early(browser, user_id, loop)
 
     try:
-        await asyncio.to_thread(login, driver, captcha_text=captcha_input)
-
-        if module == "invoice":
-            await asyncio.to_thread(invoice.scrape_invoice, driver, download_dir, date)
-        elif module == "stock":
-            await asyncio.to_thread(stock.scrape_reports, driver, download_dir)
-        elif module == "inventory":
-            await asyncio.to_thread(inventory.scrap_inventory, driver, download_dir)
+        try:
+            if captcha_text:
+                login = await SCHEDULER.run_cpu(load, "module.login")
+                with phase("login"):
+                    await SCHEDULER.run_browser(login.login, driver, captcha_text=captcha_text)
+
+            scraper = await SCHEDULER.run_cpu(load, f"module.{module}")
+            with phase(f"{module}.scrape"):
+                if module == "invoice":
+                    await SCHEDULER.run_browser(scraper.scrape_invoice, driver, download_dir, date, targets=targets, manifest=manifest)
+                elif module == "stock":
+                    await SCHEDULER.run_browser(scraper.scrape_reports, driver, download_dir, targets=targets, manifest=manifest, on_browser_done=browser_done)
+                elif module == "inventory":
+                    await SCHEDULER.run_browser(scraper.scrap_inventory, driver, download_dir, targets=targets, manifest=manifest)
+        finally:
+            scraped.set()
+            parts = await progress
 
         await safe_browser_quit(driver)
-        zip_path = await asyncio.to_thread(zip_download_folder, download_dir)
-
+        # Handed back: the error path below must not release it a second time
+        driver = None
         await progress_msg.delete()
 
-        if zip_path:
-            with open(zip_path, 'rb') as f:
-                await update.message.reply_document(
-                    document=f,
-                    filename=f"{module}.zip",
-                    caption="✅ Task completed!"
-                )
-                logger.info(f"Successfully completed {module} task for user {user_id}")
-        else:
-            await update.message.reply_text("❌ Failed to create zip file.")
+        for status, count in manifest.counts().items():
+            inc("targets_total", count, module=module, status=status)
+        try:
+            await SCHEDULER.run_cpu(job.write, download_dir, manifest)
+        except Exception as e:
+            logger.warning(f"Could not write job timings: {e}")
+
+        failed = len(manifest.unfinished())
+        caption = flight_caption = "✅ Task completed!"
+        if failed:
+            caption = f"⚠️ Task completed with {failed} failed target(s). Send /retryfailed to retry only those."
+            flight_caption = f"⚠️ Task completed with {failed} failed target(s)."
+        if parts:
+            caption += f"\nThis archive has everything, including the {parts} part(s) sent earlier."
+        archive_file = await send_results(update, user_id, module, archive, caption, flight, flight_caption)
+        if archive_file:
+            manifest.mark_delivered()
+            # A complete on-demand report is as good as a pre-built one for the next user
+            if module in PREBUILT_MODULES and targets is None and not failed:
+                try:
+                    await SCHEDULER.run_cpu(PREBUILT.store, module, archive_file)
+                except Exception as e:
+                    logger.warning(f"Could not keep the {module} report for reuse: {e}")
+        inc("jobs_total", module=module, status="partial" if failed else "ok")
     except Exception as e:
-        logger.error(f"Error in handle_captcha for user {user_id}, module {module}: {e}")
+        inc("jobs_total", module=module, status="error")
+        logger.error(f"Error in run_task for user {user_id}, module {module}: {e}")
         await progress_msg.delete()
-        await update.message.reply_text(f"❌ Error: {str(e)}")
+        keep_files = bool(manifest.unfinished())
+        hint = "\nSend /resume to continue where it stopped." if keep_files else ""
+        await update.message.reply_text(f"❌ Error: {str(e)}{hint}")
         await safe_browser_quit(driver)
     finally:
+        archive.close()
         await asyncio.sleep(1)
-        cleanup_user(user_id)
-        return ConversationHandler.END
+        cleanup_user(user_id, keep_files=keep_files)
 
 async def dynamic_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
@@ -276,16 +699,174 @@ async def dynamic_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     else:
         await handle_captcha(update, context)
 
+async def notify_admins(bot, text):
+    """Best-effort message to every admin, for events nobody is waiting on"""
+    if bot is None:
+        return
+    for admin in ADMIN_USERS:
+        try:
+            await bot.send_message(admin, text)
+        except Exception as e:
+            logger.warning(f"Could not notify admin {admin}: {e}")
+
+async def prebuild_report(module, bot=None):
+    """Scrape module with the stored portal session and keep the archive for reuse
+
+    Runs behind interactive jobs in the scheduler queue, and users asking for
+    the same report meanwhile attach to it. Without a stored session there is
+    nobody to answer a CAPTCHA, so the run is skipped and the admins are told.
+    Returns the run's status, also kept in LAST_PREBUILDS for /stats.
+    """
+    key = f"prebuild:{module}"
+    status, detail = "error", None
+    flight = archive = driver = build_dir = None
+    acquired = False
+    job = JobMetrics(module)
+    loop = asyncio.get_running_loop()
+
+    def browser_done(browser):
+        nonlocal driver
+        driver = None
+        release_early(browser, key, loop)
+
+    with job_scope(job):
+        try:
+            if FLIGHTS.running(flight_key(module)):
+                logger.info(f"⏰ Skipping the scheduled {module} report: the same report is already running")
+                status, detail = "skipped", "already running"
+                return status
+
+            login = await SCHEDULER.run_cpu(load, "module.login")
+            if not await SCHEDULER.run_cpu(login.has_stored_login):
+                status, detail = "skipped", "no stored portal session"
+                return status
+
+            flight = FLIGHTS.lead(flight_key(module), key)
+            build_dir = tempfile.mkdtemp(prefix=f"bevco_prebuild_{module}_")
+            download_dir = os.path.join(build_dir, datetime.today().strftime('%d-%m-%Y'))
+            os.makedirs(download_dir)
+            archive = StreamingArchive(download_dir)
+
+            await SCHEDULER.acquire(key, PRIORITY_BACKGROUND)
+            acquired = True
+            logger.info(f"⏰ Pre-building the {module} report")
+            with phase("browser_acquire"):
+                driver = await SCHEDULER.run_browser(DRIVER_POOL.acquire, download_dir, lean_enabled_for(module))
+            if not driver:
+                detail = "no browser"
+                return status
+            with phase("session_restore"):
+                restored = await SCHEDULER.run_browser(login.restore_login, driver)
+            if not restored:
+                status, detail = "skipped", "the stored portal session was rejected"
+                return status
+
+            manifest = RunManifest.for_job("prebuild", module)
+            manifest.begin(module=module, download_dir=download_dir)
+            scraper = await SCHEDULER.run_cpu(load, f"module.{module}")
+            archive.start()
+            with phase(f"{module}.scrape"):
+                if module == "stock":
+                    await SCHEDULER.run_browser(scraper.scrape_reports, driver, download_dir, manifest=manifest, on_browser_done=browser_done)
+                elif module == "inventory":
+                    await SCHEDULER.run_browser(scraper.scrap_inventory, driver, download_dir, manifest=manifest)
+
+            await SCHEDULER.run_cpu(job.write, download_dir, manifest)
+            with phase("zip"):
+                archive_file = await SCHEDULER.run_cpu(archive.finish)
+            failed = len(manifest.unfinished())
+            if failed:
+                # Users who attached still get what was scraped, but it is not kept for reuse
+                logger.warning(f"⚠️ Not keeping the scheduled {module} report: {failed} target(s) failed")
+                status, detail = "partial", f"{failed} target(s) failed"
+                await finish_flight(flight, module, archive_file, caption=f"⚠️ Task completed with {failed} failed target(s).")
+                return status
+            await SCHEDULER.run_cpu(PREBUILT.store, module, archive_file)
+            manifest.mark_delivered()
+            await finish_flight(flight, module, archive_file)
+            status = "ok"
+            return status
+        except Exception as e:
+            detail = str(e)
+            logger.error(f"❌ Scheduled {module} report failed: {e}")
+            return status
+        finally:
+            await safe_browser_quit(driver)
+            if acquired:
+                SCHEDULER.release(key)
+            await finish_flight(flight, module)
+            if archive:
+                archive.close()
+            if build_dir:
+                shutil.rmtree(build_dir, ignore_errors=True)
+            inc("prebuilds_total", module=module, status=status)
+            LAST_PREBUILDS[module] = (datetime.now(), status, detail)
+            if status != "ok" and detail != "already running":
+                logger.warning(f"⚠️ Scheduled {module} report {status}: {detail}")
+                hint = "\nRun the command once and answer the CAPTCHA to store a session." if "session" in (detail or "") else ""
+                await notify_admins(bot, f"⏰ The scheduled {module} report was {status}: {detail}.{hint}")
+
+async def prebuild_loop(schedule, bot=None):
+    """Run the pre-builds of PREBUILD_SCHEDULE at their times until cancelled"""
+    last = datetime.now()
+    while True:
+        try:
+            when, modules = next_due(schedule, last)
+        except ValueError as e:
+            logger.error(f"❌ Pre-build schedule stopped: {e}")
+            return
+        logger.info(f"⏰ Next pre-build of {', '.join(modules)} at {when:%d-%m-%Y %H:%M}")
+        await asyncio.sleep(max((when - datetime.now()).total_seconds(), 0))
+        for module in modules:
+            # One bad run must not end the schedule for the life of the process
+            try:
+                await prebuild_report(module, bot)
+            except Exception as e:
+                logger.error(f"❌ Scheduled {module} report crashed: {e}")
+        # The sleep may end a hair early; never fire the same minute twice
+        last = max(datetime.now(), when)
+
+async def warm_up(app):
+    """Start the browser pool and load the scraper modules once polling is set up"""
+    DRIVER_POOL.start()
+    start_server()
+    if PREWARM_IMPORTS:
+        prewarm()
+    if IMPORT_TIME_REPORT:
+        asyncio.get_running_loop().run_in_executor(None, import_time_report)
+    schedule = parse_schedule()
+    if schedule:
+        # A plain task: Application.stop() would wait forever on an application task
+        app.bot_data["prebuild_task"] = asyncio.get_running_loop().create_task(prebuild_loop(schedule, app.bot))
+
+async def shutdown_pool(app):
+    prebuild_task = app.bot_data.get("prebuild_task")
+    if prebuild_task:
+        prebuild_task.cancel()
+    await asyncio.to_thread(DRIVER_POOL.shutdown)
+    SCHEDULER.shutdown()
+
 def main():
     try:
-        app = ApplicationBuilder().token(os.getenv("BOT_TOKEN")).build()
+        app = (
+            ApplicationBuilder()
+            .token(os.getenv("BOT_TOKEN"))
+            .concurrent_updates(PerUserUpdateProcessor())
+            .post_init(warm_up)
+            .post_shutdown(shutdown_pool)
+            .build()
+        )
 
         app.add_handler(CommandHandler("start", start))
         app.add_handler(CommandHandler("invoice", invoice_command))
         app.add_handler(CommandHandler("stock", stock_command))
         app.add_handler(CommandHandler("inventory", inventory_command))
+        app.add_handler(CommandHandler("reload", reload_command))
+        app.add_handler(CommandHandler(["resume", "retryfailed"], resume_command))
+        app.add_handler(CommandHandler("stats", stats_command))
         app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, dynamic_router))
 
+        startup_check()
         logger.info("🤖 Bot is running...")
         app.run_polling()
     except Exception as e:
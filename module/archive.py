@@ -0,0 +1,123 @@
+import os
+import logging
+import zipfile
+import tempfile
+import threading
+
+from module.downloads import PARTIAL_SUFFIXES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+ARCHIVE_SPOOL_MB = int(os.getenv("ARCHIVE_SPOOL_MB", "64"))
+ARCHIVE_POLL_INTERVAL = float(os.getenv("ARCHIVE_POLL_INTERVAL", "0.5"))
+# Already compressed: deflating them again only costs CPU (.xlsx is itself a zip)
+STORED_EXTENSIONS = (".pdf", ".xlsx", ".zip", ".png", ".jpg", ".jpeg", ".gz")
+# Files that only ever appear under their final name (renamed or os.replace'd into place)
+LIVE_EXTENSIONS = (".pdf",)
+# Names the portal gives a download before the scraper renames it
+RAW_DOWNLOAD_PREFIXES = ("BEVCO_Invoice", "WBSBCL_Inventory")
+
+def compression_for(name):
+    """ZIP_STORED for compressed formats, ZIP_DEFLATED for text and tables"""
+    return zipfile.ZIP_STORED if name.lower().endswith(STORED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+
+def _is_finished(name):
+    return not name.endswith(PARTIAL_SUFFIXES) and not name.startswith(".")
+
+def _is_live(name):
+    return name.lower().endswith(LIVE_EXTENSIONS) and not name.startswith(RAW_DOWNLOAD_PREFIXES)
+
+class _Spool(tempfile.SpooledTemporaryFile):
+    # In memory it has no name, which upload clients use for the default file name
+    name = "archive.zip"
+
+def build_archive(directory, names, spool_bytes=ARCHIVE_SPOOL_MB * 1024 * 1024):
+    """A finished zip of some files of directory, rewound for upload"""
+    spool = _Spool(max_size=spool_bytes)
+    with zipfile.ZipFile(spool, "w", allowZip64=True) as archive:
+        for name in names:
+            archive.write(os.path.join(directory, name), name, compress_type=compression_for(name))
+    spool.seek(0)
+    return spool
+
+class StreamingArchive:
+    """Zip of a job's download folder, built while the job runs
+
+    A background thread appends each finished PDF as soon as it lands in the
+    folder; finish() adds whatever else is there (workbooks, logs, timings)
+    and returns the archive rewound for upload. The zip is spooled in memory
+    up to ARCHIVE_SPOOL_MB (Telegram caps bot uploads at 50 MB), so no second
+    copy of the downloads is written to disk.
+    """
+
+    def __init__(self, directory, spool_bytes=ARCHIVE_SPOOL_MB * 1024 * 1024, poll_interval=ARCHIVE_POLL_INTERVAL):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self._file = _Spool(max_size=spool_bytes)
+        self._zip = zipfile.ZipFile(self._file, "w", allowZip64=True)
+        self._added = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def names(self):
+        with self._lock:
+            return sorted(self._added)
+
+    def start(self):
+        """Begin appending finished downloads in the background"""
+        self._thread = threading.Thread(target=self._watch, name="archive-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.add_ready(live_only=True)
+            except Exception as e:
+                logger.warning(f"Could not append downloads to the archive: {e}")
+
+    def add_ready(self, live_only=False):
+        """Append the folder's files not yet in the archive; returns how many were added"""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            return 0
+        added = 0
+        with self._lock:
+            if self._zip.fp is None:
+                return 0
+            for name in names:
+                if name in self._added or not _is_finished(name) or (live_only and not _is_live(name)):
+                    continue
+                path = os.path.join(self.directory, name)
+                if not os.path.isfile(path):
+                    continue
+                self._zip.write(path, name, compress_type=compression_for(name))
+                self._added.add(name)
+                added += 1
+        return added
+
+    def finish(self):
+        """Add the remaining files, close the zip and return it as a file object at offset 0"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        self.add_ready()
+        with self._lock:
+            self._zip.close()
+        self._file.seek(0)
+        logger.info(f"📦 Archived {len(self._added)} file(s) from {self.directory}")
+        return self._file
+
+    def close(self):
+        """Stop the writer and free the archive"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        with self._lock:
+            self._zip.close()
+        self._file.close()
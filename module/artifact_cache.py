@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from datetime import date, datetime
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+CACHE_DIR = os.getenv(
+    "ARTIFACT_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bevco", "artifacts")
+)
+CACHE_MAX_MB = int(os.getenv("ARTIFACT_CACHE_MAX_MB", "2048"))
+# Hours a "the portal has nothing for this key" entry is trusted before asking again
+MISSING_MAX_AGE_H = int(os.getenv("ARTIFACT_MISSING_MAX_AGE_H", "168"))
+INDEX_FILENAME = "index.json"
+
+def is_immutable(day):
+    """Reports for days before today never change, so only those are cached"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day < date.today()
+
+def file_digest(path):
+    """sha256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _link_or_copy(src, dst):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+class ArtifactCache:
+    """Content-addressed store for downloaded reports, keyed by (module, target, day)
+
+    Files live under objects/<sha256[:2]>/<sha256><ext>, so identical PDFs are
+    stored once. index.json maps each key to its object and the last time it
+    was served; the least recently used keys are evicted once the objects
+    exceed max_bytes. Keys the portal had no report for are kept as missing
+    entries without an object for missing_max_age seconds.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024, missing_max_age=MISSING_MAX_AGE_H * 3600):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.missing_max_age = missing_max_age
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._index = None
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    @staticmethod
+    def key(module, target, day):
+        if isinstance(day, datetime):
+            day = day.date()
+        return f"{module}|{target}|{day.isoformat()}"
+
+    def _object_path(self, sha, ext):
+        return os.path.join(self.root, "objects", sha[:2], f"{sha}{ext}")
+
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(self.index_path, encoding='utf-8') as f:
+                    self._index = json.load(f)
+            except FileNotFoundError:
+                self._index = {}
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable artifact index: {e}")
+                self._index = {}
+        return self._index
+
+    def _save_index(self):
+        os.makedirs(self.root, exist_ok=True)
+        partial = f"{self.index_path}.tmp"
+        with open(partial, "w", encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(partial, self.index_path)
+
+    def get(self, module, target, day):
+        """Path of the cached artifact, or None on a miss"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(self.key(module, target, day))
+            if not entry or entry.get("missing"):
+                return None
+            path = self._object_path(entry["sha256"], entry["ext"])
+            if not os.path.exists(path):
+                del index[self.key(module, target, day)]
+                self._save_index()
+                return None
+            entry["last_used"] = time.time()
+            self._save_index()
+            return path
+
+    def restore(self, module, target, day, dest_path):
+        """Place the cached artifact at dest_path; returns False on a miss"""
+        path = self.get(module, target, day)
+        if not path:
+            return False
+        if os.path.exists(dest_path) and os.path.getsize(dest_path) == os.path.getsize(path):
+            return True
+        partial = f"{dest_path}.part"
+        if os.path.exists(partial):
+            os.remove(partial)
+        _link_or_copy(path, partial)
+        os.replace(partial, dest_path)
+        return True
+
+    def put(self, module, target, day, src_path):
+        """Store a finished download; returns its sha256"""
+        if not self.enabled:
+            return None
+        sha = file_digest(src_path)
+        ext = os.path.splitext(src_path)[1]
+        path = self._object_path(sha, ext)
+        with self._lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                partial = f"{path}.part"
+                _link_or_copy(src_path, partial)
+                os.replace(partial, path)
+            now = time.time()
+            self._load_index()[self.key(module, target, day)] = {
+                "sha256": sha,
+                "ext": ext,
+                "size": os.path.getsize(path),
+                "stored_at": now,
+                "last_used": now,
+            }
+            self._evict()
+            self._save_index()
+        return sha
+
+    def put_missing(self, module, target, day):
+        """Remember that the portal has no report for the key"""
+        if not self.enabled or self.missing_max_age <= 0:
+            return
+        with self._lock:
+            now = time.time()
+            self._load_index()[self.key(module, target, day)] = {"missing": True, "stored_at": now, "last_used": now}
+            self._save_index()
+
+    def is_missing(self, module, target, day):
+        """True while a missing entry for the key is younger than missing_max_age"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            entry = self._load_index().get(self.key(module, target, day))
+            if not entry or not entry.get("missing"):
+                return False
+            return time.time() - entry["stored_at"] <= self.missing_max_age
+
+    def _evict(self):
+        """Drop least recently used keys until the stored objects fit in max_bytes"""
+        index = self._index
+        objects = {}
+        for entry in index.values():
+            if not entry.get("missing"):
+                objects[(entry["sha256"], entry["ext"])] = entry["size"]
+        total = sum(objects.values())
+        if total <= self.max_bytes:
+            return
+
+        stored = [item for item in index.items() if not item[1].get("missing")]
+        for key, entry in sorted(stored, key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            del index[key]
+            obj = (entry["sha256"], entry["ext"])
+            if any((other.get("sha256"), other.get("ext")) == obj for other in index.values()):
+                continue
+            try:
+                os.remove(self._object_path(*obj))
+            except FileNotFoundError:
+                pass
+            total -= objects[obj]
+            logger.info(f"Evicted cached artifact {key}")
+
+    def stats(self):
+        """(keys, distinct objects, bytes) currently in the cache"""
+        with self._lock:
+            index = self._load_index()
+            objects = {(entry["sha256"], entry["ext"]): entry["size"] for entry in index.values() if not entry.get("missing")}
+            return len(index), len(objects), sum(objects.values())
+
+ARTIFACTS = ArtifactCache()
@@ -0,0 +1,75 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+MANIFEST_PATH = os.getenv(
+    "CHROMEDRIVER_MANIFEST",
+    os.path.join(os.path.expanduser("~"), ".cache", "bevco", "chromedriver.json")
+)
+
+_resolved_path = None
+_lock = threading.Lock()
+
+def _read_manifest():
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            path = json.load(f).get("driver_path")
+        if path and os.path.isfile(path):
+            return path
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable chromedriver manifest: {e}")
+    return None
+
+def _write_manifest(path):
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+        with open(MANIFEST_PATH, "w", encoding='utf-8') as f:
+            json.dump({"driver_path": path, "resolved_at": int(time.time())}, f)
+    except Exception as e:
+        logger.warning(f"Could not write chromedriver manifest: {e}")
+
+def resolve_driver_path(refresh=False):
+    """Resolve the chromedriver binary once and reuse it for every launch
+
+    Order: CHROMEDRIVER_PATH, then the cached manifest, then a single
+    webdriver_manager download whose result is written to the manifest.
+    """
+    global _resolved_path
+    with _lock:
+        if _resolved_path and not refresh:
+            return _resolved_path
+
+        # Read on use: .env may be loaded after this module is imported
+        pinned_path = os.getenv("CHROMEDRIVER_PATH")
+        if pinned_path:
+            if not os.path.isfile(pinned_path):
+                raise FileNotFoundError(f"CHROMEDRIVER_PATH not found: {pinned_path}")
+            _resolved_path = pinned_path
+            return _resolved_path
+
+        path = None if refresh else _read_manifest()
+        if not path:
+            from webdriver_manager.chrome import ChromeDriverManager
+            path = ChromeDriverManager().install()
+            _write_manifest(path)
+        _resolved_path = path
+        return _resolved_path
+
+def startup_check():
+    """Resolve the driver at startup and report how long it took"""
+    started = time.monotonic()
+    try:
+        path = resolve_driver_path()
+        logger.info(f"✅ chromedriver resolved in {(time.monotonic() - started) * 1000:.0f} ms: {path}")
+        return path
+    except Exception as e:
+        logger.error(f"❌ chromedriver resolution failed after {(time.monotonic() - started) * 1000:.0f} ms: {e}")
+        return None
@@ -0,0 +1,158 @@
+import os
+import json
+import time
+import logging
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Optional: only available on Linux with inotify_simple installed
+    INotify = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+PARTIAL_SUFFIXES = (".crdownload", ".tmp", ".part")
+FALLBACK_POLL_INTERVAL = 0.1
+
+def _is_partial(filename):
+    return filename.endswith(PARTIAL_SUFFIXES) or filename.startswith(".")
+
+class _DirectoryWatcher:
+    """Wakes up on file creation/renames in a directory (inotify, else short polling)"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._inotify = None
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                self._inotify.add_watch(
+                    directory,
+                    inotify_flags.CREATE | inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+                )
+            except OSError as e:
+                logger.debug(f"inotify unavailable for {directory}: {e}")
+                self._inotify = None
+
+    def wait(self, timeout):
+        """Block until something changes in the directory or timeout seconds pass"""
+        if self._inotify is not None:
+            self._inotify.read(timeout=max(int(timeout * 1000), 1))
+        else:
+            time.sleep(min(timeout, FALLBACK_POLL_INTERVAL))
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+class DownloadTracker:
+    """Tracks the download triggered by the next click in one browser tab
+
+    Uses the Page.downloadWillBegin / Page.downloadProgress DevTools events
+    from the performance log (one GUID per download); chromedriver only logs
+    Network.*, Page.* and Tracing.* events, so the Browser.* ones never show
+    up there. Falls back to inotify or polling when the log is not available.
+    Call arm() before the click, then wait_finished() returns the exact file
+    that click produced.
+    """
+
+    def __init__(self, driver, download_dir):
+        self.driver = driver
+        self.download_dir = download_dir
+        self.use_cdp = True
+        self._existing = set()
+        self._guid = None
+        self._suggested = None
+        self._state = None
+
+    def _listdir(self):
+        try:
+            return set(os.listdir(self.download_dir))
+        except FileNotFoundError:
+            return set()
+
+    def _drain_events(self):
+        """Consume pending DevTools download events for this tab"""
+        if not self.use_cdp:
+            return
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logger.debug(f"Performance log unavailable, using filesystem events: {e}")
+            self.use_cdp = False
+            return
+
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Page.downloadWillBegin" and self._guid is None:
+                self._guid = params.get("guid")
+                self._suggested = params.get("suggestedFilename")
+                self._state = "inProgress"
+                logger.info(f"Download started: {self._suggested} ({self._guid})")
+            elif method == "Page.downloadProgress" and params.get("guid") == self._guid:
+                self._state = params.get("state")
+
+    def arm(self):
+        """Forget earlier downloads; call right before the triggering click"""
+        self._existing = self._listdir()
+        self._guid = None
+        self._suggested = None
+        self._state = None
+        self._drain_events()
+        self._guid = None
+
+    def _new_files(self, filename_part=None):
+        candidates = [
+            name for name in self._listdir() - self._existing
+            if not _is_partial(name) and (not filename_part or filename_part in name)
+        ]
+        if self._suggested:
+            stem = os.path.splitext(self._suggested)[0]
+            preferred = [name for name in candidates if name.startswith(stem)]
+            candidates = preferred or candidates
+        return sorted(candidates, key=lambda name: os.path.getmtime(os.path.join(self.download_dir, name)))
+
+    def began(self):
+        """True once the click since arm() produced a download"""
+        self._drain_events()
+        return bool(self._guid or self._listdir() - self._existing)
+
+    def wait_started(self, timeout=30):
+        """Wait for the download to begin; returns False on timeout"""
+        watcher = _DirectoryWatcher(self.download_dir)
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                if self.began():
+                    return True
+                watcher.wait(FALLBACK_POLL_INTERVAL if self.use_cdp else deadline - time.monotonic())
+            return False
+        finally:
+            watcher.close()
+
+    def wait_finished(self, filename_part=None, timeout=60):
+        """Return the name of the finished file produced since arm()"""
+        logger.info(f"Waiting for download containing '{filename_part}' in {self.download_dir}")
+        watcher = _DirectoryWatcher(self.download_dir)
+        try:
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                self._drain_events()
+                if self._state == "canceled":
+                    raise RuntimeError(f"Download {self._suggested} was canceled")
+                if not self.use_cdp or self._guid is None or self._state == "completed":
+                    files = self._new_files(filename_part)
+                    if files:
+                        logger.info(f"Download completed: {files[-1]}")
+                        return files[-1]
+                remaining = deadline - time.monotonic()
+                watcher.wait(min(FALLBACK_POLL_INTERVAL, remaining) if self.use_cdp else remaining)
+        finally:
+            watcher.close()
+
+        logger.error(f"Download timeout after {timeout} seconds for '{filename_part}'")
+        raise TimeoutError(f"Download did not complete in {timeout} seconds for '{filename_part}'")
@@ -0,0 +1,69 @@
+import re
+import logging
+from lxml import html as lxml_html
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_INT_RE = re.compile(r"^-?\d{1,3}(,\d{3})*$|^-?\d+$")
+_FLOAT_RE = re.compile(r"^-?(\d{1,3}(,\d{3})*|\d*)\.\d+$")
+
+# Returns only the cell texts, so a few KB of JSON cross the WebDriver wire
+# instead of the grid's full outerHTML.
+_EXTRACT_SCRIPT = """
+const table = document.getElementById(arguments[0]);
+if (!table) return null;
+const rows = [];
+for (const tr of table.rows) {
+    const cells = [];
+    for (const cell of tr.cells) { cells.push(cell.textContent.trim()); }
+    if (cells.length) rows.push(cells);
+}
+return rows;
+"""
+
+def typed(value):
+    """Convert a cell's text the way pd.read_html would (ints, floats, None)"""
+    value = value.strip().replace("\xa0", " ").strip()
+    if not value:
+        return None
+    if _INT_RE.match(value):
+        return int(value.replace(",", ""))
+    if _FLOAT_RE.match(value):
+        return float(value.replace(",", ""))
+    return value
+
+def split_rows(raw_rows):
+    """Split raw cell texts into (header, typed row tuples)"""
+    if not raw_rows:
+        return None, []
+    header = [cell.strip() for cell in raw_rows[0]]
+    body = [tuple(typed(cell) for cell in row) for row in raw_rows[1:]]
+    return header, body
+
+def extract_grid(driver, element_id):
+    """Read a GridView as (header, rows) with a single execute_script call"""
+    raw_rows = driver.execute_script(_EXTRACT_SCRIPT, element_id)
+    if raw_rows is None:
+        raise LookupError(f"Grid not found: {element_id}")
+    return split_rows(raw_rows)
+
+def rows_from_element(table):
+    """Read an lxml <table> element as (header, rows)"""
+    raw_rows = []
+    for tr in table.xpath("./tr|./thead/tr|./tbody/tr|./tfoot/tr"):
+        cells = [cell.text_content().strip() for cell in tr if cell.tag in ("td", "th")]
+        if cells:
+            raw_rows.append(cells)
+    return split_rows(raw_rows)
+
+def parse_grid_html(html, element_id=None):
+    """Parse a grid's HTML directly with lxml into (header, rows)"""
+    document = lxml_html.fromstring(html)
+    if element_id:
+        table = document.get_element_by_id(element_id, None)
+        if table is None:
+            raise LookupError(f"Grid not found: {element_id}")
+    else:
+        table = document if document.tag == "table" else next(document.iter("table"))
+    return rows_from_element(table)
@@ -1,6 +1,5 @@
 import os
 import time
-import pandas as pd
 import logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -10,14 +9,20 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
-from datetime import datetime
 import shutil
+from .lean import TransferStats
+from .waits import postback, select_option, retry_pause, report_timings, timed, watch_element, wait_for_element_change
+from .downloads import DownloadTracker
+from .tabs import fan_out, SCRAPE_TABS
+from .portal_http import PdfDownloader, PDF_ENGINE
+from .master_data import master_data
+from .manifest import tracked
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-excelpath = os.path.join(os.path.dirname(__file__), "distict&warehouse.xlsx")
 
+@timed("inventory.navigate")
 def navigate(driver):
     """Navigate to the inventory section with error handling"""
     try:
@@ -27,12 +32,9 @@ def navigate(driver):
         home_button = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.ID, "ctl00_ImageButton_Home"))
         )
-        home_button.click()
-        
-        # Wait for page to load completely
-        WebDriverWait(driver, 15).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
+        # Wait for the page the click loads to finish
+        with postback(driver, element=home_button, label="inventory.navigate.home"):
+            home_button.click()
         
         logger.info("Successfully navigated to inventory section")
         
@@ -40,26 +42,13 @@ def navigate(driver):
         logger.error(f"Navigation failed: {e}")
         raise Exception(f"Failed to navigate to inventory section: {str(e)}")
 
-def wait_for_download(download_dir, filename_part, timeout=60):
-    """Wait for file download with improved timeout and error handling"""
-    logger.info(f"Waiting for download containing '{filename_part}' in {download_dir}")
-    
-    for attempt in range(timeout):
-        try:
-            for filename in os.listdir(download_dir):
-                if filename_part in filename and not filename.endswith(".crdownload"):
-                    logger.info(f"Download completed: {filename}")
-                    return filename
-        except Exception as e:
-            logger.warning(f"Error checking download directory: {e}")
-        
-        time.sleep(1)
-    
-    logger.error(f"Download timeout after {timeout} seconds for '{filename_part}'")
-    raise TimeoutError(f"Download did not complete in {timeout} seconds for '{filename_part}'")
+@timed("inventory.submit")
+def submit_request(driver, destination, depot, tracker=None, downloader=None, dest_path=None, max_retries=3):
+    """Submit inventory request with retry logic and comprehensive error handling
 
-def submit_request(driver, destination, depot, max_retries=3):
-    """Submit inventory request with retry logic and comprehensive error handling"""
+    With a downloader the PDF postback is replayed over HTTP into dest_path
+    instead of being clicked in the browser.
+    """
     for attempt in range(max_retries):
         try:
             logger.info(f"Submitting inventory request for {destination} → {depot} (attempt {attempt + 1})")
@@ -68,8 +57,8 @@ def submit_request(driver, destination, depot, max_retries=3):
             district_dropdown = WebDriverWait(driver, 15).until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ddl_Excise_district"))
             )
-            Select(district_dropdown).select_by_visible_text(destination)
-            time.sleep(2)
+            # The district stays selected between its warehouses: only the first one posts back
+            select_option(driver, district_dropdown, destination, label="inventory.select_district")
             
             # Wait for depot options to load
             WebDriverWait(driver, 15).until(
@@ -78,50 +67,63 @@ def submit_request(driver, destination, depot, max_retries=3):
                 ).options) > 1
             )
             
+            # Watch the grid in-page before the depot postback replaces it
+            grid_generation = watch_element(driver, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_GridView1")
+            
             # Select depot
-            warehouse_dropdown = Select(driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ddl_warehouse"))
-            warehouse_dropdown.select_by_visible_text(depot)
-            time.sleep(2)
+            warehouse_elem = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ddl_warehouse")
+            changed = select_option(driver, warehouse_elem, depot, label="inventory.select_warehouse")
             
             # Wait for inventory grid to update
-            grid_elem = WebDriverWait(driver, 15).until(
-                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_GridView1"))
-            )
-            old_html = grid_elem.get_attribute('outerHTML')
             WebDriverWait(driver, 15).until(
-                lambda d: d.find_element(By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_GridView1").get_attribute('outerHTML') != old_html
+                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_GridView1"))
             )
+            # Already showing this warehouse (a retry): the grid is current and will not change
+            if changed:
+                wait_for_element_change(driver, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_GridView1", grid_generation, label="inventory.grid_change")
             # Click PDF button
             pdf_button = WebDriverWait(driver, 15).until(
                 EC.element_to_be_clickable((By.ID, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ImgButton_WarehousePdf"))
             )
+            if downloader:
+                downloader.submit(driver, "ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ImgButton_WarehousePdf", dest_path, label=(destination, depot))
+                logger.info(f"✅ Request submitted successfully for {destination} → {depot}")
+                return True
+            if tracker:
+                tracker.arm()
             pdf_button.click()
-            time.sleep(5)
+            if tracker:
+                with timed("inventory.download_start"):
+                    started = tracker.wait_started(timeout=30)
+                if not started:
+                    logger.warning(f"Download for {destination} → {depot} has not started yet")
             logger.info(f"✅ Request submitted successfully for {destination} → {depot}")
             return True
             
         except Exception as e:
             logger.warning(f"Request attempt {attempt + 1} failed for {destination} → {depot}: {e}")
             if attempt < max_retries - 1:
-                time.sleep(3)  # Wait before retry
+                retry_pause(driver, label="inventory.retry")
             else:
                 logger.error(f"Failed to submit request for {destination} → {depot} after {max_retries} attempts")
                 return False
     
     return False
 
-def rename_file(download_dir, old_filename, depot):
-    """Rename downloaded file with error handling"""
+def inventory_filename(destination, depot):
+    """Final file name of a district/warehouse pair's inventory PDF inside download_dir"""
+    return f"{destination.replace(' ', '_')}_{depot.replace(' ', '_')}.pdf"
+
+@timed("inventory.rename")
+def rename_file(download_dir, old_filename, new_filename, dest_dir=None):
+    """Rename downloaded file (optionally into dest_dir) with error handling"""
     try:
         src = os.path.join(download_dir, old_filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        new_name = f"{timestamp}_{depot.replace(' ', '_')}"
-        ext = os.path.splitext(old_filename)[1]
-        dst = os.path.join(download_dir, f"{new_name}{ext}")
+        dst = os.path.join(dest_dir or download_dir, new_filename)
         
         if os.path.exists(src):
             shutil.move(src, dst)
-            logger.info(f"File renamed: {old_filename} -> {new_name}{ext}")
+            logger.info(f"File renamed: {old_filename} -> {new_filename}")
             return True
         else:
             logger.error(f"Source file not found: {src}")
@@ -131,61 +133,128 @@ def rename_file(download_dir, old_filename, depot):
         logger.error(f"Error renaming file {old_filename}: {e}")
         return False
 
-def scrap_inventory(driver, download_dir):
-    """Main inventory scraping function with comprehensive error handling"""
+def process_entry(driver, destination, depot, download_dir, work_dir=None, stats=None, downloader=None):
+    """Request, download and rename the inventory PDF of one district/warehouse pair
+
+    Downloads land in work_dir (download_dir by default) and the renamed
+    file is moved into download_dir. With a downloader the PDF is streamed
+    straight to its final name in the background. Returns True on success.
+    """
+    work_dir = work_dir or download_dir
+    tracker = DownloadTracker(driver, work_dir)
+    try:
+        if downloader:
+            dest_path = os.path.join(download_dir, inventory_filename(destination, depot))
+            submitted = submit_request(driver, destination, depot, downloader=downloader, dest_path=dest_path)
+            if stats:
+                stats.sample(driver)
+            if not submitted:
+                logger.error(f"❌ Request submission failed for {destination} → {depot}")
+            return submitted
+
+        # Submit request
+        submitted = submit_request(driver, destination, depot, tracker)
+        if stats:
+            stats.sample(driver)
+        if not submitted:
+            logger.error(f"❌ Request submission failed for {destination} → {depot}")
+            return False
+
+        try:
+            # Wait for download
+            with timed("inventory.download_wait"):
+                filename = tracker.wait_finished("WBSBCL_Inventory")
+        except TimeoutError:
+            logger.error(f"❌ Download timeout for {destination} → {depot}")
+            return False
+
+        if not filename:
+            logger.warning(f"⚠️ No file downloaded for {destination} → {depot}")
+            return False
+
+        # Rename file
+        if rename_file(work_dir, filename, inventory_filename(destination, depot), dest_dir=download_dir):
+            logger.info(f"✅ Successfully processed {destination} → {depot}")
+            return True
+        logger.error(f"❌ Failed to rename file for {destination} → {depot}")
+        return False
+
+    except Exception as e:
+        logger.error(f"❌ Error processing {destination} → {depot}: {e}")
+        return False
+
+def finish_downloads(downloader, manifest=None, entries=()):
+    """Wait for background PDF downloads and return how many of them failed"""
+    if not downloader:
+        return 0
+    # Downloads are labelled (destination, depot): warehouse names repeat across districts
+    entries = set(map(tuple, entries))
+    failed = 0
+    for entry, error in downloader.finish():
+        if error:
+            if manifest and entry in entries:
+                manifest.record(entry, False, 0, error=f"Download failed: {error}")
+            failed += 1
+    return failed
+
+def scrap_inventory(driver, download_dir, tabs=SCRAPE_TABS, pdf_engine=PDF_ENGINE, targets=None, manifest=None):
+    """Main inventory scraping function with comprehensive error handling
+
+    targets limits the run to some (district, warehouse) pairs; manifest
+    records the outcome of every pair.
+    """
     try:
         logger.info("Starting inventory scraping...")
         
-        # Load Excel data
-        if not os.path.exists(excelpath):
-            raise FileNotFoundError(f"Excel file not found: {excelpath}")
-            
-        df = pd.read_excel(excelpath)
-        logger.info(f"Loaded {len(df)} district/warehouse entries from Excel")
-        
+        # Load master data
+        entries = [tuple(entry) for entry in targets] if targets is not None else master_data().entries
+        logger.info(f"Loaded {len(entries)} district/warehouse entries")
+        if manifest:
+            manifest.add(entries)
+
+        downloader = PdfDownloader(driver) if pdf_engine == "http" else None
+
+        if tabs > 1:
+            success_count, failure_count = fan_out(
+                driver, entries, navigate,
+                lambda tab, entry, work_dir: tracked(
+                    manifest, entry,
+                    lambda: process_entry(tab, entry[0], entry[1], download_dir, work_dir, downloader=downloader),
+                    output=inventory_filename(*entry)
+                ),
+                download_dir, tabs=tabs, label="inventory"
+            )
+            failed_downloads = finish_downloads(downloader, manifest, entries)
+            success_count -= failed_downloads
+            failure_count += failed_downloads
+            report_timings()
+            logger.info(f"✅ Inventory scraping completed. Success: {success_count}, Failures: {failure_count}")
+            return
+
         # Navigate to inventory section
         navigate(driver)
         
         success_count = 0
         failure_count = 0
+        stats = TransferStats(driver, "inventory")
         
         # Process each district/warehouse pair
-        for index, row in df.iterrows():
-            try:
-                destination = row['District']
-                depot = row['Warehouse Name']
-                logger.info(f"Processing entry {index + 1}/{len(df)}: {destination} → {depot}")
-                
-                # Submit request
-                if submit_request(driver, destination, depot):
-                    try:
-                        # Wait for download
-                        filename = wait_for_download(download_dir, "WBSBCL_Inventory")
-                        if filename:
-                            # Rename file
-                            if rename_file(download_dir, filename, depot):
-                                success_count += 1
-                                logger.info(f"✅ Successfully processed {destination} → {depot}")
-                            else:
-                                failure_count += 1
-                                logger.error(f"❌ Failed to rename file for {destination} → {depot}")
-                        else:
-                            failure_count += 1
-                            logger.warning(f"⚠️ No file downloaded for {destination} → {depot}")
-                            
-                    except TimeoutError:
-                        failure_count += 1
-                        logger.error(f"❌ Download timeout for {destination} → {depot}")
-                        
-                else:
-                    failure_count += 1
-                    logger.error(f"❌ Request submission failed for {destination} → {depot}")
-                    
-            except Exception as e:
+        for index, (destination, depot) in enumerate(entries):
+            logger.info(f"Processing entry {index + 1}/{len(entries)}: {destination} → {depot}")
+            if tracked(
+                manifest, (destination, depot),
+                lambda: process_entry(driver, destination, depot, download_dir, stats=stats, downloader=downloader),
+                output=inventory_filename(destination, depot)
+            ):
+                success_count += 1
+            else:
                 failure_count += 1
-                logger.error(f"❌ Error processing {destination} → {depot}: {e}")
-                continue
         
+        failed_downloads = finish_downloads(downloader, manifest, entries)
+        success_count -= failed_downloads
+        failure_count += failed_downloads
+        stats.report()
+        report_timings()
         logger.info(f"✅ Inventory scraping completed. Success: {success_count}, Failures: {failure_count}")
         
     except Exception as e:
@@ -1,6 +1,5 @@
 import os
 import time
-import pandas as pd
 import logging
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -12,32 +11,23 @@ from selenium.webdriver.common.keys import Keys
 from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime, date
 import shutil
+from .lean import TransferStats
+from .waits import postback, select_option, retry_pause, report_timings, timed, watch_element, wait_for_element_change
+from .downloads import DownloadTracker
+from .tabs import fan_out, SCRAPE_TABS
+from .portal_http import PdfDownloader, NoDocumentError, PDF_ENGINE
+from .master_data import master_data
+from .artifact_cache import ARTIFACTS, is_immutable
+from .manifest import tracked
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 LOG_FILENAME = "report.txt"
+NO_INVOICE = "No invoice on the portal"
 today = date.today().strftime("%d-%m-%Y") 
-EXCEL_PATH = os.path.join(os.path.dirname(__file__), "distict&warehouse.xlsx")
-
-def wait_for_download(download_dir, filename_part, timeout=60):
-    """Wait for file download with improved timeout and error handling"""
-    logger.info(f"Waiting for download containing '{filename_part}' in {download_dir}")
-    
-    for attempt in range(timeout):
-        try:
-            for filename in os.listdir(download_dir):
-                if filename_part in filename and not filename.endswith(".crdownload"):
-                    logger.info(f"Download completed: {filename}")
-                    return filename
-        except Exception as e:
-            logger.warning(f"Error checking download directory: {e}")
-        
-        time.sleep(1)
-    
-    logger.error(f"Download timeout after {timeout} seconds for '{filename_part}'")
-    raise TimeoutError(f"Download did not complete in {timeout} seconds for '{filename_part}'")
 
+@timed("invoice.navigate")
 def navigate(driver):
     """Navigate to the invoice section with error handling"""
     try:
@@ -47,15 +37,15 @@ def navigate(driver):
         menu_button = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.ID, 'ctl00_ImageButton11'))
         )
-        menu_button.click()
-        time.sleep(5)
+        with postback(driver, element=menu_button, label="invoice.navigate.menu"):
+            menu_button.click()
         
         # Click on the invoice link
         invoice_link = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.ID, 'ctl00_ContentPlaceHolder1_TabContainer1_Tab_BI_Module_grid_crop_suppl_ctl10_link_crop_supplier'))
         )
-        invoice_link.click()
-        time.sleep(10)
+        with postback(driver, element=invoice_link, label="invoice.navigate.link"):
+            invoice_link.click()
         
         logger.info("Successfully navigated to invoice section")
         
@@ -63,8 +53,13 @@ def navigate(driver):
         logger.error(f"Navigation failed: {e}")
         raise Exception(f"Failed to navigate to invoice section: {str(e)}")
 
-def submit_request(driver, destination, date, max_retries=3):
-    """Submit invoice request with retry logic"""
+@timed("invoice.submit")
+def submit_request(driver, destination, date, tracker=None, downloader=None, dest_path=None, max_retries=3):
+    """Submit invoice request with retry logic
+
+    With a downloader the btn_Show postback is replayed over HTTP into
+    dest_path instead of being clicked in the browser.
+    """
     for attempt in range(max_retries):
         try:
             logger.info(f"Submitting request for {destination} on {date.strftime('%d/%m/%Y')} (attempt {attempt + 1})")
@@ -73,35 +68,41 @@ def submit_request(driver, destination, date, max_retries=3):
             warehouse_select = WebDriverWait(driver, 15).until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_ddl_Warehouse"))
             )
-            select = Select(warehouse_select)
-            select.select_by_visible_text(destination)
-            time.sleep(1)
+            select_option(driver, warehouse_select, destination, label="invoice.select_warehouse")
+            
+            # Watch the grid in-page before the date postback replaces it
+            grid_generation = watch_element(driver, "ctl00_ContentPlaceHolder1_Grid_req")
             
             # Select date
             date_select = WebDriverWait(driver, 15).until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_ddl_date"))
             )
-            date_dropdown = Select(date_select)
-            date_dropdown.select_by_visible_text(date.strftime('%d/%m/%Y'))
-            time.sleep(1)
+            changed = select_option(driver, date_select, date.strftime('%d/%m/%Y'), label="invoice.select_date")
             
-            # Wait for table to update
-            table_elem = WebDriverWait(driver, 15).until(
-                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_Grid_req"))
-            )
-            old_html = table_elem.get_attribute('outerHTML')
-            # Click or trigger the event that loads new data if needed (if not automatic)
-            # Wait for the table's HTML to change
+            # Wait for the table to be replaced
             WebDriverWait(driver, 15).until(
-                lambda d: d.find_element(By.ID, "ctl00_ContentPlaceHolder1_Grid_req").get_attribute('outerHTML') != old_html
+                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_Grid_req"))
             )
+            # Already showing this warehouse and date (a retry): the grid is current and will not change
+            if changed:
+                wait_for_element_change(driver, "ctl00_ContentPlaceHolder1_Grid_req", grid_generation, label="invoice.grid_change")
             # Now the table is updated
             # Click show button
             show_button = WebDriverWait(driver, 15).until(
                 EC.element_to_be_clickable((By.ID, "ctl00_ContentPlaceHolder1_btn_Show"))
             )
+            if downloader:
+                downloader.submit(driver, "ctl00_ContentPlaceHolder1_btn_Show", dest_path, label=destination)
+                logger.info(f"Request submitted successfully for {destination}")
+                return True
+            if tracker:
+                tracker.arm()
             show_button.click()
-            time.sleep(5)
+            if tracker:
+                with timed("invoice.download_start"):
+                    started = tracker.wait_started(timeout=30)
+                if not started:
+                    logger.warning(f"Download for {destination} has not started yet")
             
             logger.info(f"Request submitted successfully for {destination}")
             return True
@@ -109,19 +110,20 @@ def submit_request(driver, destination, date, max_retries=3):
         except Exception as e:
             logger.warning(f"Request submission attempt {attempt + 1} failed for {destination}: {e}")
             if attempt < max_retries - 1:
-                time.sleep(3)  # Wait before retry
+                retry_pause(driver, label="invoice.retry")
             else:
                 logger.error(f"Failed to submit request for {destination} after {max_retries} attempts")
                 return False
     
     return False
 
-def rename_file(download_dir, old_filename, new_name):
-    """Rename downloaded file with error handling"""
+@timed("invoice.rename")
+def rename_file(download_dir, old_filename, new_name, dest_dir=None):
+    """Rename downloaded file (optionally into dest_dir) with error handling"""
     try:
         src = os.path.join(download_dir, old_filename)
         ext = os.path.splitext(old_filename)[1]
-        dst = os.path.join(download_dir, f"{new_name}{ext}")
+        dst = os.path.join(dest_dir or download_dir, f"{new_name}{ext}")
         
         if os.path.exists(src):
             shutil.move(src, dst)
@@ -146,18 +148,181 @@ def log_failure(destination, date, reason, download_dir):
     except Exception as e:
         logger.error(f"Error logging failure: {e}")
         
-def scrape_invoice(driver, download_dir, inputDate):
-    """Main invoice scraping function with comprehensive error handling"""
+def invoice_filename(destination):
+    """Final file name of a warehouse's invoice inside download_dir"""
+    return f"{destination.replace(' ', '_')}.pdf"
+
+def restore_from_cache(download_dir, date_obj, destinations=None, cache=ARTIFACTS):
+    """Place cached invoices of a past date in download_dir; returns the warehouses still missing
+
+    Warehouses the cache knows have no invoice that day count as hits and
+    are noted in the report instead.
+    """
+    destinations = list(destinations if destinations is not None else master_data().warehouses)
+    if not cache.enabled or not is_immutable(date_obj):
+        return destinations
+    missing = []
+    for destination in destinations:
+        if cache.restore("invoice", destination, date_obj, os.path.join(download_dir, invoice_filename(destination))):
+            continue
+        if cache.is_missing("invoice", destination, date_obj):
+            log_failure(destination, date_obj, f"{NO_INVOICE} (cached)", download_dir)
+            continue
+        missing.append(destination)
+    hits = len(destinations) - len(missing)
+    if hits:
+        logger.info(f"♻️ {hits}/{len(destinations)} invoices for {date_obj.strftime('%d/%m/%Y')} served from cache")
+    return missing
+
+def store_in_cache(download_dir, date_obj, destinations, absent=(), cache=ARTIFACTS):
+    """Keep the freshly downloaded invoices of a past date for later requests
+
+    absent holds the warehouses the portal had no invoice for; they are
+    remembered too, so later requests do not ask again.
+    """
+    if not cache.enabled or not is_immutable(date_obj):
+        return
+    for destination in destinations:
+        path = os.path.join(download_dir, invoice_filename(destination))
+        try:
+            if os.path.exists(path):
+                cache.put("invoice", destination, date_obj, path)
+            elif destination in absent:
+                cache.put_missing("invoice", destination, date_obj)
+        except Exception as e:
+            logger.warning(f"Could not cache invoice of {destination}: {e}")
+
+def process_warehouse(driver, destination, date_obj, download_dir, work_dir=None, stats=None, downloader=None, absent=None):
+    """Request, download and rename the invoice of one warehouse
+
+    Downloads land in work_dir (download_dir by default) and the renamed
+    file is moved into download_dir. With a downloader the PDF is streamed
+    straight to its final name in the background. Returns True on success;
+    when the click produced no download at all, destination is added to absent.
+    """
+    work_dir = work_dir or download_dir
+    tracker = DownloadTracker(driver, work_dir)
+    try:
+        if downloader:
+            dest_path = os.path.join(download_dir, invoice_filename(destination))
+            submitted = submit_request(driver, destination, date_obj, downloader=downloader, dest_path=dest_path)
+            if stats:
+                stats.sample(driver)
+            if not submitted:
+                log_failure(destination, date_obj, "Request submission failed", download_dir)
+                logger.error(f"❌ Request submission failed for {destination}")
+            return submitted
+
+        # Submit request
+        submitted = submit_request(driver, destination, date_obj, tracker)
+        if stats:
+            stats.sample(driver)
+        if not submitted:
+            log_failure(destination, date_obj, "Request submission failed", download_dir)
+            logger.error(f"❌ Request submission failed for {destination}")
+            return False
+
+        try:
+            # Wait for download
+            with timed("invoice.download_wait"):
+                filename = tracker.wait_finished("BEVCO_Invoice.pdf")
+        except TimeoutError:
+            if not tracker.began():
+                # The portal answered with a page, not a PDF: there is no invoice that day
+                if absent is not None:
+                    absent.add(destination)
+                log_failure(destination, date_obj, NO_INVOICE, download_dir)
+                logger.warning(f"⚠️ No invoice for {destination}")
+                return False
+            log_failure(destination, date_obj, "Download timeout", download_dir)
+            logger.error(f"❌ Download timeout for {destination}")
+            return False
+
+        if not filename:
+            log_failure(destination, date_obj, "No file downloaded", download_dir)
+            logger.warning(f"⚠️ No file downloaded for {destination}")
+            return False
+
+        # Rename file
+        if rename_file(work_dir, filename, destination.replace(" ", "_"), dest_dir=download_dir):
+            logger.info(f"✅ Successfully processed {destination}")
+            return True
+        log_failure(destination, date_obj, "File rename failed", download_dir)
+        return False
+
+    except Exception as e:
+        log_failure(destination, date_obj, f"Processing error: {str(e)}", download_dir)
+        logger.error(f"❌ Error processing {destination}: {e}")
+        return False
+
+def finish_downloads(downloader, date_obj, download_dir, manifest=None, absent=None):
+    """Wait for background PDF downloads and return how many of them failed"""
+    if not downloader:
+        return 0
+    failed = 0
+    for destination, error in downloader.finish():
+        if error:
+            if isinstance(error, NoDocumentError) and absent is not None:
+                absent.add(destination)
+            log_failure(destination, date_obj, f"Download failed: {error}", download_dir)
+            if manifest:
+                manifest.record(destination, False, 0, error=f"Download failed: {error}")
+            failed += 1
+    return failed
+
+def scrape_invoice(driver, download_dir, inputDate, tabs=SCRAPE_TABS, pdf_engine=PDF_ENGINE, targets=None, manifest=None):
+    """Main invoice scraping function with comprehensive error handling
+
+    targets limits the run to some warehouses (e.g. the failed ones of an
+    earlier run); manifest records the outcome of every warehouse.
+    """
     try:
         logger.info(f"Starting invoice scraping for date: {inputDate}")
         
-        # Load Excel data
-        if not os.path.exists(EXCEL_PATH):
-            raise FileNotFoundError(f"Excel file not found: {EXCEL_PATH}")
-            
-        df = pd.read_excel(EXCEL_PATH)
-        logger.info(f"Loaded {len(df)} warehouse entries from Excel")
+        # Load master data
+        destinations = list(targets) if targets is not None else master_data().warehouses
+        logger.info(f"Loaded {len(destinations)} warehouse entries")
         
+        # Parse date
+        parsed_date = datetime.strptime(inputDate, '%d-%m-%Y')
+        date_obj = parsed_date
+        if manifest:
+            manifest.add(destinations)
+
+        # Past dates never change: only scrape warehouses the cache does not have
+        missing = restore_from_cache(download_dir, date_obj, destinations)
+        if manifest:
+            for destination in set(destinations) - set(missing):
+                # A known "no invoice" is an answer too: nothing to retry, nothing to lose
+                output = invoice_filename(destination)
+                has_file = os.path.exists(os.path.join(download_dir, output))
+                manifest.record(destination, True, 0, output=output if has_file else None)
+        destinations = missing
+        if not destinations:
+            logger.info(f"✅ All invoices for {inputDate} served from cache")
+            return download_dir
+
+        downloader = PdfDownloader(driver) if pdf_engine == "http" else None
+        absent = set()
+
+        if tabs > 1:
+            success_count, failure_count = fan_out(
+                driver, destinations, navigate,
+                lambda tab, destination, work_dir: tracked(
+                    manifest, destination,
+                    lambda: process_warehouse(tab, destination, date_obj, download_dir, work_dir, downloader=downloader, absent=absent),
+                    output=invoice_filename(destination)
+                ),
+                download_dir, tabs=tabs, label="invoice"
+            )
+            failed_downloads = finish_downloads(downloader, date_obj, download_dir, manifest, absent)
+            success_count -= failed_downloads
+            failure_count += failed_downloads
+            store_in_cache(download_dir, date_obj, destinations, absent)
+            report_timings()
+            logger.info(f"✅ Invoice scraping completed. Success: {success_count}, Failures: {failure_count}")
+            return download_dir
+
         # Navigate to invoice section
         navigate(driver)
         
@@ -166,53 +331,28 @@ def scrape_invoice(driver, download_dir, inputDate):
             lambda d: d.execute_script('return document.readyState') == 'complete'
         )
         
-        # Parse date
-        parsed_date = datetime.strptime(inputDate, '%d-%m-%Y')
-        date_obj = parsed_date
-        
         success_count = 0
         failure_count = 0
+        stats = TransferStats(driver, "invoice")
         
         # Process each warehouse
-        for index, row in df.iterrows():
-            try:
-                destination = row["Warehouse Name"]
-                logger.info(f"Processing warehouse {index + 1}/{len(df)}: {destination}")
-                
-                # Submit request
-                if submit_request(driver, destination, date_obj):
-                    try:
-                        # Wait for download
-                        filename = wait_for_download(download_dir, "BEVCO_Invoice.pdf")
-                        if filename:
-                            # Rename file
-                            if rename_file(download_dir, filename, destination.replace(" ", "_")):
-                                success_count += 1
-                                logger.info(f"✅ Successfully processed {destination}")
-                            else:
-                                log_failure(destination, date_obj, "File rename failed", download_dir)
-                                failure_count += 1
-                        else:
-                            log_failure(destination, date_obj, "No file downloaded", download_dir)
-                            failure_count += 1
-                            logger.warning(f"⚠️ No file downloaded for {destination}")
-                            
-                    except TimeoutError:
-                        log_failure(destination, date_obj, "Download timeout", download_dir)
-                        failure_count += 1
-                        logger.error(f"❌ Download timeout for {destination}")
-                        
-                else:
-                    log_failure(destination, date_obj, "Request submission failed", download_dir)
-                    failure_count += 1
-                    logger.error(f"❌ Request submission failed for {destination}")
-                    
-            except Exception as e:
-                log_failure(destination, date_obj, f"Processing error: {str(e)}", download_dir)
+        for index, destination in enumerate(destinations):
+            logger.info(f"Processing warehouse {index + 1}/{len(destinations)}: {destination}")
+            if tracked(
+                manifest, destination,
+                lambda: process_warehouse(driver, destination, date_obj, download_dir, stats=stats, downloader=downloader, absent=absent),
+                output=invoice_filename(destination)
+            ):
+                success_count += 1
+            else:
                 failure_count += 1
-                logger.error(f"❌ Error processing {destination}: {e}")
-                continue
         
+        failed_downloads = finish_downloads(downloader, date_obj, download_dir, manifest, absent)
+        success_count -= failed_downloads
+        failure_count += failed_downloads
+        store_in_cache(download_dir, date_obj, destinations, absent)
+        stats.report()
+        report_timings()
         logger.info(f"✅ Invoice scraping completed. Success: {success_count}, Failures: {failure_count}")
         return download_dir
         
@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import logging
+import importlib
+import threading
+import subprocess
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+# Modules that pull in selenium, webdriver_manager and openpyxl; the bot only
+# needs them once a job runs.
+HEAVY_MODULES = (
+    "module.login",
+    "module.master_data",
+    "module.invoice",
+    "module.stock",
+    "module.inventory",
+)
+PREWARM_IMPORTS = os.getenv("PREWARM_IMPORTS", "1") == "1"
+IMPORT_TIME_REPORT = os.getenv("IMPORT_TIME_REPORT", "0") == "1"
+IMPORT_TIME_TOP = int(os.getenv("IMPORT_TIME_TOP", "15"))
+
+_load_times = {}
+_lock = threading.Lock()
+
+def load(name):
+    """Import a module on first use and remember how long the import took"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    with _lock:
+        if name not in _load_times:
+            _load_times[name] = elapsed
+            logger.info(f"📦 Imported {name} in {elapsed * 1000:.0f} ms")
+    return module
+
+def load_times():
+    """Copy of {module: seconds} for the modules loaded through load()"""
+    with _lock:
+        return dict(_load_times)
+
+def prewarm(names=HEAVY_MODULES):
+    """Import the heavy modules in a background thread so the first job finds them loaded"""
+    def run():
+        started = time.perf_counter()
+        for name in names:
+            try:
+                load(name)
+            except Exception as e:
+                logger.error(f"❌ Pre-warming {name} failed: {e}")
+        logger.info(f"🔥 Pre-warmed {len(names)} module(s) in {time.perf_counter() - started:.1f}s")
+
+    thread = threading.Thread(target=run, name="import-prewarm", daemon=True)
+    thread.start()
+    return thread
+
+def parse_importtime(output):
+    """Parse `python -X importtime` stderr into [(module, self_us, cumulative_us)]"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # header line
+        entries.append((fields[2].strip(), self_us, cumulative_us))
+    return entries
+
+def import_time_report(names=HEAVY_MODULES, top=IMPORT_TIME_TOP):
+    """Log a `-X importtime` summary of importing names in a fresh interpreter
+
+    Runs in a subprocess so the measurement is cold and does not disturb the
+    bot's own modules. Returns the parsed entries, slowest cumulative first.
+    """
+    command = [sys.executable, "-X", "importtime", "-c", f"import {', '.join(names)}"]
+    try:
+        result = subprocess.run(
+            command, capture_output=True, text=True, timeout=120,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+    except Exception as e:
+        logger.error(f"❌ Import time report failed: {e}")
+        return []
+    if result.returncode != 0:
+        logger.error(f"❌ Import time report failed: {result.stderr.strip().splitlines()[-1:]}")
+        return []
+
+    entries = sorted(parse_importtime(result.stderr), key=lambda entry: entry[2], reverse=True)
+    total = sum(self_us for _, self_us, _ in entries)
+    logger.info(f"📊 Import time for {', '.join(names)}: {total / 1000:.0f} ms across {len(entries)} modules")
+    for module, self_us, cumulative_us in entries[:top]:
+        logger.info(f"   {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:8.1f} ms self  {module}")
+    return entries
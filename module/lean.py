@@ -0,0 +1,110 @@
+import os
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+# Resource types the scrapers never read: images, stylesheets, fonts and media.
+DEFAULT_BLOCK_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.svg", "*.ico", "*.webp",
+    "*.css", "*.woff", "*.woff2", "*.ttf", "*.eot", "*.otf",
+    "*.mp4", "*.webm", "*.mp3",
+]
+
+# LEAN_MODULES and LEAN_BLOCK_PATTERNS are read on use, as .env may be loaded after this import
+def block_patterns():
+    return [p.strip() for p in os.getenv("LEAN_BLOCK_PATTERNS", ",".join(DEFAULT_BLOCK_PATTERNS)).split(",") if p.strip()]
+
+def lean_modules():
+    return {m.strip() for m in os.getenv("LEAN_MODULES", "").split(",") if m.strip()}
+
+def lean_enabled_for(module):
+    """Return True when the given module (invoice/stock/inventory) should run lean"""
+    return module in lean_modules()
+
+def enable_lean(driver):
+    """Block non-essential resource types through CDP network interception"""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": block_patterns()})
+    driver.lean_mode = True
+
+def disable_lean(driver):
+    """Lift the lean resource blocking"""
+    if getattr(driver, "lean_mode", False):
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+    driver.lean_mode = False
+
+class captcha_allowed:
+    """Context manager that lifts blocking while the login page and its Image1 CAPTCHA load
+
+    Network.setBlockedURLs has no allow rule, so the block list is suspended
+    for the duration of the block and restored afterwards.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.paused = False
+
+    def __enter__(self):
+        if getattr(self.driver, "lean_mode", False):
+            self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            self.paused = True
+        return self.driver
+
+    def __exit__(self, *exc):
+        if self.paused:
+            try:
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": block_patterns()})
+            except Exception as e:
+                logger.warning(f"Failed to restore lean blocking: {e}")
+        return False
+
+_STATS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const res = performance.getEntriesByType('resource');
+let bytes = nav ? (nav.transferSize || 0) : 0;
+for (const r of res) { bytes += r.transferSize || 0; }
+const load = nav ? Math.max(nav.loadEventEnd, nav.domContentLoadedEventEnd) : 0;
+performance.setResourceTimingBufferSize(1000);
+performance.clearResourceTimings();
+return [load, bytes, res.length];
+"""
+
+class TransferStats:
+    """Accumulates page-load time and bytes transferred for a scraping run
+
+    Figures come from the Resource Timing API of the main tab only: PDFs
+    fetched by the HTTP engine and pages loaded in extra tabs are not
+    counted, so they are a lower bound and reported as such.
+    """
+
+    def __init__(self, driver, label):
+        self.label = label
+        self.mode = "lean" if getattr(driver, "lean_mode", False) else "full"
+        self.samples = 0
+        self.load_ms = 0.0
+        self.bytes = 0
+        self.requests = 0
+
+    def sample(self, driver):
+        """Record the timings since the previous sample"""
+        try:
+            load_ms, transferred, requests = driver.execute_script(_STATS_SCRIPT)
+            self.samples += 1
+            self.load_ms += load_ms or 0
+            self.bytes += transferred or 0
+            self.requests += requests or 0
+        except Exception as e:
+            logger.debug(f"Could not sample transfer stats: {e}")
+
+    def report(self):
+        """Log totals and per-sample averages for the run"""
+        if not self.samples:
+            return
+        logger.info(
+            f"📊 {self.label} [{self.mode}] main tab only (excludes HTTP-engine and extra-tab traffic): "
+            f"{self.samples} pages, "
+            f"≥{self.bytes / 1024:.0f} KiB transferred ({self.bytes / 1024 / self.samples:.1f} KiB/page), "
+            f"{self.requests} requests, avg page load {self.load_ms / self.samples:.0f} ms"
+        )
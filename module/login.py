@@ -1,7 +1,7 @@
 import os
 import time
-import pandas as pd
 import logging
+from io import BytesIO
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
@@ -9,19 +9,22 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
+from dotenv import load_dotenv
+
+# Before the package imports below, which read their settings at import time
+load_dotenv(".env",override=True)
+
+from .chromedriver import resolve_driver_path
+from .lean import enable_lean, captcha_allowed
+from .session_vault import save_session, restore_session, load_session
+from .waits import wait_for_staleness, wait_for_page_ready, retry_pause
 from datetime import datetime
 import shutil
-from . import stock 
-from . import invoice
-from . import inventory as inventory
-from dotenv import load_dotenv
 from pathlib import Path
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-load_dotenv(".env",override=True)
 user= 1
 
 # Constants
@@ -30,16 +33,20 @@ LOGIN_URL = os.getenv("LOGIN_URL")
 USERNAME = os.getenv("BEVCO_USER")
 PASSWORD = os.getenv("BEVCO_PASSWORD")
 
-def setup_browser(download_dir):
-    """Setup and configure Chrome browser with optimized settings"""
+def setup_browser(download_dir, headless=False, lean=False):
+    """Setup and configure Chrome browser with optimized settings
+
+    lean runs headless and blocks images, CSS and fonts through CDP.
+    """
     try:
         if not os.path.isdir(download_dir):
             raise ValueError("Download directory does not exist.")
 
         chrome_options = Options()
 
-        # DISABLE headless mode for debugging
-        # chrome_options.add_argument("--headless=new")
+        # Headless is off by default for debugging; the warm pool turns it on
+        if headless or lean:
+            chrome_options.add_argument("--headless=new")
         chrome_options.add_argument("--no-sandbox")
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
@@ -62,13 +69,17 @@ def setup_browser(download_dir):
             "profile.default_content_settings.popups": 0
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        # Performance log carries the Page.download* events used by DownloadTracker
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
 
         # Disable safe browsing for faster downloads
         chrome_options.add_argument("--safebrowsing-disable-download-protection")
         chrome_options.add_argument("--safebrowsing-disable-extension-blacklist")
 
-        driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=chrome_options)
+        driver = webdriver.Chrome(service=ChromeService(resolve_driver_path()), options=chrome_options)
         driver.set_page_load_timeout(30)  # 30 second timeout
+        if lean:
+            enable_lean(driver)
         logger.info(f"Browser setup successful for download_dir: {download_dir}")
         return driver
 
@@ -77,7 +88,7 @@ def setup_browser(download_dir):
         return None
 
 def get_captcha_image(driver, user="default", max_retries=3):
-    """Get CAPTCHA image with retry logic"""
+    """Get CAPTCHA image as an in-memory PNG (BytesIO) with retry logic"""
     for attempt in range(max_retries):
         try:
             if not driver:
@@ -85,31 +96,31 @@ def get_captcha_image(driver, user="default", max_retries=3):
                 return None
                 
             logger.info(f"Attempting to get CAPTCHA (attempt {attempt + 1})")
-            driver.get(LOGIN_URL)
-            
-            # Wait for page to load
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.ID, "Label1"))
-            )
-            
-            # Wait a bit more for CAPTCHA to load
-            time.sleep(2)
-            
-            captcha_elem = driver.find_element(By.ID, "Image1")
-            captcha_image = captcha_elem.screenshot_as_png
-
-            # Save the screenshot locally
-            imagePath = f"captcha_{user}_{int(time.time())}.png"
-            with open(imagePath, "wb") as f:
-                f.write(captcha_image)
-
-            logger.info(f"CAPTCHA saved successfully: {imagePath}")
-            return imagePath
+            with captcha_allowed(driver):
+                driver.get(LOGIN_URL)
+                
+                # Wait for page to load
+                WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.ID, "Label1"))
+                )
+                
+                # Wait until the CAPTCHA image has actually been decoded
+                captcha_elem = driver.find_element(By.ID, "Image1")
+                WebDriverWait(driver, 10, poll_frequency=0.1).until(
+                    lambda d: d.execute_script(
+                        "return arguments[0].complete && arguments[0].naturalWidth > 0", captcha_elem
+                    )
+                )
+                captcha_image = BytesIO(captcha_elem.screenshot_as_png)
+                captcha_image.name = f"captcha_{user}.png"
+
+            logger.info(f"CAPTCHA captured in memory ({captcha_image.getbuffer().nbytes} bytes)")
+            return captcha_image
             
         except Exception as e:
             logger.warning(f"CAPTCHA capture attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
-                time.sleep(2)  # Wait before retry
+                retry_pause(driver, label="captcha.retry")
             else:
                 logger.error(f"Failed to capture CAPTCHA after {max_retries} attempts")
                 return None
@@ -150,7 +161,8 @@ def login(driver, captcha_text=None):
         login_button.click()
         
         # Wait for login to complete
-        time.sleep(3)
+        wait_for_staleness(driver, login_button, label="login.submit")
+        wait_for_page_ready(driver, label="login.page_ready")
         
         # Check if login was successful (look for error messages or redirect)
         try:
@@ -162,6 +174,7 @@ def login(driver, captcha_text=None):
                 raise Exception(f"Login failed: {error_text}")
                 
             logger.info("Login successful")
+            save_session(driver, USERNAME)
             return "SUCCESS"
             
         except Exception as e:
@@ -177,6 +190,16 @@ def login(driver, captcha_text=None):
                 pass
         raise Exception(f"Login failed: {str(e)}")
 
+def has_stored_login():
+    """True when a stored portal session is available for jobs nobody can answer a CAPTCHA for"""
+    return bool(USERNAME) and load_session(USERNAME) is not None
+
+def restore_login(driver):
+    """Try to reuse the stored portal session instead of the CAPTCHA login"""
+    if not driver or not USERNAME:
+        return False
+    return restore_session(driver, USERNAME)
+
 # def main():
 #     try:
 #         print("\nWhich task would you like to perform?")
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+MANIFEST_DIR = os.getenv(
+    "RUN_MANIFEST_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bevco", "runs")
+)
+PENDING, OK, FAILED = "pending", "ok", "failed"
+
+def _key(target):
+    """Stable string key for a target (a name or a (district, warehouse) pair)"""
+    return json.dumps(target if isinstance(target, str) else list(target), ensure_ascii=False)
+
+def _target(value):
+    return value if isinstance(value, str) else tuple(value)
+
+class RunManifest:
+    """Per-target status of one scraping run, kept as an append-only JSONL file
+
+    The first line describes the run (module, date, download_dir); every
+    following line is the latest state of one target: status, attempts,
+    seconds and output file. Lines are fsync'd, so after a crash the file
+    tells exactly which targets are still pending or failed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.run = {}
+        self.targets = {}
+        self._lock = threading.Lock()
+        self._torn = False
+        self._load()
+
+    @classmethod
+    def for_job(cls, user_id, module, root=MANIFEST_DIR):
+        return cls(os.path.join(root, f"{user_id}_{module}.jsonl"))
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    self._torn = not line.endswith("\n")
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line of a crashed run
+                    if "run" in record:
+                        self.run = record["run"]
+                    else:
+                        self.targets[_key(record["target"])] = record
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding='utf-8') as f:
+            if self._torn:
+                f.write("\n")
+                self._torn = False
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def begin(self, **run):
+        """Start a new run, replacing the previous manifest of this job"""
+        with self._lock:
+            self.run = dict(run, started_at=time.time())
+            self.targets = {}
+            self._torn = False
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            partial = f"{self.path}.tmp"
+            with open(partial, "w", encoding='utf-8') as f:
+                f.write(json.dumps({"run": self.run}, ensure_ascii=False) + "\n")
+            os.replace(partial, self.path)
+
+    def add(self, targets):
+        """Register targets as pending unless the manifest already tracks them"""
+        with self._lock:
+            for target in targets:
+                key = _key(target)
+                if key in self.targets:
+                    continue
+                record = {"target": target, "status": PENDING, "attempts": 0, "seconds": 0.0, "output": None}
+                self.targets[key] = record
+                self._append(record)
+
+    def record(self, target, ok, seconds, output=None, error=None):
+        """Store the outcome of one attempt for target"""
+        with self._lock:
+            previous = self.targets.get(_key(target), {})
+            record = {
+                "target": target,
+                "status": OK if ok else FAILED,
+                "attempts": previous.get("attempts", 0) + 1,
+                "seconds": round(seconds, 3),
+                "output": output if ok else None,
+                "error": None if ok else error,
+                "at": time.time(),
+            }
+            self.targets[_key(target)] = record
+            self._append(record)
+
+    def track(self, target, work, output=None):
+        """Run work() for target, record its outcome and return it"""
+        started = time.monotonic()
+        try:
+            ok = bool(work())
+        except Exception as e:
+            self.record(target, False, time.monotonic() - started, error=str(e))
+            raise
+        self.record(target, ok, time.monotonic() - started, output=output)
+        return ok
+
+    def mark_delivered(self):
+        """Note that the run's files were sent, so their absence no longer matters"""
+        with self._lock:
+            self.run["delivered_at"] = time.time()
+            self._append({"run": self.run})
+
+    def _lost(self, record, download_dir):
+        output = record.get("output")
+        return bool(download_dir and output) and not os.path.exists(os.path.join(download_dir, output))
+
+    def unfinished(self):
+        """Targets still to do, in the order they were added
+
+        That is every pending or failed target, plus finished ones whose
+        output file disappeared before the run was delivered.
+        """
+        with self._lock:
+            download_dir = None if self.run.get("delivered_at") else self.run.get("download_dir")
+            return [
+                _target(record["target"]) for record in self.targets.values()
+                if record["status"] != OK or self._lost(record, download_dir)
+            ]
+
+    def counts(self):
+        with self._lock:
+            counts = {PENDING: 0, OK: 0, FAILED: 0}
+            for record in self.targets.values():
+                counts[record["status"]] += 1
+            return counts
+
+    def complete(self):
+        return bool(self.targets) and not self.unfinished()
+
+def tracked(manifest, target, work, output=None):
+    """manifest.track() that also works without a manifest"""
+    if manifest is None:
+        return work()
+    return manifest.track(target, work, output=output)
+
+def latest_unfinished(user_id, root=MANIFEST_DIR):
+    """The user's most recent manifest that still has pending or failed targets"""
+    try:
+        names = [name for name in os.listdir(root) if name.startswith(f"{user_id}_") and name.endswith(".jsonl")]
+    except FileNotFoundError:
+        return None
+    paths = sorted((os.path.join(root, name) for name in names), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        manifest = RunManifest(path)
+        if manifest.run and manifest.unfinished():
+            return manifest
+    return None
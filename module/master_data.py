@@ -0,0 +1,166 @@
+import os
+import pickle
+import logging
+import threading
+from collections import namedtuple
+from openpyxl import load_workbook
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEPOT_PATH = os.path.join(os.path.dirname(__file__), "Depot.xlsx")
+WAREHOUSE_PATH = os.path.join(os.path.dirname(__file__), "distict&warehouse.xlsx")
+SNAPSHOT_PATH = os.getenv(
+    "MASTER_DATA_SNAPSHOT",
+    os.path.join(os.path.expanduser("~"), ".cache", "bevco", "master_data.pickle")
+)
+SNAPSHOT_VERSION = 2
+
+MasterData = namedtuple("MasterData", ["depots", "warehouses", "entries", "districts"])
+MasterData.__doc__ = """Compiled master data
+
+depots: tuple of depot names (Depot.xlsx)
+warehouses: tuple of warehouse names (distict&warehouse.xlsx), with or without a district
+entries: tuple of (district, warehouse) pairs in sheet order, rows with both filled in
+districts: dict of district -> tuple of its warehouses
+"""
+
+def _signature(path):
+    """(mtime_ns, size) of a source file; changes whenever the file is edited"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Excel file not found: {path}")
+    return stat.st_mtime_ns, stat.st_size
+
+def _read_columns(path, *columns):
+    """Read the named columns of the first sheet as tuples, skipping rows blank in all of them
+
+    Blank cells come back as None; each consumer drops the rows missing the columns it uses.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise KeyError(f"{os.path.basename(path)} has no column(s) {', '.join(missing)}")
+        indexes = [header.index(column) for column in columns]
+        records = []
+        for row in rows:
+            values = tuple(
+                str(row[i]).strip() if i < len(row) and row[i] is not None else None
+                for i in indexes
+            )
+            if any(values):
+                records.append(values)
+        return records
+    finally:
+        workbook.close()
+
+def _compile(depot_path, warehouse_path):
+    depots = tuple(depot for (depot,) in _read_columns(depot_path, "Depot"))
+    rows = _read_columns(warehouse_path, "District", "Warehouse Name")
+    # Invoices only need the warehouse; inventory selects the district first
+    warehouses = tuple(warehouse for _, warehouse in rows if warehouse)
+    entries = tuple((district, warehouse) for district, warehouse in rows if district and warehouse)
+    districts = {}
+    for district, warehouse in entries:
+        districts.setdefault(district, []).append(warehouse)
+    return MasterData(
+        depots=depots,
+        warehouses=warehouses,
+        entries=entries,
+        districts={district: tuple(names) for district, names in districts.items()},
+    )
+
+class MasterDataRegistry:
+    """Loads Depot.xlsx and distict&warehouse.xlsx once per process
+
+    The compiled data is reused until either file's mtime/size changes. When
+    snapshot_path is set, it is also pickled there so a fresh process can skip
+    the openpyxl parse while the sources are unchanged.
+    """
+
+    def __init__(self, depot_path=DEPOT_PATH, warehouse_path=WAREHOUSE_PATH, snapshot_path=SNAPSHOT_PATH):
+        self.depot_path = depot_path
+        self.warehouse_path = warehouse_path
+        self.snapshot_path = snapshot_path
+        self._data = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _sources_signature(self):
+        return _signature(self.depot_path), _signature(self.warehouse_path)
+
+    def _read_snapshot(self, signature):
+        if not self.snapshot_path:
+            return None
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+            if snapshot.get("version") == SNAPSHOT_VERSION and snapshot.get("signature") == signature:
+                return MasterData(**snapshot["data"])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable master data snapshot: {e}")
+        return None
+
+    def _write_snapshot(self, signature, data):
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            partial = f"{self.snapshot_path}.tmp"
+            with open(partial, "wb") as f:
+                pickle.dump(
+                    {"version": SNAPSHOT_VERSION, "signature": signature, "data": data._asdict()},
+                    f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+            os.replace(partial, self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Could not write master data snapshot: {e}")
+
+    def get(self):
+        """Return the current MasterData, recompiling only if a source file changed"""
+        signature = self._sources_signature()
+        with self._lock:
+            if self._data is not None and self._signature == signature:
+                return self._data
+
+            data = self._read_snapshot(signature)
+            if data is not None:
+                logger.info("Loaded master data from snapshot")
+            else:
+                data = _compile(self.depot_path, self.warehouse_path)
+                self._write_snapshot(signature, data)
+                logger.info(
+                    f"Compiled master data: {len(data.depots)} depots, "
+                    f"{len(data.warehouses)} warehouses in {len(data.districts)} districts"
+                )
+            self._data, self._signature = data, signature
+            return data
+
+    def reload(self):
+        """Drop the cached data and snapshot, then recompile from the Excel files"""
+        with self._lock:
+            self._data = None
+            self._signature = None
+            if self.snapshot_path:
+                try:
+                    os.remove(self.snapshot_path)
+                except FileNotFoundError:
+                    pass
+        return self.get()
+
+REGISTRY = MasterDataRegistry()
+
+def master_data():
+    """Shared MasterData for the scrapers"""
+    return REGISTRY.get()
+
+def reload():
+    """Force the shared registry to re-read the Excel files"""
+    return REGISTRY.reload()
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+BREAKDOWN_FILENAME = "timings.json"
+
+class Histogram:
+    """Cumulative-bucket histogram of durations, as Prometheus expects them"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile (max for the overflow bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+_histograms = {}
+_counters = {}
+_lock = threading.Lock()
+_current_job = ContextVar("current_job", default=None)
+
+def current_job():
+    """The JobMetrics observations are attributed to right now, or None"""
+    return _current_job.get()
+
+def observe(phase, seconds):
+    """Record one duration of phase globally and in the current job, if any"""
+    with _lock:
+        _histograms.setdefault(phase, Histogram()).observe(seconds)
+    job = _current_job.get()
+    if job is not None:
+        job.observe(phase, seconds)
+
+@contextmanager
+def phase(name):
+    """Time the enclosed block as one observation of phase name"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe(name, time.monotonic() - started)
+
+def inc(name, amount=1, **labels):
+    """Increase a counter, e.g. inc("jobs_total", module="stock", status="ok")"""
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def _labels(pairs):
+    return ",".join(f'{key}="{str(value)}"' for key, value in pairs)
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = [
+        "# HELP bevco_phase_seconds Duration of each job phase",
+        "# TYPE bevco_phase_seconds histogram",
+    ]
+    with _lock:
+        histograms = sorted(_histograms.items())
+        counters = sorted(_counters.items())
+        for name, histogram in histograms:
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'bevco_phase_seconds_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'bevco_phase_seconds_bucket{{phase="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'bevco_phase_seconds_sum{{phase="{name}"}} {histogram.sum:.6f}')
+            lines.append(f'bevco_phase_seconds_count{{phase="{name}"}} {histogram.count}')
+
+    typed = set()
+    for (name, pairs), value in counters:
+        if name not in typed:
+            lines.append(f"# TYPE bevco_{name} counter")
+            typed.add(name)
+        lines.append(f"bevco_{name}{{{_labels(pairs)}}} {value}" if pairs else f"bevco_{name} {value}")
+    return "\n".join(lines) + "\n"
+
+def summary():
+    """Snapshot of {phase: (count, p50, p95, max)} for chat replies"""
+    with _lock:
+        return {
+            name: (histogram.count, histogram.quantile(0.5), histogram.quantile(0.95), histogram.max)
+            for name, histogram in sorted(_histograms.items())
+        }
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"metrics: {format % args}")
+
+def start_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics from a daemon thread; port 0 disables the endpoint"""
+    if not port:
+        return None
+    try:
+        server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    except OSError as e:
+        logger.error(f"❌ Metrics endpoint could not listen on {host}:{port}: {e}")
+        return None
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info(f"📈 Metrics available at http://{host}:{port}/metrics")
+    return server
+
+class JobMetrics:
+    """Per-phase durations of one job, written next to the job's output"""
+
+    def __init__(self, module):
+        self.module = module
+        self.started = time.time()
+        self.phases = {}
+        self._lock = threading.Lock()
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            entry = self.phases.setdefault(phase, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def breakdown(self, manifest=None):
+        """Phases sorted by total time, plus the slowest targets from the manifest"""
+        with self._lock:
+            phases = [
+                {"phase": name, "count": count, "total_s": round(total, 3), "max_s": round(longest, 3)}
+                for name, (count, total, longest) in sorted(self.phases.items(), key=lambda item: -item[1][1])
+            ]
+        report = {
+            "module": self.module,
+            "started_at": self.started,
+            "elapsed_s": round(time.time() - self.started, 3),
+            "phases": phases,
+        }
+        if manifest is not None:
+            report["targets"] = sorted(
+                (
+                    {key: record.get(key) for key in ("target", "status", "attempts", "seconds", "error")}
+                    for record in manifest.targets.values()
+                ),
+                key=lambda record: -(record["seconds"] or 0)
+            )
+        return report
+
+    def write(self, directory, manifest=None):
+        """Save the breakdown as timings.json in directory"""
+        path = os.path.join(directory, BREAKDOWN_FILENAME)
+        with open(path, "w", encoding='utf-8') as f:
+            json.dump(self.breakdown(manifest), f, indent=2, ensure_ascii=False)
+        return path
+
+@contextmanager
+def job_scope(job):
+    """Attribute observations made inside the block (and threads started from it) to job"""
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        _current_job.reset(token)
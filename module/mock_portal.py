@@ -0,0 +1,426 @@
+import json
+import time
+import zlib
+import base64
+import random
+import struct
+import logging
+import secrets
+import threading
+from datetime import date, timedelta
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+SESSION_COOKIE = "ASP.NET_SessionId"
+SELECT_TEXT = "--Select--"
+WAREHOUSES_PER_DISTRICT = 5
+
+# Control names as ASP.NET renders them; the element id is the name with "$" -> "_"
+MENU_BUTTON = "ctl00$ImageButton11"
+HOME_BUTTON = "ctl00$ImageButton_Home"
+INVOICE_LINK = "ctl00$ContentPlaceHolder1$TabContainer1$Tab_BI_Module$grid_crop_suppl$ctl10$link_crop_supplier"
+STOCK_LINK = "ctl00$ContentPlaceHolder1$TabContainer1$Tab_BI_Module$grid_crop_suppl$ctl09$link_crop_supplier"
+INVOICE_WAREHOUSE = "ctl00$ContentPlaceHolder1$ddl_Warehouse"
+INVOICE_DATE = "ctl00$ContentPlaceHolder1$ddl_date"
+INVOICE_GRID = "ctl00$ContentPlaceHolder1$Grid_req"
+INVOICE_SHOW = "ctl00$ContentPlaceHolder1$btn_Show"
+STOCK_DEPOT = "ctl00$ContentPlaceHolder1$ddl_warehouse_Name"
+STOCK_GRID = "ctl00$ContentPlaceHolder1$Grid_req"
+INVENTORY_DISTRICT = "ctl00$ContentPlaceHolder1$TabContainer1$tab_war$ddl_Excise_district"
+INVENTORY_WAREHOUSE = "ctl00$ContentPlaceHolder1$TabContainer1$tab_war$ddl_warehouse"
+INVENTORY_GRID = "ctl00$ContentPlaceHolder1$TabContainer1$tab_war$GridView1"
+INVENTORY_PDF = "ctl00$ContentPlaceHolder1$TabContainer1$tab_war$ImgButton_WarehousePdf"
+
+def _id(name):
+    return name.replace("$", "_")
+
+def _png(width=120, height=40):
+    """A small grayscale PNG with a stripe pattern, used for the CAPTCHA and buttons"""
+    raw = b"".join(
+        b"\x00" + bytes((x * 7 + y * 13) % 256 if (x // 8 + y // 8) % 2 else 230 for x in range(width))
+        for y in range(height)
+    )
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+def _pdf(title, size_kb):
+    """A minimal valid PDF padded to roughly size_kb"""
+    text = title.replace("(", "[").replace(")", "]")
+    stream = f"BT /F1 12 Tf 50 750 Td ({text}) Tj ET".encode("latin-1", "replace")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n" % (len(objects) + 1, xref)
+    padding = max(size_kb * 1024 - len(out) - 16, 0)
+    out += b"%" + b"0" * padding + b"\n%%EOF\n"
+    return bytes(out)
+
+class MockPortal:
+    """Local stand-in for the BEVCO portal, served over plain HTTP
+
+    Renders the pages the scrapers drive with the same element ids, full-page
+    ASP.NET postbacks (__VIEWSTATE, __EVENTTARGET, __doPostBack) and PDF
+    downloads. latency/jitter delay every page and download, failure_rate is
+    the share of postbacks answered with an HTTP 500.
+    """
+
+    def __init__(self, warehouses=20, latency=0.0, jitter=0.0, failure_rate=0.0,
+                 pdf_kb=40, days=7, captcha_answer=None, seed=None, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.pdf_kb = pdf_kb
+        self.captcha_answer = captcha_answer
+        self.host = host
+        self.port = port
+        self.random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+        self.warehouses = [f"Warehouse {n:03d}" for n in range(1, warehouses + 1)]
+        self.depots = [f"Depot {n:03d}" for n in range(1, warehouses + 1)]
+        self.entries = [
+            (f"District {index // WAREHOUSES_PER_DISTRICT + 1:02d}", warehouse)
+            for index, warehouse in enumerate(self.warehouses)
+        ]
+        self.districts = {}
+        for district, warehouse in self.entries:
+            self.districts.setdefault(district, []).append(warehouse)
+        today = date.today()
+        self.dates = [(today - timedelta(days=n)).strftime("%d/%m/%Y") for n in range(days)]
+
+        self.sessions = set()
+        self.counts = {"pages": 0, "postbacks": 0, "pdfs": 0, "failures": 0}
+        self._counts_lock = threading.Lock()
+        self._server = None
+        self._png = _png()
+
+    # --- lifecycle ---
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def login_url(self):
+        return f"{self.base_url}/Login.aspx"
+
+    def start(self):
+        """Start serving in a daemon thread; port 0 picks a free port"""
+        portal = self
+
+        class Handler(_PortalHandler):
+            pass
+        Handler.portal = portal
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="mock-portal", daemon=True).start()
+        logger.info(f"🧪 Mock portal with {len(self.warehouses)} warehouses at {self.login_url}")
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- behaviour knobs ---
+    def _count(self, key):
+        with self._counts_lock:
+            self.counts[key] += 1
+
+    def delay(self):
+        if self.latency or self.jitter:
+            with self._random_lock:
+                spread = self.random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(self.latency + spread, 0))
+
+    def should_fail(self):
+        if not self.failure_rate:
+            return False
+        with self._random_lock:
+            failed = self.random.random() < self.failure_rate
+        if failed:
+            self._count("failures")
+        return failed
+
+    # --- view state ---
+    @staticmethod
+    def encode_state(state):
+        payload = dict(state, nonce=secrets.token_hex(4))
+        return base64.b64encode(json.dumps(payload).encode()).decode()
+
+    @staticmethod
+    def decode_state(value):
+        try:
+            state = json.loads(base64.b64decode(value or ""))
+        except Exception:
+            return {"view": "home"}
+        state.pop("nonce", None)
+        return state
+
+    # --- rendering ---
+    def _page(self, state, body):
+        return f"""<!DOCTYPE html>
+<html><head><title>BEVCO</title></head>
+<body>
+<form method="post" action="./Home.aspx" id="form1">
+<input type="hidden" name="__EVENTTARGET" id="__EVENTTARGET" value="" />
+<input type="hidden" name="__EVENTARGUMENT" id="__EVENTARGUMENT" value="" />
+<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{self.encode_state(state)}" />
+<input type="hidden" name="__EVENTVALIDATION" id="__EVENTVALIDATION" value="mock" />
+<script type="text/javascript">
+function __doPostBack(eventTarget, eventArgument) {{
+    var form = document.forms['form1'];
+    form.__EVENTTARGET.value = eventTarget;
+    form.__EVENTARGUMENT.value = eventArgument;
+    form.submit();
+}}
+</script>
+<div>
+<input type="image" name="{MENU_BUTTON}" id="{_id(MENU_BUTTON)}" src="/img/menu.png" style="width:40px;height:40px" />
+<input type="image" name="{HOME_BUTTON}" id="{_id(HOME_BUTTON)}" src="/img/home.png" style="width:40px;height:40px" />
+</div>
+{body}
+</form>
+</body></html>"""
+
+    @staticmethod
+    def _select(name, options, selected=None, placeholder=True):
+        items = [f'<option value="0">{SELECT_TEXT}</option>'] if placeholder else []
+        for option in options:
+            mark = ' selected="selected"' if option == selected else ""
+            items.append(f'<option value="{escape(option)}"{mark}>{escape(option)}</option>')
+        onchange = f"javascript:setTimeout('__doPostBack(\\'{name}\\',\\'\\')', 0)"
+        return f'<select name="{name}" id="{_id(name)}" onchange="{onchange}">{"".join(items)}</select>'
+
+    @staticmethod
+    def _grid(name, header, rows):
+        cells = "".join(f"<th>{escape(str(cell))}</th>" for cell in header)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in row) + "</tr>"
+            for row in rows
+        )
+        return f'<table id="{_id(name)}" border="1"><tr>{cells}</tr>{body}</table>'
+
+    def _rows(self, key, count, build):
+        generator = random.Random(key)
+        return [build(generator, index) for index in range(count)]
+
+    def render_login(self, error=None):
+        message = f'<span class="error">{escape(error)}</span>' if error else ""
+        return f"""<!DOCTYPE html>
+<html><head><title>BEVCO Login</title></head>
+<body>
+<form method="post" action="./Login.aspx" id="form1">
+<span id="Label1">Login</span>
+{message}
+<img id="Image1" src="/captcha.png" alt="captcha" />
+<input type="text" name="txt_username" id="txt_username" />
+<input type="password" name="txt_password" id="txt_password" />
+<input type="text" name="CodeNumberTextBox" id="CodeNumberTextBox" />
+<input type="image" name="ImageButton1" id="ImageButton1" src="/img/login.png" style="width:80px;height:30px" />
+</form>
+</body></html>"""
+
+    def render(self, state):
+        view = state.get("view", "home")
+        if view == "menu":
+            body = (
+                f'<a id="{_id(INVOICE_LINK)}" href="javascript:__doPostBack(\'{INVOICE_LINK}\',\'\')">Invoice</a> '
+                f'<a id="{_id(STOCK_LINK)}" href="javascript:__doPostBack(\'{STOCK_LINK}\',\'\')">Stock</a>'
+            )
+        elif view == "invoice":
+            warehouse, day = state.get("warehouse"), state.get("date")
+            rows = []
+            if warehouse and day:
+                rows = self._rows(f"invoice|{warehouse}|{day}", 5, lambda g, i: (
+                    f"INV{g.randint(10000, 99999)}", day, g.randint(1, 500), f"{g.uniform(1000, 90000):,.2f}"
+                ))
+            body = (
+                self._select(INVOICE_WAREHOUSE, self.warehouses, warehouse)
+                + self._select(INVOICE_DATE, self.dates if warehouse else [], day)
+                + self._grid(INVOICE_GRID, ["Invoice No", "Date", "Cases", "Amount"], rows)
+                + f'<input type="submit" name="{INVOICE_SHOW}" id="{_id(INVOICE_SHOW)}" value="Show" />'
+            )
+        elif view == "stock":
+            depot = state.get("depot")
+            rows = []
+            if depot:
+                rows = self._rows(f"stock|{depot}", 30, lambda g, i: (
+                    f"Brand {i}", "750 ML", f"B{g.randint(10000, 99999)}", g.randint(0, 900),
+                    g.randint(0, 300), g.randint(0, 300), g.randint(0, 900), f"{g.uniform(100, 90000):,.2f}"
+                ))
+            body = (
+                self._select(STOCK_DEPOT, self.depots, depot)
+                + self._grid(STOCK_GRID, ["Brand", "Size", "Batch", "Opening", "Received", "Issued", "Closing", "Value"], rows)
+            )
+        else:
+            district, warehouse = state.get("district"), state.get("inv_warehouse")
+            rows = []
+            if warehouse:
+                rows = self._rows(f"inventory|{warehouse}", 10, lambda g, i: (
+                    f"Brand {i}", g.randint(0, 900), g.randint(0, 900)
+                ))
+            body = (
+                self._select(INVENTORY_DISTRICT, list(self.districts), district)
+                + self._select(INVENTORY_WAREHOUSE, self.districts.get(district, []), warehouse)
+                + self._grid(INVENTORY_GRID, ["Brand", "Cases", "Bottles"], rows)
+                + f'<input type="image" name="{INVENTORY_PDF}" id="{_id(INVENTORY_PDF)}" '
+                  f'src="/img/pdf.png" style="width:40px;height:40px" />'
+            )
+        return self._page(state, body)
+
+    # --- postbacks ---
+    def postback(self, fields):
+        """Apply one form submission; returns ("html", text) or ("pdf", (filename, bytes))"""
+        state = self.decode_state(fields.get("__VIEWSTATE"))
+        target = fields.get("__EVENTTARGET", "")
+        view = state.get("view", "home")
+
+        if f"{MENU_BUTTON}.x" in fields:
+            return "html", {"view": "menu"}
+        if f"{HOME_BUTTON}.x" in fields:
+            return "html", {"view": "home"}
+        if view == "menu" and target == INVOICE_LINK:
+            return "html", {"view": "invoice"}
+        if view == "menu" and target == STOCK_LINK:
+            return "html", {"view": "stock"}
+
+        if view == "invoice":
+            if INVOICE_SHOW in fields:
+                warehouse, day = fields.get(INVOICE_WAREHOUSE), fields.get(INVOICE_DATE)
+                if warehouse in self.warehouses and day in self.dates:
+                    return "pdf", ("BEVCO_Invoice.pdf", _pdf(f"Invoice {warehouse} {day}", self.pdf_kb))
+            elif target == INVOICE_WAREHOUSE:
+                state["warehouse"] = fields.get(INVOICE_WAREHOUSE)
+                state.pop("date", None)
+            elif target == INVOICE_DATE:
+                state["warehouse"] = fields.get(INVOICE_WAREHOUSE, state.get("warehouse"))
+                state["date"] = fields.get(INVOICE_DATE)
+        elif view == "stock":
+            if target == STOCK_DEPOT:
+                state["depot"] = fields.get(STOCK_DEPOT)
+        else:
+            if f"{INVENTORY_PDF}.x" in fields:
+                warehouse = fields.get(INVENTORY_WAREHOUSE)
+                if warehouse in self.warehouses:
+                    return "pdf", ("WBSBCL_Inventory.pdf", _pdf(f"Inventory {warehouse}", self.pdf_kb))
+            elif target == INVENTORY_DISTRICT:
+                state["district"] = fields.get(INVENTORY_DISTRICT)
+                state.pop("inv_warehouse", None)
+            elif target == INVENTORY_WAREHOUSE:
+                state["district"] = fields.get(INVENTORY_DISTRICT, state.get("district"))
+                state["inv_warehouse"] = fields.get(INVENTORY_WAREHOUSE)
+        return "html", state
+
+class _PortalHandler(BaseHTTPRequestHandler):
+    portal = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"mock portal: {format % args}")
+
+    def _session(self):
+        for part in self.headers.get("Cookie", "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == SESSION_COOKIE and value in self.portal.sessions:
+                return value
+        return None
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _redirect(self, location, headers=None):
+        self._send(302, b"", headers=dict(headers or {}, Location=location))
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        portal = self.portal
+        if path == "/favicon.ico":
+            return self._send(204)
+        if path == "/captcha.png" or path.startswith("/img/"):
+            return self._send(200, portal._png, "image/png")
+        portal.delay()
+        portal._count("pages")
+        if path in ("/", "/Login.aspx"):
+            return self._send(200, portal.render_login())
+        if path == "/Home.aspx":
+            if not self._session():
+                return self._redirect("/Login.aspx")
+            return self._send(200, portal.render({"view": "home"}))
+        self._send(404, "Not found")
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        portal = self.portal
+        length = int(self.headers.get("Content-Length", "0"))
+        fields = dict(parse_qsl(self.rfile.read(length).decode("utf-8"), keep_blank_values=True))
+        portal.delay()
+
+        if path == "/Login.aspx":
+            captcha = fields.get("CodeNumberTextBox", "")
+            valid = fields.get("txt_username") and fields.get("txt_password") and captcha
+            if portal.captcha_answer is not None:
+                valid = valid and captcha == portal.captcha_answer
+            if not valid:
+                return self._send(200, portal.render_login("Invalid user name, password or code"))
+            session = secrets.token_hex(12)
+            portal.sessions.add(session)
+            return self._redirect("/Home.aspx", {"Set-Cookie": f"{SESSION_COOKIE}={session}; Path=/; HttpOnly"})
+
+        if path != "/Home.aspx":
+            return self._send(404, "Not found")
+        if not self._session():
+            return self._redirect("/Login.aspx")
+        if portal.should_fail():
+            return self._send(500, "<html><body><h1>Server Error in '/' Application.</h1></body></html>")
+
+        kind, result = portal.postback(fields)
+        if kind == "pdf":
+            portal._count("pdfs")
+            filename, data = result
+            return self._send(200, data, "application/pdf", {
+                "Content-Disposition": f'attachment; filename="{filename}"'
+            })
+        portal._count("postbacks")
+        self._send(200, portal.render(result))
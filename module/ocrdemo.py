@@ -4,6 +4,7 @@ import os
 import cv2
 import numpy as np
 import time
+from io import BytesIO
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
@@ -15,11 +16,26 @@ from webdriver_manager.chrome import ChromeDriverManager
 
 pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
+def _load_grayscale(source):
+    """Decode a CAPTCHA from a file path or an in-memory PNG (bytes/BytesIO)"""
+    if isinstance(source, str):
+        return cv2.imread(source, cv2.IMREAD_GRAYSCALE)
+    data = source.getvalue() if hasattr(source, "getvalue") else bytes(source)
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+
+def _open_image(source):
+    """Open a path or in-memory PNG with PIL"""
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    elif hasattr(source, "seek"):
+        source.seek(0)
+    return Image.open(source)
+
 def preprocess_image(path):
     """Enhanced image preprocessing for better OCR results"""
     try:
         # Open image and convert to numpy array for OpenCV processing
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        img = _load_grayscale(path)
         
         # Apply adaptive thresholding
         img = cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
@@ -45,7 +61,7 @@ def preprocess_image(path):
         return img
     except Exception as e:
         print(f"Error during image preprocessing: {e}")
-        return Image.open(path).convert("L")  # Fallback to simple conversion
+        return _open_image(path).convert("L")  # Fallback to simple conversion
 
 def solve_captcha_image(path="captcha.png", max_attempts=3):
     """Improved CAPTCHA solving with multiple attempts and validation"""
@@ -81,7 +97,7 @@ def solve_captcha_image(path="captcha.png", max_attempts=3):
             # If not valid, try different preprocessing
             if attempt == 1:
                 print("⚠ Trying alternative preprocessing...")
-                img = Image.open(path).convert("L")
+                img = _open_image(path).convert("L")
                 img = ImageOps.invert(img)
                 img = img.filter(ImageFilter.MedianFilter(size=3))
                 
@@ -94,16 +110,11 @@ def solve_captcha_image(path="captcha.png", max_attempts=3):
 def solve_captcha(driver, element_id="Image1"):
     """Screenshot and solve CAPTCHA from web element"""
     try:
-        # Ensure directory exists
-        os.makedirs("captchas", exist_ok=True)
-        timestamp = int(time.time())
-        path = f"captchas/captcha_{timestamp}.png"
-        
-        # Take screenshot of CAPTCHA element
-        driver.find_element(By.ID, element_id).screenshot(path)
+        # Take screenshot of CAPTCHA element straight into memory
+        image = BytesIO(driver.find_element(By.ID, element_id).screenshot_as_png)
         
         # Solve CAPTCHA
-        return solve_captcha_image(path)
+        return solve_captcha_image(image)
     except Exception as e:
         print(f"Error solving CAPTCHA: {str(e)}")
         return ""
\ No newline at end of file
@@ -0,0 +1,185 @@
+import os
+import time
+import queue
+import logging
+import tempfile
+import threading
+from .metrics import phase
+from .lean import enable_lean, disable_lean
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+POOL_HEADLESS = os.getenv("BROWSER_POOL_HEADLESS", "1") == "1"
+MAX_LEASES_PER_DRIVER = int(os.getenv("BROWSER_MAX_LEASES", "20"))
+IDLE_DOWNLOAD_DIR = os.path.join(tempfile.gettempdir(), "bevco_pool_idle")
+
+def set_download_dir(driver, download_dir):
+    """Point an already running browser at a new download directory via CDP"""
+    driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+        "behavior": "allow",
+        "downloadPath": download_dir
+    })
+
+def is_healthy(driver):
+    """Check that the browser process still answers WebDriver commands"""
+    try:
+        driver.execute_script("return 1")
+        return len(driver.window_handles) > 0
+    except Exception:
+        return False
+
+def reset_driver(driver):
+    """Return a leased browser to a clean state before handing it out again"""
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+    driver.delete_all_cookies()
+    driver.get("about:blank")
+    disable_lean(driver)
+    set_download_dir(driver, IDLE_DOWNLOAD_DIR)
+
+class DriverPool:
+    """Keeps a number of pre-launched Chrome drivers warm and leases one per job"""
+
+    def __init__(self, size=POOL_SIZE, headless=POOL_HEADLESS, max_leases=MAX_LEASES_PER_DRIVER):
+        self.size = size
+        self.headless = headless
+        self.max_leases = max_leases
+        self._idle = queue.Queue()
+        self._leases = {}
+        # Drivers currently out on lease; release() ignores any other
+        self._leased = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._refilling = 0
+
+    def _launch(self):
+        os.makedirs(IDLE_DOWNLOAD_DIR, exist_ok=True)
+        started = time.monotonic()
+        from .login import setup_browser  # selenium loads with the first browser, not with the bot
+        with phase("browser_start"):
+            driver = setup_browser(IDLE_DOWNLOAD_DIR, headless=self.headless)
+        if driver:
+            logger.info(f"Warm browser launched in {time.monotonic() - started:.1f}s")
+        return driver
+
+    def _refill(self):
+        try:
+            driver = self._launch()
+            if not driver:
+                return
+            with self._lock:
+                keep = not self._closed and self._idle.qsize() < self.size
+            if keep:
+                self._leases[id(driver)] = 0
+                self._idle.put(driver)
+            else:
+                driver.quit()
+        finally:
+            with self._lock:
+                self._refilling -= 1
+
+    def _schedule_refill(self):
+        with self._lock:
+            if self._closed:
+                return
+            missing = self.size - self._idle.qsize() - self._refilling
+            self._refilling += max(missing, 0)
+        for _ in range(max(missing, 0)):
+            threading.Thread(target=self._refill, name="driver-pool-refill", daemon=True).start()
+
+    def start(self):
+        """Launch the warm browsers in the background"""
+        logger.info(f"Starting browser pool with {self.size} warm driver(s)")
+        self._schedule_refill()
+
+    def acquire(self, download_dir, lean=False):
+        """Lease a browser whose downloads go to download_dir, optionally in lean mode"""
+        if not os.path.isdir(download_dir):
+            raise ValueError("Download directory does not exist.")
+
+        driver = None
+        while driver is None:
+            try:
+                candidate = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if is_healthy(candidate):
+                driver = candidate
+            else:
+                logger.warning("Discarding unhealthy warm browser")
+                self._discard(candidate)
+
+        self._schedule_refill()
+
+        if driver is None:
+            logger.info("No warm browser available, launching a cold one")
+            from .login import setup_browser
+            with phase("browser_start"):
+                driver = setup_browser(download_dir, headless=self.headless, lean=lean)
+            if not driver:
+                return None
+            self._leases[id(driver)] = 0
+
+        try:
+            set_download_dir(driver, download_dir)
+            if lean:
+                enable_lean(driver)
+        except Exception as e:
+            logger.error(f"Failed to prepare leased browser: {e}")
+            self._discard(driver)
+            return None
+
+        self._leases[id(driver)] = self._leases.get(id(driver), 0) + 1
+        with self._lock:
+            self._leased.add(driver)
+        return driver
+
+    def release(self, driver):
+        """Health-check a returned browser and recycle it into the pool"""
+        if not driver:
+            return
+        with self._lock:
+            if driver not in self._leased:
+                # A repeated release: the browser may already be idle or leased to another job
+                logger.warning("Ignoring release of a browser that is not leased")
+                return
+            self._leased.discard(driver)
+            closed = self._closed
+            full = self._idle.qsize() >= self.size
+        worn_out = self._leases.get(id(driver), 0) >= self.max_leases
+
+        if closed or full or worn_out or not is_healthy(driver):
+            self._discard(driver)
+        else:
+            try:
+                reset_driver(driver)
+                self._idle.put(driver)
+                logger.info("Browser returned to pool")
+            except Exception as e:
+                logger.warning(f"Failed to reset browser, recycling it: {e}")
+                self._discard(driver)
+        self._schedule_refill()
+
+    def _discard(self, driver):
+        self._leases.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.error(f"Error closing browser driver: {e}")
+
+    def shutdown(self):
+        """Quit every idle browser and stop refilling"""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        logger.info("Browser pool shut down")
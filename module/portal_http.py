@@ -0,0 +1,172 @@
+import os
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+from requests.adapters import HTTPAdapter
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+REQUEST_TIMEOUT = 30
+PDF_ENGINE = os.getenv("PDF_ENGINE", "browser")
+
+class NoDocumentError(RuntimeError):
+    """The portal answered a download postback with a page instead of a document"""
+
+def session_from_driver(driver, pool_size=4):
+    """Build a keep-alive requests.Session that carries the browser's cookies"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+    for cookie in driver.get_cookies():
+        session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"), path=cookie.get("path", "/"))
+    return session
+
+class WebForm:
+    """State of an ASP.NET WebForms page that can be replayed over plain HTTP
+
+    Keeps __VIEWSTATE, __EVENTVALIDATION and the other form fields from the
+    last response so each postback carries them forward.
+    """
+
+    def __init__(self, session, url, page_html):
+        self.session = session
+        self.url = url
+        self._load(page_html)
+
+    def _load(self, page_html):
+        self.document = lxml_html.fromstring(page_html)
+        form = self.document.forms[0]
+        self.action = urljoin(self.url, form.action or self.url)
+        self.fields = dict(form.form_values())
+
+    def element(self, element_id):
+        """Return the element with the given id from the last response"""
+        found = self.document.get_element_by_id(element_id, None)
+        if found is None:
+            raise LookupError(f"Element not found in response: {element_id}")
+        return found
+
+    def option_value(self, select_id, visible_text):
+        """Map a dropdown's visible text to its submitted value"""
+        select = self.element(select_id)
+        for option in select.iter("option"):
+            if option.text_content().strip() == visible_text.strip():
+                return select.get("name"), option.get("value", option.text_content())
+        raise LookupError(f"Option '{visible_text}' not found in {select_id}")
+
+    def postback(self, event_target, extra=None, argument=""):
+        """Submit the form as __doPostBack(event_target, argument) would"""
+        data = dict(self.fields)
+        data.update(extra or {})
+        data["__EVENTTARGET"] = event_target
+        data["__EVENTARGUMENT"] = argument
+        response = self.session.post(self.action, data=data, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        self.url = response.url
+        self._load(response.text)
+        if "__VIEWSTATE" not in self.fields:
+            raise RuntimeError("Postback response has no __VIEWSTATE; the session has probably expired")
+        return response
+
+    def select(self, select_id, visible_text):
+        """Choose a dropdown option and replay its AutoPostBack"""
+        name, value = self.option_value(select_id, visible_text)
+        return self.postback(name, {name: value})
+
+    def table_html(self, table_id):
+        """Serialized HTML of a table from the last response"""
+        return lxml_html.tostring(self.element(table_id), encoding="unicode")
+
+def form_from_driver(driver, session=None):
+    """Start an HTTP replay from the page currently open in the browser"""
+    session = session or session_from_driver(driver)
+    return WebForm(session, driver.current_url, driver.page_source)
+
+_FORM_SCRIPT = """
+const button = document.getElementById(arguments[0]);
+const form = button.form || document.forms[0];
+const fields = [];
+for (const el of form.elements) {
+    if (!el.name || el.disabled) continue;
+    const type = (el.type || '').toLowerCase();
+    if (['submit', 'image', 'button', 'reset', 'file'].includes(type)) continue;
+    if ((type === 'checkbox' || type === 'radio') && !el.checked) continue;
+    if (el.tagName === 'SELECT') {
+        for (const opt of el.options) { if (opt.selected) fields.push([el.name, opt.value]); }
+        continue;
+    }
+    fields.push([el.name, el.value]);
+}
+if (button.type === 'image') {
+    fields.push([button.name + '.x', '1'], [button.name + '.y', '1']);
+} else if (button.name) {
+    fields.push([button.name, button.value || '']);
+}
+return [form.action || document.location.href, fields];
+"""
+
+def capture_postback(driver, button_id):
+    """Serialize the form a click on button_id would submit: (action_url, fields)"""
+    action, fields = driver.execute_script(_FORM_SCRIPT, button_id)
+    fields = [(name, value) for name, value in fields if name not in ("__EVENTTARGET", "__EVENTARGUMENT")]
+    fields += [("__EVENTTARGET", ""), ("__EVENTARGUMENT", "")]
+    return urljoin(driver.current_url, action), fields
+
+class PdfDownloader:
+    """Reissues PDF postbacks over a pooled requests.Session and streams them to disk
+
+    The browser only prepares the form (warehouse, date, ...); the postback
+    that would have triggered Chrome's download is replayed in a worker
+    thread, so the browser moves on while several PDFs download at once.
+    """
+
+    def __init__(self, driver, max_workers=4):
+        self.session = session_from_driver(driver, pool_size=max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pdf-download")
+        self._jobs = []
+        self._lock = threading.Lock()
+
+    def submit(self, driver, button_id, dest_path, label=None):
+        """Capture the postback of button_id from driver and download it to dest_path"""
+        action, fields = capture_postback(driver, button_id)
+        future = self.executor.submit(self._fetch, action, fields, dest_path)
+        with self._lock:
+            self._jobs.append((label or os.path.basename(dest_path), future))
+        return future
+
+    def _fetch(self, action, fields, dest_path):
+        with self.session.post(action, data=fields, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("Content-Type", "")
+            if "html" in content_type:
+                raise NoDocumentError(f"Expected a PDF but the portal returned {content_type}")
+            partial = f"{dest_path}.part"
+            with open(partial, "wb") as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    f.write(chunk)
+            os.replace(partial, dest_path)
+        logger.info(f"Downloaded {os.path.basename(dest_path)}")
+        return dest_path
+
+    def finish(self):
+        """Wait for every download; returns [(label, error or None)]"""
+        results = []
+        with self._lock:
+            jobs, self._jobs = self._jobs, []
+        for label, future in jobs:
+            try:
+                future.result()
+                results.append((label, None))
+            except Exception as e:
+                logger.error(f"❌ Download failed for {label}: {e}")
+                results.append((label, e))
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        return results
@@ -0,0 +1,177 @@
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime, timedelta
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+PREBUILD_SCHEDULE = os.getenv("PREBUILD_SCHEDULE", "")
+PREBUILD_DIR = os.getenv(
+    "PREBUILD_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "bevco", "prebuilt")
+)
+PREBUILD_MAX_AGE_MIN = int(os.getenv("PREBUILD_MAX_AGE_MIN", "180"))
+PREBUILT_MODULES = ("stock", "inventory")
+FORCE_WORDS = ("fresh", "force")
+
+def _field(spec, low, high):
+    """Values of one cron field: *, n, a-b, lists and /step"""
+    values = set()
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/", 1)
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = map(int, part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if step < 1 or start < low or end > high or start > end:
+            raise ValueError(f"'{spec}' is outside {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+class CronSchedule:
+    """A five-field cron expression: minute hour day-of-month month day-of-week"""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Expected 5 fields in '{expression}'")
+        self.expression = expression
+        self.minutes = sorted(_field(fields[0], 0, 59))
+        self.hours = sorted(_field(fields[1], 0, 23))
+        self.days = _field(fields[2], 1, 31)
+        self.months = _field(fields[3], 1, 12)
+        # 0 and 7 are both Sunday
+        self.weekdays = {day % 7 for day in _field(fields[4], 0, 7)}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, day):
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = day.isoweekday() % 7 in self.weekdays
+        # Like cron: when both day fields are restricted, either one may match
+        if not self.any_day and not self.any_weekday:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, moment):
+        """First time strictly after moment (to the minute) that the expression fires"""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 28):
+            if self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"'{self.expression}' never fires")
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+def parse_schedule(text=PREBUILD_SCHEDULE):
+    """Parse "stock=0 7 * * *; inventory=30 7 * * 1-6" into {module: CronSchedule}"""
+    schedule = {}
+    for entry in text.split(";"):
+        if not entry.strip():
+            continue
+        module, _, expression = entry.partition("=")
+        module = module.strip()
+        if module not in PREBUILT_MODULES:
+            logger.warning(f"⚠️ Ignoring pre-build schedule for unknown module '{module}'")
+            continue
+        try:
+            schedule[module] = CronSchedule(expression)
+        except ValueError as e:
+            logger.error(f"❌ Invalid pre-build schedule for {module}: {e}")
+    return schedule
+
+def next_due(schedule, now=None):
+    """(when, [modules]) of the next scheduled pre-builds, or None without a schedule"""
+    if not schedule:
+        return None
+    now = now or datetime.now()
+    runs = {module: cron.next_after(now) for module, cron in schedule.items()}
+    when = min(runs.values())
+    return when, [module for module, at in runs.items() if at == when]
+
+def wants_fresh(args):
+    """True when a command's arguments ask to skip the pre-built report"""
+    return any(arg.lower() in FORCE_WORDS for arg in args or ())
+
+class PrebuiltReports:
+    """The latest zipped report of each module, reused while it is fresh
+
+    <module>.zip sits next to <module>.json holding when it was built; a report
+    is fresh while it is younger than max_age seconds and from today, as the
+    stock and inventory reports describe the current day.
+    """
+
+    def __init__(self, root=PREBUILD_DIR, max_age=PREBUILD_MAX_AGE_MIN * 60):
+        self.root = root
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    def _paths(self, module):
+        base = os.path.join(self.root, module)
+        return f"{base}.zip", f"{base}.json"
+
+    def fresh(self, module, now=None):
+        """(zip path, metadata) of a fresh report, or None"""
+        if self.max_age <= 0:
+            return None
+        zip_path, meta_path = self._paths(module)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable pre-built report metadata for {module}: {e}")
+            return None
+        now = now or time.time()
+        built_at = meta.get("built_at", 0)
+        if now - built_at > self.max_age:
+            return None
+        if datetime.fromtimestamp(built_at).date() != datetime.fromtimestamp(now).date():
+            return None
+        if not os.path.exists(zip_path):
+            return None
+        return zip_path, meta
+
+    def store(self, module, archive, **meta):
+        """Keep a copy of a finished archive (a path or a binary file) as the module's reusable report"""
+        if self.max_age <= 0:
+            return None
+        os.makedirs(self.root, exist_ok=True)
+        target, meta_path = self._paths(module)
+        meta.setdefault("built_at", time.time())
+        with self._lock:
+            if isinstance(archive, (str, os.PathLike)):
+                shutil.copyfile(archive, f"{target}.part")
+            else:
+                archive.seek(0)
+                with open(f"{target}.part", "wb") as f:
+                    shutil.copyfileobj(archive, f)
+            os.replace(f"{target}.part", target)
+            with open(f"{meta_path}.part", "w", encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(f"{meta_path}.part", meta_path)
+        logger.info(f"📦 Stored reusable {module} report")
+        return target
+
+PREBUILT = PrebuiltReports()
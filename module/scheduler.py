@@ -0,0 +1,204 @@
+import os
+import math
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import functools
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+MAX_BROWSER_JOBS = int(os.getenv("MAX_BROWSER_JOBS", os.getenv("BROWSER_POOL_SIZE", "2")))
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", "2"))
+DEFAULT_JOB_SECONDS = float(os.getenv("DEFAULT_JOB_SECONDS", "180"))
+PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND = 0, 10
+
+class _Waiter:
+    def __init__(self, user_id, future, on_position):
+        self.user_id = user_id
+        self.future = future
+        self.on_position = on_position
+        self.last_position = None
+
+class JobScheduler:
+    """Admits at most max_jobs browser jobs at a time, one per user, in priority/FIFO order
+
+    Jobs that cannot start wait in a queue; on_position(position, eta_seconds)
+    is awaited whenever a waiting job's place in the queue changes. Blocking
+    work runs on dedicated executors: run_browser() for WebDriver calls and
+    run_cpu() for zipping and parsing, so neither starves the other. A job
+    that is done with Chrome but still running (the HTTP stock engine) can
+    detach() to hand its slot to the next job.
+    """
+
+    def __init__(self, max_jobs=MAX_BROWSER_JOBS, cpu_workers=CPU_WORKERS):
+        self.max_jobs = max_jobs
+        # Detached jobs keep their thread, so up to max_jobs more can run alongside the active ones
+        self.browser_executor = ThreadPoolExecutor(max_workers=2 * max_jobs + 1, thread_name_prefix="browser-job")
+        self.cpu_executor = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="cpu-job")
+        self._active = {}
+        self._detached = {}
+        self._queue = []
+        self._sequence = itertools.count()
+        self._average_seconds = DEFAULT_JOB_SECONDS
+
+    # --- queue ---
+    def busy(self, user_id):
+        """True while the user has a running or queued job"""
+        return user_id in self._active or user_id in self._detached or any(waiter.user_id == user_id for _, _, waiter in self._queue)
+
+    def _waiting(self):
+        return [waiter for _, _, waiter in sorted(self._queue) if not waiter.future.done()]
+
+    def eta(self, position):
+        """Rough seconds until the job at queue position (1-based) starts"""
+        return math.ceil(position / self.max_jobs) * self._average_seconds
+
+    async def acquire(self, user_id, priority=PRIORITY_INTERACTIVE, on_position=None):
+        """Wait until the user's job may start; returns the queue position it started from (0 = none)"""
+        if self.busy(user_id):
+            raise RuntimeError("This user already has a job running or queued")
+        if len(self._active) < self.max_jobs and not self._queue:
+            self._active[user_id] = time.monotonic()
+            return 0
+
+        waiter = _Waiter(user_id, asyncio.get_running_loop().create_future(), on_position)
+        heapq.heappush(self._queue, (priority, next(self._sequence), waiter))
+        position = self._waiting().index(waiter) + 1
+        logger.info(f"User {user_id} queued at position {position}")
+        await self._notify()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(user_id)
+            raise
+        return position
+
+    def _remove(self, waiter):
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+
+    def release(self, user_id):
+        """End the user's job and let the next queued jobs start"""
+        started = self._active.pop(user_id, None)
+        if started is None:
+            started = self._detached.pop(user_id, None)
+        if started is None:
+            return
+        # Exponential moving average of job durations for the ETA
+        self._average_seconds = 0.7 * self._average_seconds + 0.3 * (time.monotonic() - started)
+        self._admit()
+
+    def detach(self, user_id):
+        """Give up the user's browser slot while the job finishes without Chrome
+
+        The user stays busy until release(). Returns False, keeping the slot,
+        when max_jobs jobs are already detached.
+        """
+        if user_id not in self._active or len(self._detached) >= self.max_jobs:
+            return False
+        self._detached[user_id] = self._active.pop(user_id)
+        logger.info(f"User {user_id} no longer needs a browser, freeing the slot")
+        self._admit()
+        return True
+
+    def _admit(self):
+        """Start queued jobs while there are free slots"""
+        while self._queue and len(self._active) < self.max_jobs:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                continue
+            self._active[waiter.user_id] = time.monotonic()
+            waiter.future.set_result(True)
+        if self._queue:
+            asyncio.get_running_loop().create_task(self._notify())
+
+    async def _notify(self):
+        for position, waiter in enumerate(self._waiting(), start=1):
+            if waiter.on_position is None or waiter.last_position == position:
+                continue
+            waiter.last_position = position
+            try:
+                await waiter.on_position(position, self.eta(position))
+            except Exception as e:
+                logger.warning(f"Could not report queue position to user {waiter.user_id}: {e}")
+
+    def stats(self):
+        return {"active": len(self._active), "detached": len(self._detached), "queued": len(self._waiting()), "average_job_s": round(self._average_seconds, 1)}
+
+    # --- executors ---
+    async def _run(self, executor, fn, *args, **kwargs):
+        # Like asyncio.to_thread: the call sees the caller's context variables (e.g. job metrics)
+        context = contextvars.copy_context()
+        call = functools.partial(context.run, fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+    async def run_browser(self, fn, *args, **kwargs):
+        """Run a blocking WebDriver call on the browser executor"""
+        return await self._run(self.browser_executor, fn, *args, **kwargs)
+
+    async def run_cpu(self, fn, *args, **kwargs):
+        """Run blocking CPU or disk work (zip, parse) on the CPU executor"""
+        return await self._run(self.cpu_executor, fn, *args, **kwargs)
+
+    def shutdown(self):
+        for _, _, waiter in self._queue:
+            if not waiter.future.done():
+                waiter.future.cancel()
+        self._queue.clear()
+        self.browser_executor.shutdown(wait=False, cancel_futures=True)
+        self.cpu_executor.shutdown(wait=False, cancel_futures=True)
+
+class Flight:
+    """One running job that identical later requests attach to"""
+
+    def __init__(self, key, leader):
+        self.key = key
+        self.leader = leader
+        self.followers = {}
+
+class JobCoalescer:
+    """Single-flight: identical concurrent jobs run once and share the result
+
+    Jobs are keyed by (module, date, targets); lead() registers the running
+    one, attach() adds a requester to it and finish() ends it, handing back
+    everyone who is waiting for its result.
+    """
+
+    def __init__(self):
+        self._flights = {}
+
+    @staticmethod
+    def key(module, date, targets=None):
+        return (module, date, None if targets is None else tuple(sorted(map(str, targets))))
+
+    def lead(self, key, leader):
+        flight = Flight(key, leader)
+        self._flights[key] = flight
+        return flight
+
+    def attach(self, key, user_id, waiter):
+        """Join the flight running key; returns it, or None when there is none"""
+        flight = self._flights.get(key)
+        if flight is None or flight.leader == user_id:
+            return None
+        flight.followers[user_id] = waiter
+        return flight
+
+    def running(self, key):
+        return key in self._flights
+
+    def finish(self, flight):
+        """End the flight; returns the followers' waiters (empty when already finished)"""
+        if self._flights.get(flight.key) is flight:
+            del self._flights[flight.key]
+        followers = list(flight.followers.values())
+        flight.followers.clear()
+        return followers
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from urllib.parse import urlsplit
+from selenium.webdriver.common.by import By
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+VAULT_DIR = os.getenv("SESSION_VAULT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "bevco", "sessions"))
+SESSION_MAX_AGE = int(os.getenv("SESSION_MAX_AGE", str(6 * 3600)))
+# Elements that only exist once logged in (menu button used by navigate())
+LOGGED_IN_IDS = ("ctl00_ImageButton11", "ctl00_ImageButton_Home")
+LOGIN_FORM_ID = "txt_username"
+
+_lock = threading.Lock()
+
+def _vault_path(account):
+    digest = hashlib.sha256(str(account).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(VAULT_DIR, f"{digest}.json")
+
+def save_session(driver, account):
+    """Store the portal cookies and landing page after a successful login"""
+    try:
+        record = {
+            "account": account,
+            "saved_at": time.time(),
+            "landing_url": driver.current_url,
+            "cookies": driver.get_cookies(),
+        }
+        path = _vault_path(account)
+        with _lock:
+            os.makedirs(VAULT_DIR, exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding='utf-8') as f:
+                json.dump(record, f)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, path)
+        logger.info(f"Saved portal session for {account}")
+        return True
+    except Exception as e:
+        logger.error(f"Failed to save portal session: {e}")
+        return False
+
+def load_session(account):
+    """Return the stored session record if it exists and is not too old"""
+    path = _vault_path(account)
+    try:
+        with _lock, open(path, encoding='utf-8') as f:
+            record = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Discarding unreadable session for {account}: {e}")
+        invalidate_session(account)
+        return None
+
+    if time.time() - record.get("saved_at", 0) > SESSION_MAX_AGE:
+        logger.info(f"Stored session for {account} is older than {SESSION_MAX_AGE}s")
+        invalidate_session(account)
+        return None
+    return record
+
+def invalidate_session(account):
+    """Forget the stored session so the next job goes through the CAPTCHA"""
+    with _lock:
+        try:
+            os.remove(_vault_path(account))
+        except FileNotFoundError:
+            pass
+
+def is_logged_in(driver):
+    """Probe the current page for logged-in markers"""
+    if driver.find_elements(By.ID, LOGIN_FORM_ID):
+        return False
+    return any(driver.find_elements(By.ID, element_id) for element_id in LOGGED_IN_IDS)
+
+def set_cookies(driver, cookies, url):
+    """Set stored cookies through CDP Network.setCookie
+
+    Unlike add_cookie this needs no page of the portal loaded first, so lean
+    mode blocking the page used for that cannot make every cookie fail.
+    """
+    for cookie in cookies:
+        params = {"name": cookie["name"], "value": cookie["value"], "url": url, "path": cookie.get("path", "/")}
+        for key in ("domain", "secure", "httpOnly"):
+            if key in cookie:
+                params[key] = cookie[key]
+        if "expiry" in cookie:
+            params["expires"] = cookie["expiry"]
+        try:
+            driver.execute_cdp_cmd("Network.setCookie", params)
+        except Exception as e:
+            logger.debug(f"Skipping cookie {cookie.get('name')}: {e}")
+
+def restore_session(driver, account):
+    """Inject stored cookies into a fresh driver and check they are still valid
+
+    Returns True when the driver is logged in and ready for navigate(); on
+    expiry the stored session is dropped and the caller falls back to CAPTCHA.
+    """
+    record = load_session(account)
+    if not record:
+        return False
+
+    try:
+        landing_url = record["landing_url"]
+        parts = urlsplit(landing_url)
+        set_cookies(driver, record["cookies"], f"{parts.scheme}://{parts.netloc}/")
+
+        driver.get(landing_url)
+        if is_logged_in(driver):
+            logger.info(f"♻️ Reused stored portal session for {account}")
+            return True
+
+        logger.info(f"Stored session for {account} has expired")
+    except Exception as e:
+        logger.warning(f"Failed to restore session for {account}: {e}")
+
+    invalidate_session(account)
+    driver.delete_all_cookies()
+    return False
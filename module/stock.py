@@ -1,8 +1,8 @@
 import os
 import time
-import pandas as pd
+import json
 import logging
-from io import StringIO
+import threading
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
@@ -10,19 +10,25 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.common.keys import Keys
-from webdriver_manager.chrome import ChromeDriverManager
 from datetime import datetime, date
 from openpyxl import load_workbook, Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
+from .lean import TransferStats
+from .waits import postback, select_option, retry_pause, report_timings, timed, watch_element, wait_for_element_change
+from .portal_http import form_from_driver
+from .tabs import fan_out, SCRAPE_TABS
+from .grid import extract_grid, rows_from_element
+from .master_data import master_data
+from .manifest import tracked
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # Constants
 today = date.today().strftime("%Y-%m-%d")
-EXCEL_PATH = os.path.join(os.path.dirname(__file__), "Depot.xlsx")
 filename = "stocks.xlsx"
+STOCK_ENGINE = os.getenv("STOCK_ENGINE", "browser")
 
+@timed("stock.navigate")
 def navigate(driver):
     """Navigate to the stock reports section with error handling"""
     try:
@@ -32,15 +38,15 @@ def navigate(driver):
         menu_button = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.ID, 'ctl00_ImageButton11'))
         )
-        menu_button.click()
-        time.sleep(5)
+        with postback(driver, element=menu_button, label="stock.navigate.menu"):
+            menu_button.click()
         
         # Click on the stock reports link
         stock_link = WebDriverWait(driver, 15).until(
             EC.element_to_be_clickable((By.ID, 'ctl00_ContentPlaceHolder1_TabContainer1_Tab_BI_Module_grid_crop_suppl_ctl09_link_crop_supplier'))
         )
-        stock_link.click()
-        time.sleep(10)
+        with postback(driver, element=stock_link, label="stock.navigate.link"):
+            stock_link.click()
         
         logger.info("Successfully navigated to stock reports section")
         
@@ -48,10 +54,10 @@ def navigate(driver):
         logger.error(f"Navigation failed: {e}")
         raise Exception(f"Failed to navigate to stock reports section: {str(e)}")
 
-def submit_request(driver, destination, download_dir, max_retries=3):
+@timed("stock.submit")
+def submit_request(driver, destination, writer, max_retries=3):
     """Submit stock request with retry logic and comprehensive error handling"""
-    filepath = os.path.join(download_dir, filename)
-    logger.info(f"Processing depot: {destination} -> {filepath}")
+    logger.info(f"Processing depot: {destination} -> {writer.filepath}")
 
     for attempt in range(max_retries):
         try:
@@ -59,51 +65,150 @@ def submit_request(driver, destination, download_dir, max_retries=3):
             warehouse_select = WebDriverWait(driver, 15).until(
                 EC.presence_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_ddl_warehouse_Name"))
             )
-            select = Select(warehouse_select)
-            select.select_by_visible_text(destination)
-            time.sleep(1)
 
-            # Wait for table to update
-            table_elem = WebDriverWait(driver, 15).until(
-                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_Grid_req"))
-            )
-            old_html = table_elem.get_attribute('outerHTML')
-            # Click or trigger the event that loads new data if needed (if not automatic)
-            # Wait for the table's HTML to change
+            # Watch the grid in-page before the postback replaces it
+            grid_generation = watch_element(driver, "ctl00_ContentPlaceHolder1_Grid_req")
+
+            changed = select_option(driver, warehouse_select, destination, label="stock.select_warehouse")
+
+            # Wait for the table to be replaced
             WebDriverWait(driver, 15).until(
-                lambda d: d.find_element(By.ID, "ctl00_ContentPlaceHolder1_Grid_req").get_attribute('outerHTML') != old_html
+                EC.visibility_of_element_located((By.ID, "ctl00_ContentPlaceHolder1_Grid_req"))
             )
-            html = driver.find_element(By.ID, "ctl00_ContentPlaceHolder1_Grid_req").get_attribute('outerHTML')
-
-            # Parse table data
-            df = pd.read_html(StringIO(html))[0]
-            if df.empty:
-                logger.warning(f"No data found for depot: {destination}")
-                return False
+            # Already showing this depot (a retry): the grid is current and will not change
+            if changed:
+                wait_for_element_change(driver, "ctl00_ContentPlaceHolder1_Grid_req", grid_generation, label="stock.grid_change")
+            header, rows = extract_grid(driver, "ctl00_ContentPlaceHolder1_Grid_req")
 
-            # Add depot column
-            df.insert(0, "Depot", destination)
+            return store_rows(header, rows, destination, writer)
 
-            # Save to Excel
-            if append_df_to_excel(filepath, df):
-                logger.info(f"✅ Data saved successfully for {destination}")
-                return True
+        except Exception as e:
+            logger.warning(f"Request attempt {attempt + 1} failed for {destination}: {e}")
+            if attempt < max_retries - 1:
+                retry_pause(driver, label="stock.retry")
             else:
-                logger.error(f"❌ Failed to save data for {destination}")
+                logger.error(f"Failed to process {destination} after {max_retries} attempts")
                 return False
 
+    return False
+
+@timed("stock.submit_http")
+def submit_request_http(form, destination, writer, max_retries=3):
+    """Replay the warehouse postback over HTTP instead of driving the browser"""
+    logger.info(f"Processing depot over HTTP: {destination} -> {writer.filepath}")
+
+    for attempt in range(max_retries):
+        try:
+            form.select("ctl00_ContentPlaceHolder1_ddl_warehouse_Name", destination)
+            header, rows = rows_from_element(form.element("ctl00_ContentPlaceHolder1_Grid_req"))
+            return store_rows(header, rows, destination, writer)
+
         except Exception as e:
-            logger.warning(f"Request attempt {attempt + 1} failed for {destination}: {e}")
+            logger.warning(f"HTTP request attempt {attempt + 1} failed for {destination}: {e}")
             if attempt < max_retries - 1:
-                time.sleep(3)  # Wait before retry
+                retry_pause(label="stock.http_retry")
             else:
                 logger.error(f"Failed to process {destination} after {max_retries} attempts")
                 return False
 
     return False
 
+def store_rows(header, rows, destination, writer):
+    """Prefix a depot's grid rows with the Depot column and queue them in the writer"""
+    if not rows:
+        logger.warning(f"No data found for depot: {destination}")
+        return False
+
+    if writer.append(destination, ["Depot"] + list(header), [[destination, *row] for row in rows]):
+        logger.info(f"✅ Data saved successfully for {destination}")
+        return True
+    else:
+        logger.error(f"❌ Failed to save data for {destination}")
+        return False
+
+class StockWorkbookWriter:
+    """Collects depot rows during a run and writes the workbook once at the end
+
+    Every depot batch is also appended to a JSONL journal next to the
+    workbook, so a crash loses nothing: the next writer for the same file
+    replays the journal before adding new rows.
+    """
+
+    def __init__(self, filepath, sheet_name='Sheet1'):
+        self.filepath = filepath
+        self.sheet_name = sheet_name
+        self.journal_path = f"{filepath}.journal"
+        self.header = None
+        self.rows = []
+        self._lock = threading.Lock()
+        self._load_existing()
+        self._journal = open(self.journal_path, "a", encoding='utf-8')
+
+    def _load_existing(self):
+        # Keep rows from a workbook written earlier into the same folder
+        if os.path.exists(self.filepath):
+            wb = load_workbook(self.filepath, read_only=True)
+            ws = wb[self.sheet_name] if self.sheet_name in wb.sheetnames else wb.active
+            existing = [list(row) for row in ws.iter_rows(values_only=True)]
+            wb.close()
+            if existing:
+                self.header, self.rows = existing[0], existing[1:]
+                logger.info(f"Loaded {len(self.rows)} existing rows from {self.filepath}")
+
+        # Replay batches journaled by a run that never reached close()
+        if os.path.exists(self.journal_path):
+            recovered = 0
+            with open(self.journal_path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        batch = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from the crash
+                    self.header = self.header or batch["header"]
+                    self.rows.extend(batch["rows"])
+                    recovered += 1
+            logger.info(f"Recovered {recovered} depot batches from {self.journal_path}")
+
+    def append(self, depot, header, rows):
+        """Journal one depot's rows and keep them for the final write"""
+        try:
+            with self._lock:
+                self._journal.write(json.dumps({"depot": depot, "header": header, "rows": rows}, default=str) + "\n")
+                self._journal.flush()
+                os.fsync(self._journal.fileno())
+                if self.header is None:
+                    self.header = header
+                self.rows.extend(rows)
+            return True
+        except Exception as e:
+            logger.error(f"Error journaling rows for {depot}: {e}")
+            return False
+
+    def close(self):
+        """Write the whole workbook in one pass and drop the journal"""
+        with self._lock:
+            self._journal.close()
+            if self.header is None:
+                logger.info(f"No stock rows collected, {self.filepath} not written")
+                os.remove(self.journal_path)
+                return False
+
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(self.sheet_name)
+            ws.append(self.header)
+            for row in self.rows:
+                ws.append(row)
+            tmp = f"{self.filepath}.tmp"
+            wb.save(tmp)
+            os.replace(tmp, self.filepath)
+            os.remove(self.journal_path)
+            logger.info(f"Wrote {len(self.rows)} rows to {self.filepath}")
+            return True
+
 def append_df_to_excel(filepath, df, sheet_name='Sheet1'):
     """Append dataframe to Excel file with error handling"""
+    # Pulls in pandas/numpy: only paid by callers that still pass a DataFrame
+    from openpyxl.utils.dataframe import dataframe_to_rows
     try:
         # Load existing workbook or create new one
         if os.path.exists(filepath):
@@ -136,45 +241,81 @@ def append_df_to_excel(filepath, df, sheet_name='Sheet1'):
         logger.error(f"Error appending to Excel file {filepath}: {e}")
         return False
 
-def scrape_reports(driver, download_dir):
-    """Main stock scraping function with comprehensive error handling"""
-    try:
-        logger.info("Starting stock reports scraping...")
-        
-        # Load Excel data
-        if not os.path.exists(EXCEL_PATH):
-            raise FileNotFoundError(f"Excel file not found: {EXCEL_PATH}")
+def scrape_depots(driver, depots, writer, engine, manifest=None, on_browser_done=None):
+    """Process depots one after another in the current tab (or over HTTP)"""
+    # Navigate to stock reports section
+    navigate(driver)
+    
+    # Wait for page to be ready
+    WebDriverWait(driver, 15).until(
+        lambda d: d.execute_script('return document.readyState') == 'complete'
+    )
+    
+    success_count = 0
+    failure_count = 0
+    stats = TransferStats(driver, "stock")
+    form = form_from_driver(driver) if engine == "http" else None
+    if form is not None and on_browser_done:
+        # The form carries the cookies and page state: Chrome is not used past this point
+        on_browser_done(driver)
+    
+    # Process each depot
+    for index, destination in enumerate(depots):
+        try:
+            logger.info(f"Processing depot {index + 1}/{len(depots)}: {destination}")
             
-        df = pd.read_excel(EXCEL_PATH)
-        logger.info(f"Loaded {len(df)} depot entries from Excel")
-        
-        # Navigate to stock reports section
-        navigate(driver)
-        
-        # Wait for page to be ready
-        WebDriverWait(driver, 15).until(
-            lambda d: d.execute_script('return document.readyState') == 'complete'
-        )
-        
-        success_count = 0
-        failure_count = 0
-        
-        # Process each depot
-        for index, row in df.iterrows():
-            try:
-                destination = row["Depot"]
-                logger.info(f"Processing depot {index + 1}/{len(df)}: {destination}")
-                
-                if submit_request(driver, destination, download_dir):
-                    success_count += 1
-                else:
-                    failure_count += 1
-                    
-            except Exception as e:
+            if form is not None:
+                submitted = tracked(manifest, destination, lambda: submit_request_http(form, destination, writer))
+            else:
+                submitted = tracked(manifest, destination, lambda: submit_request(driver, destination, writer))
+                stats.sample(driver)
+            if submitted:
+                success_count += 1
+            else:
                 failure_count += 1
-                logger.error(f"❌ Error processing depot {destination}: {e}")
-                continue
+                
+        except Exception as e:
+            failure_count += 1
+            logger.error(f"❌ Error processing depot {destination}: {e}")
+            continue
+    
+    stats.report()
+    return success_count, failure_count
+
+def scrape_reports(driver, download_dir, engine=STOCK_ENGINE, tabs=SCRAPE_TABS, targets=None, manifest=None, on_browser_done=None):
+    """Main stock scraping function with comprehensive error handling
+
+    engine "browser" drives Chrome for every depot (across several tabs when
+    tabs > 1); "http" only uses the browser to reach the report page and
+    replays the postbacks over HTTP, calling on_browser_done(driver) as soon
+    as it no longer needs the browser. targets limits the run to some depots;
+    manifest records the outcome of every depot.
+    """
+    try:
+        logger.info(f"Starting stock reports scraping ({engine} engine)...")
         
+        # Load master data
+        depots = list(targets) if targets is not None else master_data().depots
+        logger.info(f"Loaded {len(depots)} depot entries")
+        if manifest:
+            manifest.add(depots)
+
+        writer = StockWorkbookWriter(os.path.join(download_dir, filename))
+        try:
+            if engine != "http" and tabs > 1:
+                success_count, failure_count = fan_out(
+                    driver, depots, navigate,
+                    lambda tab, destination, work_dir: tracked(
+                        manifest, destination, lambda: submit_request(tab, destination, writer)
+                    ),
+                    download_dir, tabs=tabs, label="stock"
+                )
+            else:
+                success_count, failure_count = scrape_depots(driver, depots, writer, engine, manifest, on_browser_done)
+        finally:
+            writer.close()
+
+        report_timings()
         logger.info(f"✅ Stock reports scraping completed. Success: {success_count}, Failures: {failure_count}")
         
         # Don't quit driver here as it's managed by the main bot
@@ -0,0 +1,119 @@
+import os
+import time
+import queue
+import shutil
+import logging
+import threading
+import contextvars
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+from .chromedriver import resolve_driver_path
+from .lean import enable_lean
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+SCRAPE_TABS = int(os.getenv("SCRAPE_TABS", "1"))
+
+def attach_tab(driver, download_dir, url=None):
+    """Open a new tab in driver's browser through a second WebDriver session
+
+    The session attaches over the DevTools debugger address, so the tab shares
+    the logged-in cookies while its commands run independently of driver's.
+    Downloads of the tab are routed to download_dir only.
+    """
+    debugger_address = driver.capabilities["goog:chromeOptions"]["debuggerAddress"]
+    options = Options()
+    options.debugger_address = debugger_address
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    tab = webdriver.Chrome(service=ChromeService(resolve_driver_path()), options=options)
+    tab.switch_to.new_window("tab")
+    tab.set_page_load_timeout(30)
+    tab.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": download_dir})
+    if getattr(driver, "lean_mode", False):
+        enable_lean(tab)
+    if url:
+        tab.get(url)
+    return tab
+
+def detach_tab(tab):
+    """Close the tab and end its attached session without closing the browser"""
+    try:
+        tab.close()
+    except Exception as e:
+        logger.debug(f"Error closing tab: {e}")
+    try:
+        tab.service.stop()
+    except Exception as e:
+        logger.debug(f"Error stopping tab session: {e}")
+
+def fan_out(driver, targets, prepare, process, download_dir, tabs=SCRAPE_TABS, label="scrape"):
+    """Spread targets over several tabs of the logged-in browser
+
+    Call it while driver is on the post-login landing page: every tab opens
+    that page, then prepare(tab) navigates it to the report; process(tab, target,
+    work_dir) handles one target and returns True on success. Each tab gets its
+    own work_dir under download_dir so downloads cannot be attributed to the
+    wrong target. Returns (success_count, failure_count).
+    """
+    start_url = driver.current_url
+    pending = queue.Queue()
+    for target in targets:
+        pending.put(target)
+
+    counts = {"success": 0, "failure": 0}
+    counts_lock = threading.Lock()
+
+    def worker(index):
+        work_dir = os.path.join(download_dir, f".tab{index}")
+        os.makedirs(work_dir, exist_ok=True)
+        done = 0
+        started = time.monotonic()
+        tab = None
+        try:
+            tab = attach_tab(driver, work_dir, start_url)
+            prepare(tab)
+            while True:
+                try:
+                    target = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    ok = process(tab, target, work_dir)
+                except Exception as e:
+                    logger.error(f"❌ Tab {index} failed on {target}: {e}")
+                    ok = False
+                done += 1
+                with counts_lock:
+                    counts["success" if ok else "failure"] += 1
+        except Exception as e:
+            logger.error(f"❌ Tab {index} stopped: {e}")
+        finally:
+            if tab:
+                detach_tab(tab)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed * 60 if elapsed else 0
+            logger.info(f"📊 {label} tab {index}: {done} targets in {elapsed:.1f}s ({rate:.1f}/min)")
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    # Each tab thread runs in a copy of the caller's context so its timings count towards the job
+    threads = [
+        threading.Thread(
+            target=contextvars.copy_context().run, args=(worker, index),
+            name=f"{label}-tab{index}", daemon=True
+        )
+        for index in range(tabs)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Targets left behind by tabs that died are counted as failures
+    while not pending.empty():
+        logger.error(f"❌ {label}: {pending.get_nowait()} was never processed")
+        counts["failure"] += 1
+
+    return counts["success"], counts["failure"]
@@ -1,7 +1,7 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
+from module.chromedriver import resolve_driver_path
 import time
 import os
 from dotenv import load_dotenv
@@ -15,7 +15,7 @@ options = Options()
 options.add_experimental_option("detach", True)  # Keep browser open
 
 # ✅ Setup WebDriver
-driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+driver = webdriver.Chrome(service=Service(resolve_driver_path()), options=options)
 
 # ✅ Open URL
 driver.get(url)
@@ -0,0 +1,56 @@
+import os
+import asyncio
+import logging
+from telegram.ext import BaseUpdateProcessor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", "32"))
+
+def _update_key(update):
+    """The user (else chat) an update belongs to, or None for updates without one"""
+    user = getattr(update, "effective_user", None)
+    if user is not None:
+        return ("user", user.id)
+    chat = getattr(update, "effective_chat", None)
+    if chat is not None:
+        return ("chat", chat.id)
+    return None
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates of different users concurrently, each user's in arrival order
+
+    Updates of one user wait on that user's lock, so a CAPTCHA reply is never
+    handled before the command that asked for it; everyone else carries on.
+    """
+
+    def __init__(self, max_concurrent_updates=MAX_CONCURRENT_UPDATES):
+        super().__init__(max_concurrent_updates)
+        self._locks = {}
+        self._waiting = {}
+
+    async def do_process_update(self, update, coroutine):
+        key = _update_key(update)
+        if key is None:
+            await coroutine
+            return
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._waiting[key] = self._waiting.get(key, 0) + 1
+        try:
+            async with lock:
+                await coroutine
+        finally:
+            self._waiting[key] -= 1
+            if not self._waiting[key]:
+                del self._waiting[key]
+                del self._locks[key]
+
+    async def initialize(self):
+        logger.info(f"Processing updates concurrently (up to {self.max_concurrent_updates}, ordered per user)")
+
+    async def shutdown(self):
+        self._locks.clear()
+        self._waiting.clear()
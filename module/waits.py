@@ -0,0 +1,273 @@
+import os
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from selenium.common.exceptions import (
+    JavascriptException, NoSuchElementException, StaleElementReferenceException, TimeoutException, WebDriverException
+)
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from .metrics import observe, current_job
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Constants
+DEFAULT_TIMEOUT = 15
+POLL_INTERVAL = float(os.getenv("WAIT_POLL_INTERVAL", "0.1"))
+RETRY_BACKOFF = float(os.getenv("WAIT_RETRY_BACKOFF", "0.5"))
+
+_VIEWSTATE_SCRIPT = """
+const vs = document.getElementById('__VIEWSTATE');
+return vs ? vs.value.length + ':' + vs.value.slice(-64) : null;
+"""
+
+_AJAX_IDLE_SCRIPT = """
+if (document.readyState !== 'complete') return false;
+try {
+    if (window.Sys && Sys.WebForms && Sys.WebForms.PageRequestManager) {
+        return !Sys.WebForms.PageRequestManager.getInstance().get_isInAsyncPostBack();
+    }
+} catch (e) {}
+return true;
+"""
+
+_NETWORK_SCRIPT = """
+return [performance.getEntriesByType('resource').length,
+        performance.getEntriesByType('resource').filter(r => r.responseEnd === 0).length];
+"""
+
+# label -> [count, total seconds, max seconds], one table per job (see metrics.job_scope)
+# so concurrent jobs never see or reset each other's waits; waits outside a job share one
+_timings = weakref.WeakKeyDictionary()
+_unscoped_timings = {}
+_timings_lock = threading.Lock()
+
+def _table():
+    job = current_job()
+    if job is None:
+        return _unscoped_timings
+    return _timings.setdefault(job, {})
+
+def _record(label, elapsed):
+    observe(label, elapsed)
+    with _timings_lock:
+        entry = _table().setdefault(label, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+
+@contextmanager
+def timed(label):
+    """Record how long a wait (or, as a decorator, a call) took under the given label"""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        _record(label, time.monotonic() - started)
+
+def timings():
+    """Return a snapshot of the current job's {label: (count, total_s, max_s)}"""
+    with _timings_lock:
+        return {label: tuple(entry) for label, entry in _table().items()}
+
+def report_timings(reset=True):
+    """Log the current job's accumulated wait timings, slowest first"""
+    with _timings_lock:
+        table = _table()
+        snapshot = sorted(table.items(), key=lambda item: item[1][1], reverse=True)
+        if reset:
+            table.clear()
+    for label, (count, total, longest) in snapshot:
+        logger.info(f"⏱️ wait {label}: {count}x, total {total:.2f}s, avg {total / count:.2f}s, max {longest:.2f}s")
+
+def _wait(driver, timeout):
+    # Scripts can fail while a postback swaps the document; treat that as "not yet"
+    return WebDriverWait(
+        driver, timeout, poll_frequency=POLL_INTERVAL,
+        ignored_exceptions=(JavascriptException, StaleElementReferenceException)
+    )
+
+def viewstate(driver):
+    """Fingerprint of the current __VIEWSTATE value"""
+    return driver.execute_script(_VIEWSTATE_SCRIPT)
+
+def is_stale(element):
+    """True once the element has been removed from the DOM"""
+    try:
+        element.is_enabled()
+        return False
+    except StaleElementReferenceException:
+        return True
+
+def wait_for_page_ready(driver, timeout=DEFAULT_TIMEOUT, label="page_ready"):
+    """Wait for document.readyState and an idle ASP.NET PageRequestManager"""
+    with timed(label):
+        _wait(driver, timeout).until(lambda d: d.execute_script(_AJAX_IDLE_SCRIPT))
+
+def wait_for_staleness(driver, element, timeout=DEFAULT_TIMEOUT, label="staleness"):
+    """Wait until element is detached, i.e. the page or UpdatePanel was replaced"""
+    with timed(label):
+        _wait(driver, timeout).until(lambda d: is_stale(element))
+
+def wait_for_postback(driver, old_viewstate, element=None, timeout=DEFAULT_TIMEOUT, label="postback"):
+    """Wait for an ASP.NET postback to complete
+
+    A postback is complete when __VIEWSTATE differs from old_viewstate (or the
+    reference element went stale) and the PageRequestManager is idle again.
+    """
+    def done(d):
+        changed = (element is not None and is_stale(element)) or viewstate(d) != old_viewstate
+        return changed and d.execute_script(_AJAX_IDLE_SCRIPT)
+
+    with timed(label):
+        _wait(driver, timeout).until(done)
+
+@contextmanager
+def postback(driver, element=None, timeout=DEFAULT_TIMEOUT, label="postback"):
+    """Run the enclosed action and wait for the postback it triggers"""
+    before = viewstate(driver)
+    yield
+    wait_for_postback(driver, before, element=element, timeout=timeout, label=label)
+
+def select_option(driver, element, text, timeout=DEFAULT_TIMEOUT, label="select"):
+    """Choose text in an auto-postback <select> and wait for the postback
+
+    Re-selecting the option already shown fires no change event and so no
+    postback; nothing is done then. Returns True if a postback ran.
+    """
+    select = Select(element)
+    try:
+        if select.first_selected_option.text.strip() == text:
+            return False
+    except NoSuchElementException:
+        pass
+    with postback(driver, element=element, timeout=timeout, label=label):
+        select.select_by_visible_text(text)
+    return True
+
+def wait_for_network_idle(driver, idle_time=0.5, timeout=DEFAULT_TIMEOUT, label="network_idle"):
+    """Wait until no new resource requests start for idle_time seconds"""
+    with timed(label):
+        deadline = time.monotonic() + timeout
+        last_count = None
+        quiet_since = time.monotonic()
+        while time.monotonic() < deadline:
+            count, pending = driver.execute_script(_NETWORK_SCRIPT)
+            if count != last_count or pending:
+                last_count = count
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= idle_time:
+                return
+            time.sleep(POLL_INTERVAL)
+        raise TimeoutException(f"Network did not go idle within {timeout}s")
+
+def wait_for_download_start(download_dir, existing, timeout=DEFAULT_TIMEOUT, label="download_start"):
+    """Wait for a new entry (partial or complete) to appear in download_dir"""
+    with timed(label):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                new_entries = set(os.listdir(download_dir)) - set(existing)
+            except FileNotFoundError:
+                new_entries = set()
+            if new_entries:
+                return sorted(new_entries)
+            time.sleep(POLL_INTERVAL)
+        raise TimeoutException(f"No download started in {download_dir} within {timeout}s")
+
+def retry_pause(driver=None, label="retry"):
+    """Short backoff before a retry, ending early once the page is idle"""
+    with timed(label):
+        if driver is not None:
+            try:
+                _wait(driver, DEFAULT_TIMEOUT).until(lambda d: d.execute_script(_AJAX_IDLE_SCRIPT))
+            except Exception:
+                pass
+        time.sleep(RETRY_BACKOFF)
+
+# One document-level MutationObserver per page bumps a generation counter for
+# every watched element id whenever the element is replaced or changes inside.
+_WATCH_SCRIPT = """
+const id = arguments[0];
+if (!window.__bevcoWatch) {
+    const state = window.__bevcoWatch = {gens: {}, nodes: {}, waiters: []};
+    const observer = new MutationObserver(records => {
+        let bumped = false;
+        for (const key of Object.keys(state.nodes)) {
+            const el = document.getElementById(key);
+            let changed = el !== state.nodes[key];
+            if (!changed && el) {
+                changed = records.some(r => r.target === el || el.contains(r.target));
+            }
+            if (changed) {
+                state.nodes[key] = el;
+                state.gens[key] += 1;
+                bumped = true;
+            }
+        }
+        if (bumped) state.waiters = state.waiters.filter(waiter => !waiter());
+    });
+    observer.observe(document.documentElement, {childList: true, subtree: true, characterData: true, attributes: true});
+}
+const state = window.__bevcoWatch;
+if (!(id in state.gens)) {
+    state.gens[id] = 0;
+    state.nodes[id] = document.getElementById(id);
+}
+return state.gens[id];
+"""
+
+# -1 means the document was replaced (full postback), which counts as a change
+_GENERATION_SCRIPT = """
+const state = window.__bevcoWatch;
+return state && arguments[0] in state.gens ? state.gens[arguments[0]] : -1;
+"""
+
+_WAIT_CHANGE_ASYNC_SCRIPT = """
+const id = arguments[0], since = arguments[1], done = arguments[arguments.length - 1];
+const state = window.__bevcoWatch;
+const current = () => state && id in state.gens ? state.gens[id] : -1;
+if (current() !== since) { done(current()); return; }
+state.waiters.push(() => {
+    if (current() !== since) { done(current()); return true; }
+    return false;
+});
+"""
+
+def watch_element(driver, element_id):
+    """Start tracking changes of element_id in the page; returns its generation"""
+    return driver.execute_script(_WATCH_SCRIPT, element_id)
+
+def element_generation(driver, element_id):
+    """Cheap poll of the change counter installed by watch_element"""
+    return driver.execute_script(_GENERATION_SCRIPT, element_id)
+
+def wait_for_element_change_async(driver, element_id, since, timeout=DEFAULT_TIMEOUT):
+    """Block inside the page until element_id changes; returns the new generation"""
+    # The script timeout is per session: put back whatever the caller had
+    previous = driver.timeouts.script
+    driver.set_script_timeout(timeout)
+    try:
+        return driver.execute_async_script(_WAIT_CHANGE_ASYNC_SCRIPT, element_id, since)
+    finally:
+        driver.set_script_timeout(previous)
+
+def wait_for_element_change(driver, element_id, since, timeout=DEFAULT_TIMEOUT, label="element_change"):
+    """Wait until element_id has changed since generation `since`
+
+    Uses the async script first; if the document is swapped by a full postback
+    while it waits, falls back to polling the generation counter.
+    """
+    with timed(label):
+        deadline = time.monotonic() + timeout
+        try:
+            return wait_for_element_change_async(driver, element_id, since, timeout)
+        except TimeoutException:
+            raise
+        except WebDriverException as e:
+            logger.debug(f"Async change wait interrupted, polling instead: {e}")
+        remaining = max(deadline - time.monotonic(), POLL_INTERVAL)
+        _wait(driver, remaining).until(lambda d: element_generation(d, element_id) != since)
+        return element_generation(driver, element_id)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming job archive
+Checks which files are appended while a job runs and how each one is compressed
+"""
+
+import io
+import os
+import sys
+import time
+import shutil
+import logging
+import zipfile
+import tempfile
+
+from module.archive import StreamingArchive
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def write(directory, name, data):
+    with open(os.path.join(directory, name), "wb") as f:
+        f.write(data)
+
+def test_live_append():
+    """Renamed PDFs are archived while the job runs; raw and partial downloads are not"""
+    directory = tempfile.mkdtemp()
+    archive = StreamingArchive(directory, poll_interval=0.02).start()
+    try:
+        write(directory, "BEVCO_Invoice.pdf", b"%PDF raw")
+        write(directory, "Depot_1.pdf.part", b"%PDF")
+        os.replace(os.path.join(directory, "Depot_1.pdf.part"), os.path.join(directory, "Depot_1.pdf"))
+        write(directory, "report.txt", b"log line\n")
+        deadline = time.monotonic() + 2
+        while "Depot_1.pdf" not in archive.names and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert archive.names == ["Depot_1.pdf"]
+    finally:
+        archive.close()
+        shutil.rmtree(directory)
+
+def test_finish_compression():
+    """finish() adds the remaining files: PDFs and workbooks stored, text deflated"""
+    directory = tempfile.mkdtemp()
+    archive = StreamingArchive(directory)
+    try:
+        write(directory, "Depot_1.pdf", b"%PDF" * 100)
+        write(directory, "stock.xlsx", b"PK" * 100)
+        write(directory, "timings.json", b"{}" * 100)
+        os.makedirs(os.path.join(directory, ".tab1"))
+        archive_file = archive.finish()
+        members = {info.filename: info.compress_type for info in zipfile.ZipFile(io.BytesIO(archive_file.read())).infolist()}
+        assert members == {
+            "Depot_1.pdf": zipfile.ZIP_STORED,
+            "stock.xlsx": zipfile.ZIP_STORED,
+            "timings.json": zipfile.ZIP_DEFLATED,
+        }
+    finally:
+        archive.close()
+        shutil.rmtree(directory)
+
+def main():
+    tests = [
+        test_live_append,
+        test_finish_compression,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
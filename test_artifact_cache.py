@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the artifact cache of past-date invoices
+Covers least-recently-used eviction under the size limit and "no invoice" entries
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+from datetime import date
+
+from module.artifact_cache import ArtifactCache
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DAY = date(2024, 1, 1)
+
+def write(directory, name, data):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+def test_evict_least_recently_used():
+    """Once the objects exceed max_bytes, the keys served longest ago go first"""
+    root, work = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        cache = ArtifactCache(root, max_bytes=250)
+        for name in ("A", "B"):
+            cache.put("invoice", name, DAY, write(work, f"{name}.pdf", name.encode() * 100))
+            time.sleep(0.01)
+        # Serving A makes B the least recently used
+        assert cache.get("invoice", "A", DAY)
+        time.sleep(0.01)
+        cache.put("invoice", "C", DAY, write(work, "C.pdf", b"C" * 100))
+
+        assert cache.get("invoice", "B", DAY) is None
+        assert cache.get("invoice", "A", DAY) and cache.get("invoice", "C", DAY)
+        assert cache.stats() == (2, 2, 200)
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(work)
+
+def test_shared_object_survives_eviction():
+    """Identical PDFs are stored once, and evicting one key keeps the object for the other"""
+    root, work = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        cache = ArtifactCache(root, max_bytes=250)
+        same = write(work, "same.pdf", b"S" * 100)
+        cache.put("invoice", "A", DAY, same)
+        time.sleep(0.01)
+        cache.put("invoice", "B", DAY, same)
+        assert cache.stats() == (2, 1, 100)
+        time.sleep(0.01)
+        cache.put("invoice", "C", DAY, write(work, "C.pdf", b"C" * 100))
+        time.sleep(0.01)
+        cache.put("invoice", "D", DAY, write(work, "D.pdf", b"D" * 100))
+
+        # A went first, B's object went with B; C and D are left
+        assert cache.get("invoice", "A", DAY) is None and cache.get("invoice", "B", DAY) is None
+        assert cache.stats() == (2, 2, 200)
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(work)
+
+def test_missing_entries():
+    """"No invoice" entries take no space, are never served as files and expire"""
+    root = tempfile.mkdtemp()
+    try:
+        cache = ArtifactCache(root, max_bytes=250, missing_max_age=60)
+        cache.put_missing("invoice", "A", DAY)
+        assert cache.is_missing("invoice", "A", DAY)
+        assert cache.get("invoice", "A", DAY) is None
+        assert not cache.is_missing("invoice", "B", DAY)
+        assert cache.stats() == (1, 0, 0)
+
+        expired = ArtifactCache(root, max_bytes=250, missing_max_age=0.001)
+        time.sleep(0.01)
+        assert not expired.is_missing("invoice", "A", DAY)
+    finally:
+        shutil.rmtree(root)
+
+def main():
+    tests = [
+        test_evict_least_recently_used,
+        test_shared_object_survives_eviction,
+        test_missing_entries,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-click download tracker
+Uses fake drivers for the DevTools events and the filesystem fallback
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import tempfile
+import threading
+
+from module import downloads
+from module.downloads import DownloadTracker
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class NoLogDriver:
+    """A driver without a performance log, as with a tab attached over the debugger address"""
+
+    def get_log(self, name):
+        raise RuntimeError("log type 'performance' not found")
+
+    def execute_cdp_cmd(self, command, params):
+        raise RuntimeError("no DevTools")
+
+class EventDriver:
+    """A driver whose performance log replays queued DevTools events"""
+
+    def __init__(self):
+        self.events = []
+        self._lock = threading.Lock()
+
+    def emit(self, method, **params):
+        with self._lock:
+            self.events.append({"message": json.dumps({"message": {"method": method, "params": params}})})
+
+    def get_log(self, name):
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+
+def write_later(directory, name, data=b"%PDF", partial_first=True, delay=0.05):
+    """Create name in directory from another thread, via a .crdownload file like Chrome"""
+    def write():
+        time.sleep(delay)
+        target = os.path.join(directory, name)
+        if partial_first:
+            with open(f"{target}.crdownload", "wb") as f:
+                f.write(data)
+            time.sleep(delay)
+            os.replace(f"{target}.crdownload", target)
+        else:
+            with open(target, "wb") as f:
+                f.write(data)
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+def test_polling_fallback():
+    """Without a performance log or inotify, the new finished file is found by polling"""
+    directory = tempfile.mkdtemp()
+    inotify = downloads.INotify
+    downloads.INotify = None
+    try:
+        with open(os.path.join(directory, "old.pdf"), "wb") as f:
+            f.write(b"%PDF")
+        tracker = DownloadTracker(NoLogDriver(), directory)
+        tracker.arm()
+        writer = write_later(directory, "WBSBCL_Inventory.pdf")
+        assert tracker.wait_started(timeout=2)
+        assert tracker.wait_finished("WBSBCL_Inventory", timeout=2) == "WBSBCL_Inventory.pdf"
+        assert not tracker.use_cdp
+        writer.join()
+    finally:
+        downloads.INotify = inotify
+        shutil.rmtree(directory)
+
+def test_polling_timeout():
+    """Nothing new in the folder: wait_started is False and wait_finished raises"""
+    directory = tempfile.mkdtemp()
+    inotify = downloads.INotify
+    downloads.INotify = None
+    try:
+        tracker = DownloadTracker(NoLogDriver(), directory)
+        tracker.arm()
+        assert not tracker.wait_started(timeout=0.2)
+        assert not tracker.began()
+        try:
+            tracker.wait_finished("BEVCO_Invoice.pdf", timeout=0.2)
+            raise AssertionError("wait_finished did not time out")
+        except TimeoutError:
+            pass
+    finally:
+        downloads.INotify = inotify
+        shutil.rmtree(directory)
+
+def test_page_events():
+    """Page.download* events pick the download and wait for Chrome to report it complete"""
+    directory = tempfile.mkdtemp()
+    try:
+        driver = EventDriver()
+        tracker = DownloadTracker(driver, directory)
+        driver.emit("Page.downloadWillBegin", guid="stale", frameId="main-frame", suggestedFilename="old.pdf")
+        tracker.arm()
+        driver.emit("Page.downloadWillBegin", guid="mine", frameId="main-frame", suggestedFilename="BEVCO_Invoice.pdf")
+        assert tracker.wait_started(timeout=1)
+
+        # The file may land before Chrome reports the download complete
+        write_later(directory, "BEVCO_Invoice.pdf", partial_first=False, delay=0).join()
+        started = time.monotonic()
+        threading.Timer(0.2, lambda: driver.emit("Page.downloadProgress", guid="mine", state="completed")).start()
+        assert tracker.wait_finished("BEVCO_Invoice", timeout=2) == "BEVCO_Invoice.pdf"
+        assert time.monotonic() - started >= 0.2
+    finally:
+        shutil.rmtree(directory)
+
+def test_canceled_download():
+    """A download Chrome cancels is reported instead of waited out"""
+    directory = tempfile.mkdtemp()
+    try:
+        driver = EventDriver()
+        tracker = DownloadTracker(driver, directory)
+        tracker.arm()
+        driver.emit("Page.downloadWillBegin", guid="mine", frameId="main-frame", suggestedFilename="BEVCO_Invoice.pdf")
+        driver.emit("Page.downloadProgress", guid="mine", state="canceled")
+        try:
+            tracker.wait_finished("BEVCO_Invoice", timeout=1)
+            raise AssertionError("a canceled download was not reported")
+        except RuntimeError as e:
+            assert "canceled" in str(e)
+    finally:
+        shutil.rmtree(directory)
+
+def main():
+    tests = [
+        test_polling_fallback,
+        test_polling_timeout,
+        test_page_events,
+        test_canceled_download,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
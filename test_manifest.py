@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-target run manifests
+Covers which targets /resume and /retryfailed pick up after a run
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import tempfile
+
+from module.manifest import RunManifest, latest_unfinished, tracked, PENDING, OK, FAILED
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_unfinished():
+    """Pending, failed and lost-before-delivery targets are unfinished, in the order they were added"""
+    root, download_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        manifest = RunManifest.for_job(1, "inventory", root=root)
+        manifest.begin(module="inventory", download_dir=download_dir)
+        targets = [("North", "W1"), ("North", "W2"), ("South", "W1"), ("South", "W3")]
+        manifest.add(targets)
+
+        with open(os.path.join(download_dir, "North_W1.pdf"), "wb") as f:
+            f.write(b"%PDF")
+        assert tracked(manifest, targets[0], lambda: True, output="North_W1.pdf")
+        assert not tracked(manifest, targets[1], lambda: False, output="North_W2.pdf")
+        # Reported done, but the file is gone before the run was sent
+        assert tracked(manifest, targets[2], lambda: True, output="South_W1.pdf")
+
+        assert manifest.unfinished() == [("North", "W2"), ("South", "W1"), ("South", "W3")]
+        assert manifest.counts() == {PENDING: 1, OK: 2, FAILED: 1}
+
+        # Re-read from disk: same answer, targets come back as tuples
+        assert RunManifest(manifest.path).unfinished() == manifest.unfinished()
+
+        # Once delivered, a missing file no longer matters
+        manifest.mark_delivered()
+        assert manifest.unfinished() == [("North", "W2"), ("South", "W3")]
+    finally:
+        shutil.rmtree(root)
+        shutil.rmtree(download_dir)
+
+def test_torn_last_line():
+    """A crash mid-write loses only the torn record"""
+    root = tempfile.mkdtemp()
+    try:
+        manifest = RunManifest.for_job(1, "stock", root=root)
+        manifest.begin(module="stock")
+        manifest.add(["Depot A", "Depot B"])
+        manifest.record("Depot A", True, 1.0)
+        with open(manifest.path, "a", encoding='utf-8') as f:
+            f.write('{"target": "Depot B", "sta')
+
+        recovered = RunManifest(manifest.path)
+        assert recovered.unfinished() == ["Depot B"]
+        recovered.record("Depot B", True, 1.0)
+        assert RunManifest(manifest.path).unfinished() == []
+    finally:
+        shutil.rmtree(root)
+
+def test_latest_unfinished():
+    """/resume picks the user's most recent run that still has work left"""
+    root = tempfile.mkdtemp()
+    try:
+        older = RunManifest.for_job(1, "stock", root=root)
+        older.begin(module="stock")
+        older.add(["Depot A"])
+        time.sleep(0.01)
+        newer = RunManifest.for_job(1, "invoice", root=root)
+        newer.begin(module="invoice")
+        newer.add(["W1"])
+        other_user = RunManifest.for_job(2, "inventory", root=root)
+        other_user.begin(module="inventory")
+        other_user.add([("North", "W1")])
+
+        assert latest_unfinished(1, root=root).run["module"] == "invoice"
+        newer.record("W1", True, 1.0)
+        assert latest_unfinished(1, root=root).run["module"] == "stock"
+        older.record("Depot A", True, 1.0)
+        assert latest_unfinished(1, root=root) is None
+        assert latest_unfinished(3, root=os.path.join(root, "missing")) is None
+    finally:
+        shutil.rmtree(root)
+
+def main():
+    tests = [
+        test_unfinished,
+        test_torn_last_line,
+        test_latest_unfinished,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the mock BEVCO portal
+Drives the portal's postbacks over HTTP with the same WebForm replay the scrapers use
+"""
+
+import sys
+import logging
+
+import requests
+
+from module.mock_portal import MockPortal
+from module.portal_http import WebForm
+from module.grid import rows_from_element
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def logged_in_form(portal):
+    """Log in over HTTP and return a WebForm for the landing page"""
+    session = requests.Session()
+    page = session.get(portal.login_url)
+    assert 'id="Image1"' in page.text and 'id="txt_username"' in page.text
+    response = session.post(portal.login_url, data={
+        "txt_username": "user", "txt_password": "secret", "CodeNumberTextBox": "1234",
+        "ImageButton1.x": "1", "ImageButton1.y": "1",
+    })
+    assert response.url.endswith("/Home.aspx")
+    return WebForm(session, response.url, response.text)
+
+def test_login_rejects_wrong_captcha():
+    """A wrong CAPTCHA keeps the user on the login page with an error"""
+    with MockPortal(warehouses=3, captcha_answer="42") as portal:
+        response = requests.post(portal.login_url, data={
+            "txt_username": "user", "txt_password": "secret", "CodeNumberTextBox": "41",
+        })
+        assert 'class="error"' in response.text
+        assert not portal.sessions
+
+def test_stock_postbacks():
+    """Menu, stock link and depot select postbacks fill Grid_req"""
+    with MockPortal(warehouses=3) as portal:
+        form = logged_in_form(portal)
+        form.postback("", {"ctl00$ImageButton11.x": "1", "ctl00$ImageButton11.y": "1"})
+        form.postback("ctl00$ContentPlaceHolder1$TabContainer1$Tab_BI_Module$grid_crop_suppl$ctl09$link_crop_supplier")
+        form.select("ctl00_ContentPlaceHolder1_ddl_warehouse_Name", portal.depots[1])
+        header, rows = rows_from_element(form.element("ctl00_ContentPlaceHolder1_Grid_req"))
+        assert header[0] == "Brand"
+        assert len(rows) == 30 and isinstance(rows[0][3], int)
+
+def test_invoice_pdf_download():
+    """Warehouse and date postbacks, then btn_Show returns the invoice PDF"""
+    with MockPortal(warehouses=3) as portal:
+        form = logged_in_form(portal)
+        form.postback("", {"ctl00$ImageButton11.x": "1", "ctl00$ImageButton11.y": "1"})
+        form.postback("ctl00$ContentPlaceHolder1$TabContainer1$Tab_BI_Module$grid_crop_suppl$ctl10$link_crop_supplier")
+        form.select("ctl00_ContentPlaceHolder1_ddl_Warehouse", portal.warehouses[0])
+        form.select("ctl00_ContentPlaceHolder1_ddl_date", portal.dates[0])
+        assert len(form.element("ctl00_ContentPlaceHolder1_Grid_req").xpath(".//tr")) > 1
+
+        data = dict(form.fields, **{"ctl00$ContentPlaceHolder1$btn_Show": "Show"})
+        response = form.session.post(form.action, data=data)
+        assert response.headers["Content-Type"] == "application/pdf"
+        assert "BEVCO_Invoice.pdf" in response.headers["Content-Disposition"]
+        assert response.content.startswith(b"%PDF")
+
+def test_inventory_cascade_and_failures():
+    """District select fills the warehouse dropdown; failure_rate=1 answers postbacks with 500"""
+    with MockPortal(warehouses=7) as portal:
+        form = logged_in_form(portal)
+        district = next(iter(portal.districts))
+        form.select("ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ddl_Excise_district", district)
+        options = form.element("ctl00_ContentPlaceHolder1_TabContainer1_tab_war_ddl_warehouse").xpath("./option")
+        assert len(options) == len(portal.districts[district]) + 1
+
+        portal.failure_rate = 1.0
+        response = form.session.post(form.action, data=form.fields)
+        assert response.status_code == 500
+        assert portal.counts["failures"] == 1
+
+def main():
+    tests = [
+        test_login_rejects_wrong_captcha,
+        test_stock_postbacks,
+        test_invoice_pdf_download,
+        test_inventory_cascade_and_failures,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
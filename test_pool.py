@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Tests for the warm browser pool
+Uses fake drivers to check leasing, recycling and the background refill
+"""
+
+import sys
+import time
+import shutil
+import logging
+import tempfile
+import threading
+
+from module import login
+from module.pool import DriverPool
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current = handle
+
+class FakeDriver:
+    """Just enough of a WebDriver for the pool: health check, reset and CDP calls"""
+
+    def __init__(self, name):
+        self.name = name
+        self.alive = True
+        self.quit_called = False
+        self.download_dir = None
+        self.window_handles = ["main"]
+        self.switch_to = FakeSwitchTo(self)
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser is gone")
+        return 1
+
+    def execute_cdp_cmd(self, command, params):
+        if command == "Page.setDownloadBehavior":
+            self.download_dir = params["downloadPath"]
+
+    def close(self):
+        self.window_handles.remove(self.current)
+
+    def delete_all_cookies(self):
+        pass
+
+    def get(self, url):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+class FakePool(DriverPool):
+    """DriverPool whose warm browsers are FakeDrivers; clearing launch_gate holds the refill"""
+
+    def __init__(self, **kwargs):
+        super().__init__(headless=True, **kwargs)
+        self.launched = []
+        self.launch_gate = threading.Event()
+        self.launch_gate.set()
+
+    def _launch(self):
+        self.launch_gate.wait()
+        driver = FakeDriver(f"warm-{len(self.launched)}")
+        self.launched.append(driver)
+        return driver
+
+def wait_for_idle(pool, count, timeout=2):
+    deadline = time.monotonic() + timeout
+    while pool._idle.qsize() < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return pool._idle.qsize()
+
+def test_acquire_release():
+    """A leased warm browser downloads into the job folder and comes back reset"""
+    download_dir = tempfile.mkdtemp()
+    pool = FakePool(size=1)
+    try:
+        pool.start()
+        assert wait_for_idle(pool, 1) == 1
+        # Hold the refill the lease triggers, so the browser comes back to a pool with room
+        pool.launch_gate.clear()
+        driver = pool.acquire(download_dir)
+        assert driver is pool.launched[0]
+        assert driver.download_dir == download_dir
+
+        driver.window_handles.append("popup")
+        pool.release(driver)
+        assert wait_for_idle(pool, 1) == 1
+        assert driver.window_handles == ["main"] and not driver.quit_called
+        # The refill finishing now finds the pool full and quits its browser
+        pool.launch_gate.set()
+        deadline = time.monotonic() + 2
+        while pool._refilling and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.launched[1].quit_called
+        assert pool.acquire(download_dir) is driver
+    finally:
+        pool.shutdown()
+        shutil.rmtree(download_dir)
+
+def test_refill_replaces_unhealthy_and_worn_out():
+    """Dead and worn-out browsers are quit, and the refill launches replacements"""
+    download_dir = tempfile.mkdtemp()
+    pool = FakePool(size=1, max_leases=2)
+    try:
+        pool.start()
+        wait_for_idle(pool, 1)
+        first = pool.launched[0]
+        first.alive = False
+        # The dead warm browser is skipped; with none left a cold one is launched
+        cold = FakeDriver("cold")
+        setup_browser, login.setup_browser = login.setup_browser, lambda *args, **kwargs: cold
+        try:
+            assert pool.acquire(download_dir) is cold
+        finally:
+            login.setup_browser = setup_browser
+        assert first.quit_called
+        assert wait_for_idle(pool, 1) == 1
+
+        # Returned to a full pool: quit rather than kept
+        pool.release(cold)
+        assert cold.quit_called
+
+        pool.launch_gate.clear()
+        warm = pool.acquire(download_dir)
+        pool.release(warm)
+        assert pool.acquire(download_dir) is warm
+        pool.release(warm)
+        # The second lease reached max_leases: quit, and the held refill replaces it
+        assert warm.quit_called and pool._idle.qsize() == 0
+        pool.launch_gate.set()
+        assert wait_for_idle(pool, 1) == 1
+        replacement = pool.launched[-1]
+        assert replacement is not warm and pool.acquire(download_dir) is replacement
+    finally:
+        pool.shutdown()
+        shutil.rmtree(download_dir)
+
+def test_double_release():
+    """A second release of the same browser is ignored: it is queued once and not reset again"""
+    download_dir = tempfile.mkdtemp()
+    pool = FakePool(size=1)
+    try:
+        pool.start()
+        wait_for_idle(pool, 1)
+        pool.launch_gate.clear()
+        driver = pool.acquire(download_dir)
+        pool.release(driver)
+        assert pool._idle.qsize() == 1
+
+        # Back in the pool, the browser picks up state from a page; a stray release must not touch it
+        driver.window_handles.append("next job")
+        pool.release(driver)
+        assert pool._idle.qsize() == 1 and not driver.quit_called
+        assert driver.window_handles == ["main", "next job"]
+        assert pool.acquire(download_dir) is driver
+    finally:
+        pool.launch_gate.set()
+        pool.shutdown()
+        shutil.rmtree(download_dir)
+
+def test_shutdown():
+    """Idle browsers are quit and nothing is launched afterwards"""
+    pool = FakePool(size=2)
+    pool.start()
+    wait_for_idle(pool, 2)
+    pool.shutdown()
+    assert all(driver.quit_called for driver in pool.launched)
+    pool.release(FakeDriver("late"))
+    time.sleep(0.05)
+    assert len(pool.launched) == 2 and pool._idle.qsize() == 0
+
+def main():
+    tests = [
+        test_acquire_release,
+        test_refill_replaces_unhealthy_and_worn_out,
+        test_double_release,
+        test_shutdown,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
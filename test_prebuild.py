@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the scheduled pre-generation of reports
+Covers the cron expressions of PREBUILD_SCHEDULE and the freshness of reused reports
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+from datetime import datetime
+
+from module.prebuild import CronSchedule, PrebuiltReports, parse_schedule, next_due, wants_fresh
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_cron_next_after():
+    """Daily, weekday-only and stepped expressions fire at the expected minutes"""
+    # 2024-01-05 is a Friday
+    friday_evening = datetime(2024, 1, 5, 20, 0)
+    assert CronSchedule("0 7 * * *").next_after(friday_evening) == datetime(2024, 1, 6, 7, 0)
+    assert CronSchedule("30 7 * * 1-5").next_after(friday_evening) == datetime(2024, 1, 8, 7, 30)
+    assert CronSchedule("*/15 20 * * *").next_after(friday_evening) == datetime(2024, 1, 5, 20, 15)
+    # Both day fields restricted: either may match, as in cron
+    assert CronSchedule("0 6 1 * 0").next_after(friday_evening) == datetime(2024, 1, 7, 6, 0)
+
+def test_parse_schedule():
+    """Unknown modules and malformed expressions are skipped"""
+    schedule = parse_schedule("stock=0 7 * * *; invoice=0 8 * * *; inventory=61 7 * * *")
+    assert list(schedule) == ["stock"]
+
+    schedule = parse_schedule("stock=0 7 * * *;inventory=0 7 * * *")
+    when, modules = next_due(schedule, datetime(2024, 1, 5, 6, 0))
+    assert when == datetime(2024, 1, 5, 7, 0) and sorted(modules) == ["inventory", "stock"]
+    assert next_due({}) is None
+    assert wants_fresh(["Fresh"]) and not wants_fresh(None)
+
+def test_prebuilt_freshness():
+    """A stored report is reused only while it is young and from today"""
+    root = tempfile.mkdtemp()
+    try:
+        archive = os.path.join(root, "report.zip")
+        with open(archive, "wb") as f:
+            f.write(b"PK")
+        reports = PrebuiltReports(os.path.join(root, "prebuilt"), max_age=3600)
+        assert reports.fresh("stock") is None
+
+        reports.store("stock", archive)
+        zip_path, meta = reports.fresh("stock")
+        with open(zip_path, "rb") as f:
+            assert f.read() == b"PK"
+        assert reports.fresh("stock", now=meta["built_at"] + 3601) is None
+        assert reports.fresh("inventory") is None
+    finally:
+        shutil.rmtree(root)
+
+def main():
+    tests = [
+        test_cron_next_after,
+        test_parse_schedule,
+        test_prebuilt_freshness,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
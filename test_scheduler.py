@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the browser job scheduler
+Covers handing a slot to the next queued job while a detached job finishes
+"""
+
+import sys
+import asyncio
+import logging
+
+from module.scheduler import JobScheduler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def test_detach_starts_next_job():
+    """A detached job frees its slot for the queue but keeps its user busy until release"""
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=1)
+        try:
+            assert await scheduler.acquire("a") == 0
+            waiting = asyncio.create_task(scheduler.acquire("b"))
+            await asyncio.sleep(0)
+            assert not waiting.done()
+
+            assert scheduler.detach("a")
+            assert await asyncio.wait_for(waiting, 1) == 1
+            assert scheduler.busy("a")
+            try:
+                await scheduler.acquire("a")
+                raise AssertionError("a detached user could start a second job")
+            except RuntimeError:
+                pass
+            assert scheduler.stats()["active"] == 1 and scheduler.stats()["detached"] == 1
+
+            scheduler.release("a")
+            assert not scheduler.busy("a") and scheduler.stats()["detached"] == 0
+        finally:
+            scheduler.shutdown()
+    asyncio.run(scenario())
+
+def test_detach_limit():
+    """No more than max_jobs jobs are detached at once; unknown users are ignored"""
+    async def scenario():
+        scheduler = JobScheduler(max_jobs=1)
+        try:
+            assert not scheduler.detach("nobody")
+            await scheduler.acquire("a")
+            assert scheduler.detach("a")
+            await scheduler.acquire("b")
+            # The slot is kept: b's thread would otherwise run past the executor's size
+            assert not scheduler.detach("b")
+            assert scheduler.stats()["active"] == 1
+        finally:
+            scheduler.shutdown()
+    asyncio.run(scenario())
+
+def main():
+    tests = [
+        test_detach_starts_next_job,
+        test_detach_limit,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the journaled stock workbook writer
+Checks that depot rows survive a run that dies before close()
+"""
+
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+from openpyxl import load_workbook
+
+from module.stock import StockWorkbookWriter
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+HEADER = ["Depot", "Brand", "Cases"]
+
+def depots_in(filepath):
+    workbook = load_workbook(filepath, read_only=True)
+    try:
+        rows = list(workbook.active.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+    assert list(rows[0]) == HEADER
+    return [row[0] for row in rows[1:]]
+
+def test_recover_abandoned_run():
+    """Batches journaled by a writer that never closed are in the next writer's workbook"""
+    directory = tempfile.mkdtemp()
+    filepath = os.path.join(directory, "stocks.xlsx")
+    try:
+        crashed = StockWorkbookWriter(filepath)
+        assert crashed.append("Depot A", HEADER, [["Depot A", "Brand 1", 3], ["Depot A", "Brand 2", 5]])
+        assert crashed.append("Depot B", HEADER, [["Depot B", "Brand 1", 7]])
+        # The process dies mid-write: no close(), and the last journal line is torn
+        crashed._journal.write('{"depot": "Depot C", "header": ')
+        crashed._journal.flush()
+        del crashed
+        assert not os.path.exists(filepath)
+
+        writer = StockWorkbookWriter(filepath)
+        assert writer.append("Depot C", HEADER, [["Depot C", "Brand 3", 1]])
+        assert writer.close()
+
+        assert depots_in(filepath) == ["Depot A", "Depot A", "Depot B", "Depot C"]
+        assert not os.path.exists(writer.journal_path)
+    finally:
+        shutil.rmtree(directory)
+
+def test_keep_existing_workbook():
+    """A new writer for a finished workbook keeps its rows and adds the new ones"""
+    directory = tempfile.mkdtemp()
+    filepath = os.path.join(directory, "stocks.xlsx")
+    try:
+        first = StockWorkbookWriter(filepath)
+        first.append("Depot A", HEADER, [["Depot A", "Brand 1", 3]])
+        first.close()
+
+        second = StockWorkbookWriter(filepath)
+        second.append("Depot B", HEADER, [["Depot B", "Brand 1", 7]])
+        second.close()
+
+        assert depots_in(filepath) == ["Depot A", "Depot B"]
+    finally:
+        shutil.rmtree(directory)
+
+def main():
+    tests = [
+        test_recover_abandoned_run,
+        test_keep_existing_workbook,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the postback-aware waits
+Uses a fake driver whose dropdowns post back only when their value changes, like ASP.NET
+"""
+
+import sys
+import time
+import logging
+
+from selenium.webdriver.common.by import By
+
+from module.waits import select_option
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+class FakeOption:
+    def __init__(self, dropdown, text):
+        self.dropdown = dropdown
+        self.text = text
+
+    def is_selected(self):
+        return self.dropdown.selected == self.text
+
+    def is_enabled(self):
+        return True
+
+    def value_of_css_property(self, name):
+        return "visible"
+
+    def click(self):
+        # The onchange handler submits the form: a new __VIEWSTATE
+        self.dropdown.selected = self.text
+        self.dropdown.driver.viewstate += 1
+
+class FakeDropdown:
+    tag_name = "select"
+
+    def __init__(self, driver, options, selected):
+        self.driver = driver
+        self.options = [FakeOption(self, text) for text in options]
+        self.selected = selected
+
+    def get_dom_attribute(self, name):
+        return None
+
+    def is_enabled(self):
+        return True
+
+    def find_elements(self, by, value):
+        if by == By.TAG_NAME:
+            return self.options
+        return [option for option in self.options if f'"{option.text}"' in value]
+
+class FakeDriver:
+    """Answers the __VIEWSTATE and idle-page scripts the postback wait runs"""
+
+    def __init__(self):
+        self.viewstate = 0
+
+    def execute_script(self, script, *args):
+        if "__VIEWSTATE" in script:
+            return f"{self.viewstate}:state"
+        return True
+
+def test_select_option_posts_back():
+    """Choosing another option waits for its postback"""
+    driver = FakeDriver()
+    dropdown = FakeDropdown(driver, ["Select", "North", "South"], "Select")
+    assert select_option(driver, dropdown, "North", timeout=2)
+    assert dropdown.selected == "North" and driver.viewstate == 1
+
+def test_select_option_already_selected():
+    """The option already shown is left alone, without waiting for a postback that never comes"""
+    driver = FakeDriver()
+    dropdown = FakeDropdown(driver, ["Select", "North", "South"], "North")
+    started = time.monotonic()
+    assert not select_option(driver, dropdown, "North", timeout=2)
+    assert time.monotonic() - started < 1
+    assert driver.viewstate == 0
+
+def main():
+    tests = [
+        test_select_option_posts_back,
+        test_select_option_already_selected,
+    ]
+    failed = 0
+    for test in tests:
+        try:
+            test()
+            logger.info(f"✅ {test.__name__}")
+        except Exception as e:
+            failed += 1
+            logger.error(f"❌ {test.__name__}: {e!r}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -40,11 +40,14 @@ def test_login_and_modules():
         try:
             # Get CAPTCHA
             logger.info("Getting CAPTCHA...")
-            captcha_path = get_captcha_image(driver, user="test")
-            if not captcha_path:
+            captcha_image = get_captcha_image(driver, user="test")
+            if not captcha_image:
                 logger.error("❌ Failed to get CAPTCHA")
                 return False
             
+            captcha_path = os.path.join(temp_dir, "captcha.png")
+            with open(captcha_path, "wb") as f:
+                f.write(captcha_image.getvalue())
             logger.info(f"✅ CAPTCHA saved to: {captcha_path}")
             logger.info("Please open the CAPTCHA image and solve it manually.")
             
@@ -18,13 +18,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def solve_captcha_with_ocr(captcha_path):
+def solve_captcha_with_ocr(captcha_image):
     """Solve CAPTCHA using OCR"""
     try:
         from module.ocrdemo import solve_captcha_image
-        logger.info(f"Attempting to solve CAPTCHA: {captcha_path}")
+        logger.info("Attempting to solve in-memory CAPTCHA")
         
-        captcha_text = solve_captcha_image(captcha_path)
+        captcha_text = solve_captcha_image(captcha_image)
         if captcha_text:
             logger.info(f"✅ CAPTCHA solved: {captcha_text}")
             return captcha_text
@@ -58,15 +58,18 @@ def test_login_and_modules():
         try:
             # Get CAPTCHA
             logger.info("Getting CAPTCHA...")
-            captcha_path = get_captcha_image(driver, user="test")
-            if not captcha_path:
+            captcha_image = get_captcha_image(driver, user="test")
+            if not captcha_image:
                 logger.error("❌ Failed to get CAPTCHA")
                 return False
             
+            captcha_path = os.path.join(temp_dir, "captcha.png")
+            with open(captcha_path, "wb") as f:
+                f.write(captcha_image.getvalue())
             logger.info(f"✅ CAPTCHA saved to: {captcha_path}")
             
             # Try OCR first
-            captcha_text = solve_captcha_with_ocr(captcha_path)
+            captcha_text = solve_captcha_with_ocr(captcha_image)
             
             # If OCR fails, ask for manual input
             if not captcha_text: